@@ -1,16 +1,65 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.responses import StreamingResponse, FileResponse
 from pydantic import BaseModel
 import uvicorn
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
+from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import threading
+import time
+import uuid
 import utils
+import cache
+import models
+import tts
 import os
 import json
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Models load on first use unless MODEL_WARMUP asks for them earlier
+    models.warm_up_from_env()
+    purged = utils.purge_simulated_articles()
+    if purged:
+        print(f"Removed {purged} simulated articles from the article store")
+    yield
+
 app = FastAPI(title="News Sentiment API",
-             description="API for news extraction, sentiment analysis, and text-to-speech conversion")
+             description="API for news extraction, sentiment analysis, and text-to-speech conversion",
+             lifespan=lifespan)
+
+# Blocking pipeline work runs on a bounded worker pool so the event loop stays free
+API_WORKERS = int(os.environ.get("API_WORKERS", "2"))
+executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="api")
+
+# Admission control: requests running or waiting for a worker before new ones get a 429
+API_MAX_IN_FLIGHT = int(os.environ.get("API_MAX_IN_FLIGHT", "8"))
+API_RETRY_AFTER = int(os.environ.get("API_RETRY_AFTER", "5"))
+in_flight = 0
+
+# Largest watchlist accepted by /api/news/batch
+BATCH_MAX_COMPANIES = int(os.environ.get("BATCH_MAX_COMPANIES", "500"))
+
+# Background analysis jobs by id, kept for JOB_TTL seconds after they finish
+JOB_TTL = float(os.environ.get("JOB_TTL", "3600"))
+jobs = {}
+jobs_lock = threading.Lock()
+
+# Seconds /api/audio waits for audio that is still being synthesized
+AUDIO_WAIT_TIMEOUT = float(os.environ.get("AUDIO_WAIT_TIMEOUT", "30"))
+
+# Longest window /api/trends reports on
+TRENDS_MAX_DAYS = int(os.environ.get("TRENDS_MAX_DAYS", "365"))
+
+# Summary modes a request may ask for, see utils.generate_summary
+SUMMARY_MODES = ("abstractive", "extractive")
 
 class CompanyRequest(BaseModel):
     company_name: str
+    debug: bool = False
+    summary_mode: Optional[str] = None
 
 class ArticleResponse(BaseModel):
     Title: str
@@ -46,49 +95,536 @@ class CompanyResponse(BaseModel):
     Comparative_Sentiment_Score: ComparativeSentiment
     Final_Sentiment_Analysis: str
     Audio: str
+    Timings: Optional[Dict[str, float]] = None
+    Deduplication: Optional[Dict[str, int]] = None
+    Store: Optional[Dict[str, int]] = None
+
+class TopicCount(BaseModel):
+    Topic: str
+    Count: int
+
+class TrendBucket(BaseModel):
+    Start: str
+    End: str
+    Articles: int
+    Sentiment_Distribution: SentimentDistribution
+    Top_Topics: List[TopicCount]
+
+class TrendResponse(BaseModel):
+    Company: str
+    Start: str
+    End: str
+    Articles: int
+    Sentiment_Distribution: SentimentDistribution
+    Top_Topics: List[TopicCount]
+    Buckets: List[TrendBucket]
+
+class BatchRequest(BaseModel):
+    company_names: List[str]
+    include_audio: bool = False
+    summary_mode: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    Results: Dict[str, CompanyResponse]
+    Errors: Dict[str, str]
+
+class JobResponse(BaseModel):
+    Job_ID: str
+    Company: str
+    Status: str
+    Total_Articles: Optional[int] = None
+    Completed_Articles: int
+    Articles: List[ArticleResponse]
+    Result: Optional[CompanyResponse] = None
+    Error: Optional[str] = None
+
+def submit_blocking(func: Callable[..., Any], *args) -> "asyncio.Future[Any]":
+    """
+    Schedule blocking work on the API worker pool instead of the event loop.
+    
+    At most API_MAX_IN_FLIGHT calls may be running or queued for a worker at
+    once; beyond that the request is rejected with a 429.
+    """
+    global in_flight
+    if in_flight >= API_MAX_IN_FLIGHT:
+        raise HTTPException(status_code=429, detail="Too many requests in progress, please retry later",
+                            headers={"Retry-After": str(API_RETRY_AFTER)})
+    
+    def release(_):
+        global in_flight
+        in_flight -= 1
+    
+    # The counter is only touched on the event loop thread, so it needs no lock
+    in_flight += 1
+    future = asyncio.get_running_loop().run_in_executor(executor, functools.partial(func, *args))
+    future.add_done_callback(release)
+    return future
+
+def submit_refresh(refresh: Callable[[], None]) -> bool:
+    """
+    Run a background response cache refresh on the API worker pool.
+    
+    Refreshes count against API_MAX_IN_FLIGHT like requests do; when the
+    server is saturated the refresh is dropped and the stale response served.
+    """
+    try:
+        submit_blocking(refresh)
+    except HTTPException:
+        return False
+    return True
 
-@app.post("/api/news", response_model=CompanyResponse)
-async def get_company_news(request: CompanyRequest):
+# Whole responses per company, served stale while they refresh in the background
+response_cache = cache.response_cache_from_env(submit_refresh)
+
+def resolve_summary_mode(summary_mode: Optional[str]) -> str:
+    """Return the summary mode a request asked for, or the configured default"""
+    if summary_mode is None:
+        return utils.SUMMARY_MODE
+    if summary_mode not in SUMMARY_MODES:
+        raise HTTPException(status_code=400, detail=f"summary_mode must be one of {', '.join(SUMMARY_MODES)}")
+    return summary_mode
+
+def check_company_names(company_names: List[str]) -> None:
+    """Reject company names with nothing to search for"""
+    if any(not name.strip() for name in company_names):
+        raise HTTPException(status_code=400, detail="Company names must not be blank")
+
+def response_key(company_name: str, summary_mode: str) -> str:
+    """Cache key of a company's response; each summary mode is cached separately"""
+    return f"{response_cache.normalize(company_name)}|{summary_mode}"
+
+async def run_blocking(func: Callable[..., Any], *args) -> Any:
+    """Run blocking work on the API worker pool and wait for its result, see submit_blocking"""
+    return await submit_blocking(func, *args)
+
+def format_company_response(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a process_company_news result to match the response model"""
+    return {
+        "Company": result["Company"],
+        "Articles": result["Articles"],
+        "Comparative_Sentiment_Score": {
+            "Sentiment_Distribution": result["Comparative Sentiment Score"]["Sentiment Distribution"],
+            "Coverage_Differences": result["Comparative Sentiment Score"]["Coverage Differences"],
+            "Topic_Overlap": {
+                "Common_Topics": result["Comparative Sentiment Score"]["Topic Overlap"]["Common Topics"],
+                "Unique_Topics": result["Comparative Sentiment Score"]["Topic Overlap"]["Unique Topics"]
+            },
+            "Final_Sentiment_Analysis": result["Comparative Sentiment Score"]["Final Sentiment Analysis"]
+        },
+        "Final_Sentiment_Analysis": result["Final Sentiment Analysis"],
+        "Audio": result["Audio"],
+        "Timings": result.get("Timings"),
+        "Deduplication": result.get("Deduplication"),
+        "Store": result.get("Store")
+    }
+
+@app.post("/api/news", response_model=CompanyResponse, response_model_exclude_none=True)
+async def get_company_news(request: CompanyRequest, response: Response):
     """
     Process news for a given company
     
     This endpoint extracts news articles about the specified company,
     performs sentiment analysis, and generates a comparative analysis
-    along with a text-to-speech summary in Hindi.
+    along with a text-to-speech summary in Hindi. With `debug` set, the
+    response also contains per-stage wall-clock timings. `summary_mode`
+    picks "abstractive" (transformer) or the faster "extractive" summaries,
+    defaulting to SUMMARY_MODE.
+    
+    Responses are cached per company and summary mode. The `X-Cache` header tells whether the
+    response was computed (MISS), served from cache (HIT), served from cache
+    while a refresh runs in the background (STALE) or shared with a
+    concurrent identical request (COALESCED). Debug requests bypass the cache.
+    
+    The analysis runs on a bounded worker pool. When too many requests are
+    already in progress the endpoint answers 429 with a Retry-After header.
     """
+    check_company_names([request.company_name])
+    summary_mode = resolve_summary_mode(request.summary_mode)
+    
     try:
-        # Process the company news
-        result = utils.process_company_news(request.company_name)
+        key = response_key(request.company_name, summary_mode)
+        compute = lambda: format_company_response(
+            utils.process_company_news(request.company_name, summary_mode=summary_mode)
+        )
         
-        # Format the result to match the response model
-        response = {
-            "Company": result["Company"],
-            "Articles": result["Articles"],
-            "Comparative_Sentiment_Score": {
-                "Sentiment_Distribution": result["Comparative Sentiment Score"]["Sentiment Distribution"],
-                "Coverage_Differences": result["Comparative Sentiment Score"]["Coverage Differences"],
-                "Topic_Overlap": {
-                    "Common_Topics": result["Comparative Sentiment Score"]["Topic Overlap"]["Common Topics"],
-                    "Unique_Topics": result["Comparative Sentiment Score"]["Topic Overlap"]["Unique Topics"]
-                },
-                "Final_Sentiment_Analysis": result["Comparative Sentiment Score"]["Final Sentiment Analysis"]
-            },
-            "Final_Sentiment_Analysis": result["Final Sentiment Analysis"],
-            "Audio": result["Audio"]
-        }
+        if request.debug:
+            result = await run_blocking(
+                lambda: format_company_response(
+                    utils.process_company_news(request.company_name, debug=True, summary_mode=summary_mode)
+                )
+            )
+            status = "BYPASS"
+        else:
+            # Only a miss takes a worker; hits and requests sharing a running
+            # computation wait for it on the event loop. Shielded, so a
+            # client going away does not cancel the computation for the others
+            future, status = response_cache.get_or_start(key, compute, submit_blocking)
+            result = await asyncio.shield(asyncio.wrap_future(future))
         
-        return response
+        response.headers["X-Cache"] = status
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+
+@app.post("/api/news/batch", response_model=BatchResponse, response_model_exclude_none=True)
+async def get_batch_news(request: BatchRequest):
+    """
+    Process news for many companies in one call
+    
+    Articles are fetched for all companies at the same time and analyzed in
+    shared model batches. Companies that fail are reported in `Errors`
+    without failing the others. The Hindi audio summaries are only
+    generated with `include_audio` set; otherwise `Audio` is empty.
+    """
+    if len(request.company_names) > BATCH_MAX_COMPANIES:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_COMPANIES} companies per batch")
+    check_company_names(request.company_names)
+    summary_mode = resolve_summary_mode(request.summary_mode)
+    
+    try:
+        batch = await run_blocking(utils.process_companies_batch, request.company_names, request.include_audio,
+                                   summary_mode)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing request: {str(e)}")
+    
+    results = {}
+    for name, result in batch["results"].items():
+        results[name] = format_company_response(result)
+        if request.include_audio:
+            response_cache.put(response_key(name, summary_mode), results[name])
+    
+    return {"Results": results, "Errors": batch["errors"]}
+
+def format_stream_event(event: Dict[str, Any], stream_format: str) -> str:
+    """Encode a streaming event as an NDJSON line or a server-sent event"""
+    data = json.dumps(event)
+    if stream_format == "sse":
+        return f"event: {event['event']}\ndata: {data}\n\n"
+    return data + "\n"
+
+@app.post("/api/news/stream")
+async def stream_company_news(request: CompanyRequest, format: str = "ndjson"):
+    """
+    Process news for a given company, streaming results as they are ready
+    
+    Emits one `article` event per article as soon as its summary, sentiment
+    and topics are done, then a `comparative` event with the comparative
+    analysis, an `audio` event with the audio reference and a final `done`
+    event. A failure is reported as an `error` event. Events are sent as
+    newline-delimited JSON, or as server-sent events with `format=sse`.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+    
+    check_company_names([request.company_name])
+    summary_mode = resolve_summary_mode(request.summary_mode)
+    
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    key = response_key(request.company_name, summary_mode)
+    
+    def on_article(index: int, article: Dict[str, Any], total: int) -> None:
+        loop.call_soon_threadsafe(queue.put_nowait, {"event": "article", "index": index, "total": total,
+                                                     "article": article})
+    
+    def compute() -> Dict[str, Any]:
+        result = format_company_response(
+            utils.process_company_news(request.company_name, debug=request.debug, on_article=on_article,
+                                       summary_mode=summary_mode)
+        )
+        if not request.debug:
+            response_cache.put(key, result)
+        return result
+    
+    cached = None
+    status = "BYPASS"
+    if not request.debug:
+        cached = response_cache.lookup(key, lambda: format_company_response(
+            utils.process_company_news(request.company_name, summary_mode=summary_mode)
+        ))
+        status = cached[1] if cached is not None else "MISS"
+    
+    if cached is not None:
+        future = loop.create_future()
+        future.set_result(cached[0])
+        for index, article in enumerate(cached[0]["Articles"]):
+            on_article(index, article, len(cached[0]["Articles"]))
+    else:
+        future = submit_blocking(compute)
+    
+    async def events():
+        waiter = asyncio.ensure_future(queue.get())
+        while True:
+            await asyncio.wait([waiter, future], return_when=asyncio.FIRST_COMPLETED)
+            if waiter.done():
+                yield format_stream_event(waiter.result(), format)
+                waiter = asyncio.ensure_future(queue.get())
+            elif future.done():
+                break
+        
+        # Articles reported just before the pipeline returned may still be queued
+        waiter.cancel()
+        while not queue.empty():
+            yield format_stream_event(queue.get_nowait(), format)
+        
+        if future.exception() is not None:
+            yield format_stream_event({"event": "error", "detail": f"Error processing request: {str(future.exception())}"}, format)
+            return
+        
+        result = future.result()
+        yield format_stream_event({
+            "event": "comparative",
+            "Comparative_Sentiment_Score": result["Comparative_Sentiment_Score"],
+            "Final_Sentiment_Analysis": result["Final_Sentiment_Analysis"],
+            "Timings": result.get("Timings"),
+            "Deduplication": result.get("Deduplication"),
+            "Store": result.get("Store")
+        }, format)
+        yield format_stream_event({"event": "audio", "Audio": result["Audio"]}, format)
+        yield format_stream_event({"event": "done"}, format)
+    
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(events(), media_type=media_type,
+                             headers={"X-Cache": status})
+
+def format_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Format a job to match the job response model"""
+    with jobs_lock:
+        return {
+            "Job_ID": job["id"],
+            "Company": job["company"],
+            "Status": job["status"],
+            "Total_Articles": job["total"],
+            "Completed_Articles": len(job["articles"]),
+            "Articles": [job["articles"][index] for index in sorted(job["articles"])],
+            "Result": job["result"],
+            "Error": job["error"]
+        }
+
+def run_job(job: Dict[str, Any], request: CompanyRequest, summary_mode: str) -> None:
+    """Run the analysis for a job, recording each article as soon as it is done"""
+    def on_article(index: int, article: Dict[str, Any], total: int) -> None:
+        with jobs_lock:
+            job["total"] = total
+            job["articles"][index] = article
+    
+    with jobs_lock:
+        job["status"] = "running"
+    
+    try:
+        result = format_company_response(
+            utils.process_company_news(request.company_name, debug=request.debug, on_article=on_article,
+                                       summary_mode=summary_mode)
+        )
+        if not request.debug:
+            response_cache.put(response_key(request.company_name, summary_mode), result)
+        
+        with jobs_lock:
+            job["result"] = result
+            job["status"] = "done"
+    except Exception as e:
+        with jobs_lock:
+            job["error"] = f"Error processing request: {str(e)}"
+            job["status"] = "failed"
+    finally:
+        with jobs_lock:
+            job["finished_at"] = time.time()
+
+def prune_jobs() -> None:
+    """Forget jobs that finished more than JOB_TTL seconds ago"""
+    cutoff = time.time() - JOB_TTL
+    with jobs_lock:
+        expired = [job_id for job_id, job in jobs.items()
+                   if job["finished_at"] is not None and job["finished_at"] < cutoff]
+        for job_id in expired:
+            del jobs[job_id]
+
+@app.post("/api/jobs", response_model=JobResponse, response_model_exclude_none=True, status_code=202)
+async def create_job(request: CompanyRequest):
+    """
+    Start a news analysis job for a given company
+    
+    Returns a job id right away. Poll `GET /api/jobs/{job_id}` for the
+    articles finished so far and, once the job is done, the full result.
+    """
+    check_company_names([request.company_name])
+    summary_mode = resolve_summary_mode(request.summary_mode)
+    prune_jobs()
+    
+    job = {
+        "id": uuid.uuid4().hex,
+        "company": request.company_name,
+        "status": "queued",
+        "total": None,
+        "articles": {},
+        "result": None,
+        "error": None,
+        "finished_at": None
+    }
+    
+    cached = None
+    if not request.debug:
+        key = response_key(request.company_name, summary_mode)
+        cached = response_cache.lookup(key, lambda: format_company_response(
+            utils.process_company_news(request.company_name, summary_mode=summary_mode)
+        ))
+    
+    if cached is not None:
+        result = cached[0]
+        job.update(status="done", result=result, total=len(result["Articles"]),
+                   articles=dict(enumerate(result["Articles"])), finished_at=time.time())
+    else:
+        submit_blocking(run_job, job, request, summary_mode)
+    
+    with jobs_lock:
+        jobs[job["id"]] = job
+    
+    return format_job(job)
+
+@app.get("/api/jobs/{job_id}", response_model=JobResponse, response_model_exclude_none=True)
+async def get_job(job_id: str):
+    """
+    Get the state of a news analysis job
+    
+    While the job runs, `Articles` holds the articles finished so far.
+    """
+    with jobs_lock:
+        job = jobs.get(job_id)
+    
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    
+    return format_job(job)
+
+@app.get("/api/audio/{key}")
+async def get_audio(key: str):
+    """
+    Serve a Hindi audio summary
+    
+    `key` is the hash in the `Audio` URL of an analysis. Audio that is still
+    being synthesized is waited for up to AUDIO_WAIT_TIMEOUT seconds, after
+    which the endpoint answers 503 with a Retry-After header. Range requests
+    are supported, so players can seek. The audio under a key never changes,
+    so clients may cache it indefinitely, unless a fallback engine spoke it
+    in place of the configured one; see tts.synthesize_with_fallback.
+    """
+    if utils.tts_engine is None:
+        raise HTTPException(status_code=404, detail="No speech engine is installed")
+    try:
+        utils.audio_cache.path(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail=f"Unknown audio: {key}")
+    
+    pending = utils.audio_cache.pending(key)
+    if pending is not None:
+        try:
+            # Shielded, so a timeout does not cancel a synthesis still queued
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(pending)), AUDIO_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Audio is still being generated",
+                                headers={"Retry-After": str(API_RETRY_AFTER)})
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error generating audio: {str(e)}")
+    
+    path = utils.audio_cache.wait(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail=f"Unknown audio: {key}")
+    
+    extension = os.path.splitext(path)[1][1:]
+    if utils.audio_cache.is_substitute(key, path):
+        # The configured engine is tried again when the same text is requested
+        cache_control = "no-cache"
+    else:
+        cache_control = "public, max-age=31536000, immutable"
+    return FileResponse(path, media_type=tts.MEDIA_TYPES.get(extension, "application/octet-stream"),
+                        headers={"Cache-Control": cache_control})
+
+@app.get("/api/trends/{company}", response_model=TrendResponse)
+async def get_trends(company: str, window: str = "30d", bucket: str = "1d", topics: int = 5):
+    """
+    Sentiment and topic trend of a company
+    
+    Counts the sentiments and topics of the company's analyzed articles per
+    `bucket` over the last `window`, for example `window=30d&bucket=1d`, by
+    publication day. Served from per-day counts kept up to date as articles
+    are analyzed, so only articles analyzed by earlier requests are included.
+    """
+    try:
+        window_days = utils.parse_days(window)
+        bucket_days = utils.parse_days(bucket)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if window_days > TRENDS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"window must be at most {TRENDS_MAX_DAYS}d")
+    if bucket_days > window_days:
+        raise HTTPException(status_code=400, detail="bucket must not be longer than window")
+    if topics < 0:
+        raise HTTPException(status_code=400, detail="topics must not be negative")
+    if utils.article_store is None:
+        raise HTTPException(status_code=503, detail="Trends need the article store, see ARTICLE_STORE_PATH")
+    
+    trends = utils.sentiment_trends(company, window_days, bucket_days, topics)
+    
+    def format_period(period):
+        return {
+            "Start": period["Start"],
+            "End": period["End"],
+            "Articles": period["Articles"],
+            "Sentiment_Distribution": period["Sentiment Distribution"],
+            "Top_Topics": period["Top Topics"]
+        }
+    
+    return {
+        "Company": trends["Company"],
+        **format_period(trends),
+        "Buckets": [format_period(period) for period in trends["Buckets"]]
+    }
+
+@app.get("/api/cache")
+async def cache_stats():
+    """
+    NLP result cache statistics
+    
+    Returns hit/miss counters of the per-article result cache
+    """
+    return utils.nlp_cache.stats()
+
+@app.delete("/api/cache")
+async def invalidate_cache(model: Optional[str] = None):
+    """
+    Invalidate cached NLP results
+    
+    Drops every entry produced by `model`, for example after the model was
+    replaced, or the whole cache when no model is given.
+    """
+    if model is None:
+        utils.nlp_cache.clear()
+        return {"invalidated": "all"}
+    
+    return {"invalidated": utils.nlp_cache.invalidate_model(model)}
 
 @app.get("/api/health")
 async def health_check():
     """
     Health check endpoint
     
-    Returns status of the API
+    Returns status of the API and the loading state of each model
     """
-    return {"status": "healthy", "version": "1.0.0"}
+    return {
+        "status": "healthy",
+        "version": "1.0.0",
+        "ready": models.registry.ready(),
+        "models": models.registry.status(),
+        "backends": {
+            "sentiment": models.SENTIMENT_BACKEND,
+            "summarizer": models.SUMMARIZATION_BACKEND
+        }
+    }
 
 # If executed directly, run the API server
 if __name__ == "__main__":
@@ -3,12 +3,16 @@ import requests
 import json
 import os
 import base64
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
 import time
 
 # Define API URL - Configure for different environments
 API_BASE_URL = os.environ.get("API_BASE_URL", "http://localhost:8000")
 
+# How often to poll an analysis job, and how long to wait for it, in seconds
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1"))
+JOB_TIMEOUT = float(os.environ.get("JOB_TIMEOUT", "600"))
+
 # Set page config
 st.set_page_config(
     page_title="News Sentiment Analysis",
@@ -59,33 +63,116 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def fetch_company_news(company_name: str) -> Dict[str, Any]:
+def fetch_company_news(company_name: str, on_progress: Optional[Callable[[int, Optional[int]], None]] = None) -> Dict[str, Any]:
     """
     Fetch news analysis for a given company from the API
     
+    The analysis runs as a background job on the API, which is polled until
+    it is done, so long analyses are not cut off by a request timeout.
+    
     Args:
         company_name: Name of the company
+        on_progress: Optional callback called with the number of finished
+            articles and the total number of articles (None until known)
         
     Returns:
         Dictionary containing processed news data
     """
     try:
         response = requests.post(
-            f"{API_BASE_URL}/api/news",
+            f"{API_BASE_URL}/api/jobs",
             json={"company_name": company_name},
             timeout=30
         )
         
-        if response.status_code == 200:
-            return response.json()
-        else:
+        if response.status_code != 202:
             st.error(f"Error: {response.status_code} - {response.text}")
             return None
+        
+        job = response.json()
+        deadline = time.monotonic() + JOB_TIMEOUT
+        while job["Status"] not in ("done", "failed"):
+            if time.monotonic() > deadline:
+                st.error(f"Analysis for {company_name} did not finish within {JOB_TIMEOUT} seconds")
+                return None
+            
+            if on_progress is not None:
+                on_progress(job["Completed_Articles"], job.get("Total_Articles"))
+            
+            time.sleep(JOB_POLL_INTERVAL)
+            response = requests.get(f"{API_BASE_URL}/api/jobs/{job['Job_ID']}", timeout=30)
+            if response.status_code != 200:
+                st.error(f"Error: {response.status_code} - {response.text}")
+                return None
+            job = response.json()
+        
+        if job["Status"] == "failed":
+            st.error(f"Error: {job.get('Error')}")
+            return None
+        
+        return job["Result"]
     except Exception as e:
         st.error(f"Error connecting to API: {str(e)}")
         # For demo/testing, provide fallback sample data
         return get_sample_data(company_name)
 
+def fetch_audio(audio: str) -> Optional[Tuple[bytes, str]]:
+    """
+    Download an audio summary from the API
+    
+    The browser may not be able to reach API_BASE_URL, so the app downloads
+    the audio and hands the bytes to the player. Audio that is still being
+    synthesized is retried after the API's Retry-After delay, for up to
+    JOB_TIMEOUT seconds.
+    
+    Args:
+        audio: Audio path returned with the analysis, /api/audio/{hash}
+        
+    Returns:
+        Tuple of the audio bytes and their media type, or None when the
+        audio could not be downloaded
+    """
+    deadline = time.monotonic() + JOB_TIMEOUT
+    try:
+        while True:
+            # The API itself waits up to AUDIO_WAIT_TIMEOUT seconds before answering 503
+            response = requests.get(f"{API_BASE_URL}{audio}", timeout=(10, 60))
+            if response.status_code == 200:
+                return response.content, response.headers.get("Content-Type", "audio/mpeg")
+            
+            retry_after = float(response.headers.get("Retry-After", JOB_POLL_INTERVAL))
+            if response.status_code != 503 or time.monotonic() + retry_after > deadline:
+                st.error(f"Error loading the audio summary: {response.status_code} - {response.text}")
+                return None
+            time.sleep(retry_after)
+    except Exception as e:
+        st.error(f"Error loading the audio summary: {str(e)}")
+        return None
+
+def stream_company_news(company_name: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream news analysis events for a given company from the API
+    
+    Args:
+        company_name: Name of the company
+        
+    Yields:
+        Events as they arrive: one "article" event per article, then
+        "comparative", "audio" and "done", or an "error" event
+    """
+    with requests.post(
+        f"{API_BASE_URL}/api/news/stream",
+        json={"company_name": company_name},
+        stream=True,
+        timeout=(10, JOB_TIMEOUT)
+    ) as response:
+        if response.status_code != 200:
+            raise RuntimeError(f"{response.status_code} - {response.text}")
+        
+        for line in response.iter_lines():
+            if line:
+                yield json.loads(line)
+
 def get_sample_data(company_name: str) -> Dict[str, Any]:
     """
     Generate sample data for demonstration when API is not available
@@ -117,69 +204,6 @@ def get_sample_data(company_name: str) -> Dict[str, Any]:
                 "Published_Date": "2025-03-10",
                 "URL": f"https://example.com/{company_name.lower()}/2"
             },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
-            {
-                "Title": f"{company_name} Announces Changes to Leadership Team",
-                "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
-                "Sentiment": "Neutral",
-                "Topics": ["Leadership", "Corporate Governance", "Organization Structure"],
-                "Source": "Market Watch",
-                "Published_Date": "2025-03-05",
-                "URL": f"https://example.com/{company_name.lower()}/3"
-            },
             {
                 "Title": f"{company_name} Announces Changes to Leadership Team",
                 "Summary": f"{company_name} has announced changes that could impact its operations in the coming months.",
@@ -335,40 +359,72 @@ def main():
     # Process button
     if st.button("Analyze News") and company_name:
         with st.spinner(f"Analyzing news for {company_name}..."):
-            # Display a progress bar to show work is happening
-            progress_bar = st.progress(0)
-            for i in range(100):
-                time.sleep(0.05)  # Simulate work
-                progress_bar.progress(i + 1)
+            st.header(f"News Analysis for {company_name}")
             
-            # Fetch data from API
-            result = fetch_company_news(company_name)
+            # Summary tabs
+            tab1, tab2, tab3 = st.tabs(["Articles", "Comparative Analysis", "Audio Summary"])
             
-            if result:
-                # Display results
-                st.header(f"News Analysis for {result['Company']}")
-                
-                # Summary tabs
-                tab1, tab2, tab3 = st.tabs(["Articles", "Comparative Analysis", "Audio Summary"])
-                
-                with tab1:
-                    st.subheader("Articles Analysis")
-                    for i, article in enumerate(result["Articles"]):
-                        display_article_card(article, i)
-                
+            with tab1:
+                st.subheader("Articles Analysis")
+                progress_bar = st.progress(0)
+            
+            # Render each article card as soon as the API has analyzed it
+            articles_shown = 0
+            analysis = None
+            audio = None
+            try:
+                for event in stream_company_news(company_name):
+                    if event["event"] == "article":
+                        with tab1:
+                            display_article_card(event["article"], event["index"])
+                        articles_shown += 1
+                        progress_bar.progress(articles_shown / event["total"])
+                    elif event["event"] == "comparative":
+                        analysis = event["Comparative_Sentiment_Score"]
+                    elif event["event"] == "audio":
+                        audio = event["Audio"]
+                    elif event["event"] == "error":
+                        st.error(f"Error: {event['detail']}")
+            except Exception as e:
+                if articles_shown:
+                    st.error(f"Error connecting to API: {str(e)}")
+                else:
+                    # Streaming unavailable: fall back to polling an analysis job
+                    def show_progress(completed: int, total: Optional[int]) -> None:
+                        if total:
+                            progress_bar.progress(completed / total)
+                    
+                    result = fetch_company_news(company_name, on_progress=show_progress)
+                    if result:
+                        with tab1:
+                            for i, article in enumerate(result["Articles"]):
+                                display_article_card(article, i)
+                        analysis = result["Comparative_Sentiment_Score"]
+                        audio = result["Audio"]
+            
+            progress_bar.progress(1.0)
+            
+            if analysis:
                 with tab2:
                     st.subheader("Comparative Sentiment Analysis")
-                    display_comparative_analysis(result["Comparative_Sentiment_Score"])
-                
+                    display_comparative_analysis(analysis)
+            
+            if audio is not None:
                 with tab3:
                     st.subheader("Audio Summary (Hindi)")
                     st.markdown("Listen to the audio summary of the news analysis in Hindi:")
                     
-                    # In a real implementation, you would provide the actual audio file
-                    # For demonstration, we'll show a placeholder
-                    st.audio("https://upload.wikimedia.org/wikipedia/commons/5/5b/Hindi_svar.ogg", format="audio/ogg")
-                    
-                    st.markdown("**Note:** This is a placeholder audio. In the actual implementation, the audio would be a Hindi text-to-speech conversion of the news summary.")
+                    # The API synthesizes the audio in the background and serves it from this path;
+                    # its format depends on the API's TTS engine
+                    audio_file = fetch_audio(audio) if audio.startswith("/api/audio/") else None
+                    if audio_file is not None:
+                        audio_bytes, media_type = audio_file
+                        st.audio(audio_bytes, format=media_type)
+                    else:
+                        # For demonstration, we'll show a placeholder
+                        st.audio("https://upload.wikimedia.org/wikipedia/commons/5/5b/Hindi_svar.ogg", format="audio/ogg")
+                        
+                        st.markdown("**Note:** This is a placeholder audio. The audio summary could not be generated for this analysis.")
     
     # Information section
     st.sidebar.title("About")
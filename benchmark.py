@@ -0,0 +1,1191 @@
+"""
+Benchmarks for the news summarization pipeline.
+
+Each benchmark is a sub-command, for example:
+
+    python benchmark.py fetch --delay 1.0 --rounds 3
+
+Benchmarks that need network access run against a local stub HTTP server,
+so the numbers do not depend on the search engines being reachable.
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Serve a small HTML page after an artificial delay.
+
+    The delay in seconds is taken from the `delay` query parameter,
+    e.g. `/search?delay=0.5`.
+    """
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        time.sleep(float(query.get("delay", ["0"])[0]))
+
+        body = b"<html><body><div class='result'>stub</div></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep benchmark output readable
+        pass
+
+def start_stub_server(handler=StubHandler) -> Tuple[ThreadingHTTPServer, str]:
+    """Start a stub HTTP server on a free local port and return it with its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
+
+def time_rounds(func: Callable[[], object], rounds: int) -> List[float]:
+    """Run `func` several times and return the wall-clock time of each run"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+def benchmark_fetch(args) -> None:
+    """Compare serial fetching of the search sources with the concurrent fetch layer"""
+    import requests
+    import fetcher
+
+    server, base_url = start_stub_server()
+    urls = [f"{base_url}/source{i}?delay={args.delay}" for i in range(args.sources)]
+
+    def serial():
+        # What extract_news_articles used to do: one fresh request per source
+        for url in urls:
+            requests.get(url, headers=fetcher.DEFAULT_HEADERS, timeout=10)
+
+    def concurrent():
+        fetcher.fetch_all(urls)
+
+    print(f"{args.sources} sources, {args.delay}s server delay, {args.rounds} rounds")
+    for name, func in [("serial", serial), ("concurrent", concurrent)]:
+        timings = time_rounds(func, args.rounds)
+        print(f"  {name:<12} mean {statistics.mean(timings):.3f}s  min {min(timings):.3f}s")
+
+    # One source slower than the overall deadline: whatever arrived in time is returned
+    slow_url = f"{base_url}/slow?delay={args.delay * 4}"
+    overall = args.delay * 2
+    start = time.perf_counter()
+    results = fetcher.fetch_all(urls + [slow_url], overall_timeout=overall)
+    elapsed = time.perf_counter() - start
+    print(f"  with one slow source and a {overall:.1f}s overall deadline: "
+          f"{len(results)}/{len(urls) + 1} sources in {elapsed:.3f}s")
+
+    server.shutdown()
+
+def benchmark_sentiment(args) -> None:
+    """Measure sentiment throughput in sentences/sec for several batch sizes"""
+    import torch
+    import utils
+
+    torch.set_num_threads(args.threads)
+
+    articles = utils.simulate_article_elements("Acme Corp", args.articles)
+    sentences = []
+    for article in articles:
+        pieces, _ = utils.split_for_sentiment(article["content"])
+        sentences.extend(pieces)
+
+    print(f"{len(sentences)} sentences from {len(articles)} articles, {args.threads} CPU threads")
+
+    # Warm up so the first measurement does not pay for lazy initialization
+    utils.classify_sentences(sentences[:8], batch_size=8)
+
+    reference = None
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        results = utils.classify_sentences(sentences, batch_size=batch_size)
+        elapsed = time.perf_counter() - start
+
+        if reference is None:
+            reference = results
+        labels_match = all(a["label"] == b["label"] for a, b in zip(reference, results))
+        max_score_diff = max(abs(a["score"] - b["score"]) for a, b in zip(reference, results))
+        print(f"  batch {batch_size:>3}: {len(sentences) / elapsed:8.1f} sentences/sec  "
+              f"labels match: {labels_match}  max score diff: {max_score_diff:.2e}")
+
+def benchmark_summarize(args) -> None:
+    """Compare per-article summarization with length-sorted batched summarization"""
+    import torch
+    import utils
+
+    torch.set_num_threads(args.threads)
+
+    texts = [article["content"] for article in utils.simulate_article_elements("Acme Corp", args.articles)]
+    print(f"{len(texts)} articles, {args.threads} CPU threads")
+
+    # Warm up so the first measurement does not pay for lazy initialization
+    utils.generate_summary(texts[0])
+
+    start = time.perf_counter()
+    for text in texts:
+        utils.generate_summary(text)
+    print(f"  one by one: {time.perf_counter() - start:.2f}s")
+
+    for batch_size in args.batch_sizes:
+        batch_timings = []
+        start = time.perf_counter()
+        utils.generate_summaries(texts, batch_size=batch_size, batch_timings=batch_timings)
+        elapsed = time.perf_counter() - start
+        per_batch = ", ".join(f"{t['seconds']:.2f}s" for t in batch_timings)
+        print(f"  batch {batch_size:>2}: {elapsed:.2f}s  per batch: {per_batch}")
+
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import api
+import models
+models.warm_up_from_env()
+print(time.perf_counter() - start)
+"""
+
+def benchmark_startup(args) -> None:
+    """Measure API startup time and peak RSS with lazy and eager model loading"""
+    import subprocess
+    import sys
+
+    print("mode     startup    peak RSS")
+    for mode in args.modes:
+        env = dict(os.environ, MODEL_WARMUP=mode)
+        process = subprocess.Popen([sys.executable, "-c", STARTUP_SCRIPT], env=env,
+                                   stdout=subprocess.PIPE, text=True)
+        output = process.stdout.read()
+        # wait4 reports the resource usage of this child alone
+        _, _, usage = os.wait4(process.pid, 0)
+        startup = float(output.strip().splitlines()[-1])
+        # ru_maxrss is in kilobytes on Linux
+        print(f"{mode:<8} {startup:7.2f}s  {usage.ru_maxrss / 1024:7.0f} MB")
+
+def start_api_server(app) -> Tuple[object, str]:
+    """Run a FastAPI app with uvicorn in a background thread and return the server with its base URL"""
+    import socket
+    import uvicorn
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, f"http://127.0.0.1:{port}"
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Return the value below which `fraction` of the values fall"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def benchmark_loadtest(args) -> None:
+    """Show that /api/health latency stays flat while /api/news is saturated"""
+    import requests
+    import api
+    import utils
+
+    # Stand-in for the pipeline: blocking work of a fixed duration, like
+    # network I/O and torch inference that release the GIL. Takes whatever
+    # options the API passes, such as summary_mode
+    def process_company_news(company_name: str, debug: bool = False, **kwargs):
+        time.sleep(args.work)
+        comparative = {
+            "Sentiment Distribution": {"Positive": 0, "Negative": 0, "Neutral": 0},
+            "Coverage Differences": [],
+            "Topic Overlap": {"Common Topics": [], "Unique Topics": []},
+            "Final Sentiment Analysis": ""
+        }
+        return {"Company": company_name, "Articles": [], "Comparative Sentiment Score": comparative,
+                "Final Sentiment Analysis": "", "Audio": ""}
+
+    utils.process_company_news = process_company_news
+    server, base_url = start_api_server(api.app)
+
+    def probe_health(duration: float) -> List[float]:
+        latencies = []
+        end = time.perf_counter() + duration
+        while time.perf_counter() < end:
+            start = time.perf_counter()
+            requests.get(f"{base_url}/api/health", timeout=30)
+            latencies.append(time.perf_counter() - start)
+            time.sleep(0.02)
+        return latencies
+
+    def report(name: str, latencies: List[float]) -> None:
+        print(f"  {name:<10} health p50 {percentile(latencies, 0.5) * 1000:6.1f} ms  "
+              f"p95 {percentile(latencies, 0.95) * 1000:6.1f} ms  max {max(latencies) * 1000:6.1f} ms")
+
+    print(f"{args.clients} clients, {args.work}s of blocking work per /api/news request, "
+          f"{api.API_WORKERS} workers, max {api.API_MAX_IN_FLIGHT} in flight")
+    report("idle", probe_health(args.duration))
+
+    status_counts = {}
+    status_lock = threading.Lock()
+    stop = threading.Event()
+
+    def client(index: int) -> None:
+        while not stop.is_set():
+            # Distinct names so the response cache cannot coalesce the requests
+            response = requests.post(f"{base_url}/api/news", json={"company_name": f"Company {index} {time.time()}"},
+                                     timeout=60)
+            with status_lock:
+                status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+            if response.status_code == 429:
+                # Back off briefly instead of honouring the full Retry-After, to keep the pool saturated
+                time.sleep(0.1)
+
+    clients = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(args.clients)]
+    for thread in clients:
+        thread.start()
+    time.sleep(args.work)
+
+    report("saturated", probe_health(args.duration))
+    stop.set()
+    for thread in clients:
+        thread.join()
+    print(f"  /api/news responses by status: {dict(sorted(status_counts.items()))}")
+
+    server.should_exit = True
+
+    # 429s are admission control doing its job; anything else means the
+    # latencies above were measured against failing requests
+    served = sum(count for status, count in status_counts.items() if 200 <= status < 300)
+    failed = sum(count for status, count in status_counts.items() if status >= 300 and status != 429)
+    if failed >= served:
+        raise SystemExit(f"/api/news failed {failed} times and answered {served} times; "
+                         f"the saturated measurement is not valid")
+
+def benchmark_batch(args) -> None:
+    """Compare companies/min of looped single-company analysis with the batch pipeline"""
+    import torch
+    import utils
+
+    torch.set_num_threads(args.threads)
+
+    # Leave the network and speech synthesis out: both paths simulate their
+    # articles, so the comparison measures the model work
+    utils.fetcher.fetch_all = lambda urls, **kwargs: {}
+    utils.convert_text_to_hindi_speech = lambda text, *args, **kwargs: ""
+
+    companies = [f"Company {i}" for i in range(args.companies)]
+    print(f"{len(companies)} companies, {args.threads} CPU threads")
+
+    # Warm up so the first measurement does not pay for model loading
+    utils.process_company_news("Warm Up")
+
+    utils.nlp_cache.clear()
+    start = time.perf_counter()
+    for name in companies:
+        utils.process_company_news(name)
+    looped = time.perf_counter() - start
+    print(f"  looped /api/news: {looped:7.1f}s  {len(companies) / looped * 60:7.1f} companies/min")
+
+    utils.nlp_cache.clear()
+    start = time.perf_counter()
+    batch = utils.process_companies_batch(companies)
+    batched = time.perf_counter() - start
+    print(f"  batch:            {batched:7.1f}s  {len(companies) / batched * 60:7.1f} companies/min  "
+          f"({len(batch['errors'])} errors)")
+
+def benchmark_topics(args) -> None:
+    """Compare per-article topic extraction with the full pipeline against bulk nlp.pipe extraction"""
+    import spacy
+    import utils
+
+    texts = [article["content"] for article in utils.simulate_article_elements("Acme Corp", args.articles)]
+    print(f"{len(texts)} articles")
+
+    # What extract_topics used to do: one call per article with every component
+    full_nlp = spacy.load(utils.TOPIC_MODEL)
+    start = time.perf_counter()
+    reference = [utils.topics_from_doc(full_nlp(text)) for text in texts]
+    elapsed = time.perf_counter() - start
+    print(f"  nlp(text), full pipeline:   {len(texts) / elapsed:7.1f} docs/sec")
+
+    for n_process in args.processes:
+        for batch_size in args.batch_sizes:
+            utils.nlp_cache.clear()
+            start = time.perf_counter()
+            topics = utils.extract_topics_many(texts, batch_size=batch_size, n_process=n_process)
+            elapsed = time.perf_counter() - start
+            print(f"  nlp.pipe batch {batch_size:>3}, {n_process} proc: {len(texts) / elapsed:7.1f} docs/sec  "
+                  f"matches: {topics == reference}")
+
+def benchmark_tiered(args) -> None:
+    """Compare tiered lexicon + transformer sentiment with the pure transformer on a labeled set"""
+    import random
+    import torch
+    import lexicon
+    import utils
+
+    torch.set_num_threads(args.threads)
+    random.seed(args.seed)
+
+    # Labeled set: simulated articles written with a known sentiment tendency
+    topics = ["Finance", "Stock Market", "Investment"]
+    labeled = []
+    for label in ("positive", "negative"):
+        for _ in range(args.articles):
+            content = utils.generate_article_content("Acme Corp", "", label, topics)
+            labeled.append((label.capitalize(), content))
+
+    texts = [content for _, content in labeled]
+    sentences = [sentence for text in texts for sentence in utils.split_for_sentiment(text)[0]]
+    print(f"{len(texts)} labeled articles, {len(sentences)} sentences, "
+          f"lexicon threshold {utils.SENTIMENT_LEXICON_THRESHOLD}")
+
+    # Warm up so the first measurement does not pay for model loading
+    utils.classify_sentences(sentences[:8])
+
+    timings = {}
+    sentence_results = {}
+    article_results = {}
+    for mode in ("transformer", "tiered"):
+        utils.nlp_cache.clear()
+        start = time.perf_counter()
+        sentence_results[mode] = utils.classify_sentences(sentences, mode=mode)
+        article_results[mode] = utils.analyze_sentiment_batch(texts, mode=mode)
+        timings[mode] = time.perf_counter() - start
+
+    confident = sum(1 for result in lexicon.score_sentences(sentences)
+                    if result["score"] >= utils.SENTIMENT_LEXICON_THRESHOLD)
+    sentence_agreement = sum(1 for a, b in zip(sentence_results["transformer"], sentence_results["tiered"])
+                             if a["label"] == b["label"]) / len(sentences)
+    article_agreement = sum(1 for a, b in zip(article_results["transformer"], article_results["tiered"])
+                            if a["sentiment"] == b["sentiment"]) / len(texts)
+
+    print(f"  sentences settled by the lexicon: {confident / len(sentences):.1%}")
+    print(f"  sentence label agreement:         {sentence_agreement:.1%}")
+    print(f"  article sentiment agreement:      {article_agreement:.1%}")
+    for mode in ("transformer", "tiered"):
+        accuracy = sum(1 for (label, _), result in zip(labeled, article_results[mode])
+                       if result["sentiment"] == label) / len(texts)
+        print(f"  {mode:<12} {timings[mode]:6.2f}s  article accuracy vs labels: {accuracy:.1%}")
+    print(f"  speedup: {timings['transformer'] / timings['tiered']:.2f}x")
+
+def rouge_n(reference: str, candidate: str, n: int = 1) -> float:
+    """ROUGE-N F1 between two texts, on lowercased whitespace tokens"""
+    from collections import Counter
+
+    def ngrams(text):
+        tokens = text.lower().split()
+        return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+
+    reference_ngrams, candidate_ngrams = ngrams(reference), ngrams(candidate)
+    overlap = sum((reference_ngrams & candidate_ngrams).values())
+    if overlap == 0:
+        return 0.0
+    precision = overlap / sum(candidate_ngrams.values())
+    recall = overlap / sum(reference_ngrams.values())
+    return 2 * precision * recall / (precision + recall)
+
+def rouge_l(reference: str, candidate: str) -> float:
+    """ROUGE-L F1 between two texts, based on their longest common token subsequence"""
+    reference_tokens, candidate_tokens = reference.lower().split(), candidate.lower().split()
+    if not reference_tokens or not candidate_tokens:
+        return 0.0
+
+    previous = [0] * (len(candidate_tokens) + 1)
+    for reference_token in reference_tokens:
+        current = [0]
+        for j, candidate_token in enumerate(candidate_tokens):
+            current.append(previous[j] + 1 if reference_token == candidate_token else max(previous[j + 1], current[j]))
+        previous = current
+
+    lcs = previous[-1]
+    if lcs == 0:
+        return 0.0
+    precision = lcs / len(candidate_tokens)
+    recall = lcs / len(reference_tokens)
+    return 2 * precision * recall / (precision + recall)
+
+def run_backend_worker(args) -> None:
+    """Load both transformer models on one backend and record their outputs, latency and peak RSS"""
+    import json
+    import random
+    import resource
+    import torch
+    import models
+    import utils
+
+    torch.set_num_threads(args.threads)
+    random.seed(args.seed)
+    texts = [article["content"] for article in utils.simulate_article_elements("Acme Corp", args.articles)]
+    sentences = [sentence for text in texts for sentence in utils.split_for_sentiment(text)[0]]
+
+    report = {}
+    start = time.perf_counter()
+    sentiment = models.build_pipeline("sentiment-analysis", models.SENTIMENT_MODEL, args.worker)
+    summarizer = models.build_pipeline("summarization", models.SUMMARIZATION_MODEL, args.worker)
+    report["load_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report["sentiment"] = sentiment(sentences, batch_size=utils.SENTIMENT_BATCH_SIZE)
+    report["sentiment_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    report["summaries"] = [summarizer(text, max_length=150, min_length=30, do_sample=False)[0]["summary_text"]
+                           for text in texts]
+    report["summary_seconds"] = time.perf_counter() - start
+
+    # ru_maxrss is in kilobytes on Linux
+    report["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    with open(args.output, "w") as f:
+        json.dump(report, f)
+
+def benchmark_backends(args) -> None:
+    """Compare latency, memory and accuracy drift of the inference backends against PyTorch fp32"""
+    import json
+    import subprocess
+    import sys
+    import tempfile
+
+    if args.worker:
+        run_backend_worker(args)
+        return
+
+    # Each backend runs in its own process so peak RSS is measured separately
+    reports = {}
+    for backend in args.backends:
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            subprocess.run([sys.executable, __file__, "backends", "--worker", backend, "--output", output.name,
+                            "--articles", str(args.articles), "--seed", str(args.seed),
+                            "--threads", str(args.threads)], check=True)
+            with open(output.name) as f:
+                reports[backend] = json.load(f)
+
+    reference = reports[args.backends[0]]
+    print(f"{args.articles} articles, {len(reference['sentiment'])} sentences, "
+          f"drift measured against {args.backends[0]}")
+    print("backend        load   sentiment  summaries  peak RSS  label agree  score diff  summary ROUGE-L")
+    for backend, report in reports.items():
+        agreement = sum(1 for a, b in zip(reference["sentiment"], report["sentiment"])
+                        if a["label"] == b["label"]) / len(reference["sentiment"])
+        score_diff = statistics.mean(abs(a["score"] - b["score"])
+                                     for a, b in zip(reference["sentiment"], report["sentiment"]))
+        rouge = statistics.mean(rouge_l(a, b) for a, b in zip(reference["summaries"], report["summaries"]))
+        print(f"{backend:<12} {report['load_seconds']:6.1f}s {report['sentiment_seconds']:9.2f}s "
+              f"{report['summary_seconds']:9.2f}s {report['max_rss_mb']:7.0f} MB "
+              f"{agreement:11.1%} {score_diff:11.4f} {rouge:16.3f}")
+
+def load_summary_corpus(args) -> Tuple[List[str], Optional[List[str]]]:
+    """Load articles and optional reference summaries from a JSONL corpus, or simulate articles"""
+    import json
+    import random
+    import utils
+
+    if not args.corpus:
+        random.seed(args.seed)
+        return [article["content"] for article in utils.simulate_article_elements("Acme Corp", args.articles)], None
+
+    texts = []
+    references = []
+    with open(args.corpus) as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                texts.append(record["text"])
+                references.append(record.get("summary"))
+    return texts, references if all(references) else None
+
+def benchmark_summary_modes(args) -> None:
+    """Compare ROUGE and latency of extractive summaries with the abstractive model"""
+    import torch
+    import utils
+
+    torch.set_num_threads(args.threads)
+    texts, references = load_summary_corpus(args)
+    modes = ["abstractive", "extractive-textrank", "extractive-tfidf"]
+
+    # Warm up so the first measurement does not pay for model loading
+    utils.generate_summary(texts[0], mode="abstractive")
+    utils.split_sentences(texts[0])
+
+    summaries = {}
+    latencies = {}
+    for mode in modes:
+        summary_mode, _, method = mode.partition("-")
+        if method:
+            utils.EXTRACTIVE_METHOD = method
+        utils.nlp_cache.clear()
+
+        summaries[mode] = []
+        latencies[mode] = []
+        for text in texts:
+            start = time.perf_counter()
+            summaries[mode].append(utils.generate_summary(text, mode=summary_mode))
+            latencies[mode].append(time.perf_counter() - start)
+
+    if references is None:
+        print(f"{len(texts)} articles without reference summaries, scored against the abstractive output")
+        references = summaries["abstractive"]
+        modes = modes[1:]
+    else:
+        print(f"{len(texts)} articles, scored against the reference summaries")
+
+    print("mode                  mean ms   p95 ms  ROUGE-1  ROUGE-2  ROUGE-L")
+    for mode in modes:
+        scores = [(rouge_n(reference, summary, 1), rouge_n(reference, summary, 2), rouge_l(reference, summary))
+                  for reference, summary in zip(references, summaries[mode])]
+        print(f"{mode:<20} {statistics.mean(latencies[mode]) * 1000:8.1f} "
+              f"{percentile(latencies[mode], 0.95) * 1000:8.1f} "
+              + " ".join(f"{statistics.mean(score[i] for score in scores):8.3f}" for i in range(3)))
+
+def benchmark_prepare(args) -> None:
+    """Compare time and allocations of per-stage sentence splitting with shared PreparedArticles"""
+    import random
+    import tracemalloc
+    import preprocessing
+    import utils
+
+    random.seed(args.seed)
+    texts = [article["content"] for article in utils.simulate_article_elements("Acme Corp", args.articles)]
+    utils.split_sentences(texts[0])
+
+    def separate():
+        # Before PreparedArticle: sentiment and summary each split the text themselves
+        kept = []
+        for text in texts:
+            sentences = utils.split_sentences(text) if len(text) > 512 else [text]
+            sentiment_pieces = [sentence for sentence in sentences if len(sentence.strip()) > 10]
+            kept.append((text, sentiment_pieces, utils.split_sentences(text)))
+        return kept
+
+    def shared():
+        kept = []
+        for text in texts:
+            article = preprocessing.prepare(text)
+            sentiment_pieces = utils.split_for_sentiment(article)[0]
+            kept.append((article, sentiment_pieces, article.sentences))
+        return kept
+
+    print(f"{len(texts)} articles, {args.rounds} rounds")
+    print("preprocessing      mean ms  sentence splits  peak KiB  retained KiB")
+    for name, func in (("separate", separate), ("PreparedArticle", shared)):
+        splits = 0
+        split_sentences = preprocessing.split_sentences
+
+        def counting_split(text):
+            nonlocal splits
+            splits += 1
+            return split_sentences(text)
+
+        preprocessing.split_sentences = counting_split
+        try:
+            timings = time_rounds(func, args.rounds)
+            splits_per_round = splits // args.rounds
+
+            # Retained: what stays referenced once the stages have their inputs
+            tracemalloc.start()
+            kept = func()
+            retained, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del kept
+        finally:
+            preprocessing.split_sentences = split_sentences
+
+        print(f"{name:<17} {statistics.mean(timings) * 1000:8.2f} {splits_per_round:16d} "
+              f"{peak / 1024:9.0f} {retained / 1024:13.0f}")
+
+    prepared = [preprocessing.prepare(text) for text in texts]
+    tracemalloc.start()
+    copies = [(article.text, tuple(article.sentences)) for article in prepared]
+    copy_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del copies
+    tracemalloc.start()
+    spans = [preprocessing.PreparedArticle(text) for text in texts]
+    span_size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del spans
+    print(f"sentences held as copies: {copy_size / 1024:.0f} KiB, as spans in PreparedArticle: {span_size / 1024:.0f} KiB")
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def benchmark_parse(args) -> None:
+    """Compare search result page parse throughput of html.parser, lxml and selectolax"""
+    import parsers
+
+    # Whether each backend parses the pages correctly is checked by tests/test_parsers.py
+    pages = []
+    for parser in parsers.PARSERS:
+        with open(os.path.join(FIXTURES_DIR, "search_pages", parser.name + ".html"), encoding="utf-8") as f:
+            pages.append((parser, f.read()))
+
+    total_bytes = sum(len(html.encode("utf-8")) for _, html in pages)
+    print(f"{len(pages)} saved result pages, {total_bytes / 1024:.0f} KiB, {args.rounds} rounds")
+    print("backend        pages/s     MB/s")
+    for name in parsers.BACKENDS:
+        backend = parsers.get_backend(name)
+
+        def parse_all():
+            for parser, html in pages:
+                parser.parse(html, backend)
+
+        seconds = statistics.median(time_rounds(parse_all, args.rounds))
+        print(f"{name:<12} {len(pages) / seconds:9.1f} {total_bytes / seconds / 1e6:8.1f}")
+
+def syndicated_copy(article: dict, index: int, kind: str) -> dict:
+    """Make the kind of copy of an article that shows up in real feeds"""
+    copy = dict(article)
+    if kind == "tracking":
+        # Same page, linked with tracking parameters and the AMP variant
+        copy["url"] = article["url"].replace("https://", "http://www.") + f"/amp?utm_source=feed{index}&fbclid=x{index}"
+    else:
+        # Same story republished elsewhere, with a byline and a footer added
+        copy["url"] = f"https://syndicate{index % 7}.example.org/story/{index}"
+        copy["source"] = f"Syndicate {index % 7}"
+        copy["content"] = (f"({copy['source']}) - {article['content']} "
+                           f"This article originally appeared on {article['source']}.")
+    return copy
+
+def benchmark_dedup(args) -> None:
+    """Measure how many articles and model calls the deduplication stage removes, and what it costs"""
+    import random
+    import dedup
+    import utils
+
+    random.seed(args.seed)
+    originals = utils.simulate_article_elements("Acme Corp", args.articles)
+    feed = [(story, article) for story, article in enumerate(originals)]
+    for index in range(int(args.articles * args.duplicate_rate)):
+        story = index % len(originals)
+        feed.append((story, syndicated_copy(originals[story], index, ("tracking", "syndicated")[index % 2])))
+    random.shuffle(feed)
+    stories = {id(article): story for story, article in feed}
+    feed = [article for _, article in feed]
+
+    start = time.perf_counter()
+    kept, duplicates = dedup.deduplicate(feed)
+    elapsed = time.perf_counter() - start
+
+    kept_stories = [stories[id(article)] for article in kept]
+    reasons = {"url": 0, "content": 0}
+    # Simulated stories come from a few templates, so two of them can be
+    # near-identical too; a merge is only wrong below the exact threshold
+    wrong = 0
+    for duplicate in duplicates:
+        reasons[duplicate["reason"]] += 1
+        first, second = feed[duplicate["index"]], feed[duplicate["duplicate_of"]]
+        if stories[id(first)] != stories[id(second)]:
+            a, b = dedup.shingles(first["content"]), dedup.shingles(second["content"])
+            wrong += len(a & b) / len(a | b) < dedup.DEDUP_THRESHOLD
+
+    calls_before = sum(utils.estimate_model_calls(article["content"]) for article in feed)
+    calls_after = sum(utils.estimate_model_calls(article["content"]) for article in kept)
+
+    print(f"{len(feed)} articles: {len(originals)} distinct stories, {len(feed) - len(originals)} copies, "
+          f"threshold {dedup.DEDUP_THRESHOLD}")
+    print(f"  dropped:        {len(duplicates)} ({reasons['url']} by URL, {reasons['content']} by content)")
+    print(f"  copies kept:    {len(kept_stories) - len(set(kept_stories))}")
+    print(f"  stories merged: {len(originals) - len(set(kept_stories))} "
+          f"({wrong} merges below the threshold by exact Jaccard)")
+    print(f"  model calls:    {calls_before} -> {calls_after} ({calls_before - calls_after} saved, "
+          f"{(calls_before - calls_after) / calls_before:.1%})")
+    print(f"  dedup time:     {elapsed * 1000:.1f} ms ({elapsed / len(feed) * 1e6:.0f} us/article)")
+
+def benchmark_tts(args) -> None:
+    """Measure speech synthesis latency per engine, in one call and in parallel sentence chunks"""
+    import tts
+
+    sentence = "वर्तमान समाचार कवरेज मिश्रित है, जो एक जटिल स्थिति को दर्शाता है।"
+    texts = {f"{count} sentences": " ".join([sentence] * count) for count in args.sentences}
+
+    class RemoteStubEngine(tts.StubEngine):
+        # Stand-in for a network engine such as gTTS: one round-trip per
+        # 100 characters, made one after the other within a call
+        name = "stub+latency"
+
+        def synthesize(self, text, language):
+            time.sleep(args.latency * -(-len(text) // 100))
+            return super().synthesize(text, language)
+
+    engines = []
+    for name in args.engines:
+        try:
+            engines.append(RemoteStubEngine() if name == "stub+latency" else tts.ENGINES[name]())
+        except (ImportError, OSError) as e:
+            print(f"{name}: not available ({e})")
+
+    print(f"chunks of at most {args.chunk_chars} characters, {tts.TTS_CHUNK_WORKERS} chunk workers, "
+          f"{args.rounds} rounds")
+    print("engine         text              chars  one call   chunked  speedup")
+    for engine in engines:
+        for label, text in texts.items():
+            try:
+                single = statistics.median(time_rounds(lambda: engine.synthesize(text, "hi"), args.rounds))
+                chunked = statistics.median(time_rounds(lambda: tts.synthesize(engine, text, "hi", args.chunk_chars),
+                                                        args.rounds))
+            except Exception as e:
+                print(f"{engine.name:<14} {label:<16} failed: {e}")
+                continue
+            print(f"{engine.name:<14} {label:<16} {len(text):6d} {single:8.3f}s {chunked:8.3f}s "
+                  f"{single / chunked:7.2f}x")
+
+def reference_comparative_analysis(articles: List[dict]) -> dict:
+    """
+    What perform_comparative_analysis used to do: Counters over repeated walks of the article list.
+
+    Args:
+        articles: List of article dictionaries with sentiment and topics
+
+    Returns:
+        Dictionary containing comparative analysis results
+    """
+    from collections import Counter
+    from utils import final_sentiment_analysis
+
+    # Count sentiments
+    sentiment_counts = {
+        "Positive": 0,
+        "Negative": 0,
+        "Neutral": 0
+    }
+
+    for article in articles:
+        sentiment = article.get("Sentiment", "Neutral")
+        sentiment_counts[sentiment] += 1
+
+    # Collect all topics
+    all_topics = []
+    for article in articles:
+        all_topics.extend(article.get("Topics", []))
+
+    # Count topic frequency
+    topic_counts = Counter(all_topics)
+    common_topics = [topic for topic, count in topic_counts.most_common(5)]
+
+    # Generate comparisons
+    comparisons = []
+
+    # Compare positive vs negative articles
+    if sentiment_counts["Positive"] > 0 and sentiment_counts["Negative"] > 0:
+        positive_articles = [a for a in articles if a.get("Sentiment") == "Positive"]
+        negative_articles = [a for a in articles if a.get("Sentiment") == "Negative"]
+
+        pos_topics = []
+        for article in positive_articles:
+            pos_topics.extend(article.get("Topics", []))
+
+        neg_topics = []
+        for article in negative_articles:
+            neg_topics.extend(article.get("Topics", []))
+
+        pos_topic_counts = Counter(pos_topics)
+        neg_topic_counts = Counter(neg_topics)
+
+        pos_focus = [topic for topic, _ in pos_topic_counts.most_common(3)]
+        neg_focus = [topic for topic, _ in neg_topic_counts.most_common(3)]
+
+        comparisons.append({
+            "Comparison": f"Positive articles focus on {', '.join(pos_focus)}, while negative articles emphasize {', '.join(neg_focus)}.",
+            "Impact": "This suggests a contrast in perception across different aspects of the company."
+        })
+
+    # Check for topic variation
+    if common_topics:
+        unique_topics = [topic for topic, count in topic_counts.items() if count == 1]
+        if unique_topics:
+            comparisons.append({
+                "Comparison": f"While {', '.join(common_topics[:3])} are common themes, some articles uniquely cover {', '.join(unique_topics[:3])}.",
+                "Impact": "This indicates a diversity in media coverage, exploring various aspects of the company."
+            })
+
+    # Overall sentiment trend
+    if sentiment_counts["Positive"] > sentiment_counts["Negative"] + sentiment_counts["Neutral"]:
+        sentiment_trend = "overwhelmingly positive"
+    elif sentiment_counts["Positive"] > sentiment_counts["Negative"]:
+        sentiment_trend = "generally positive"
+    elif sentiment_counts["Negative"] > sentiment_counts["Positive"] + sentiment_counts["Neutral"]:
+        sentiment_trend = "overwhelmingly negative"
+    elif sentiment_counts["Negative"] > sentiment_counts["Positive"]:
+        sentiment_trend = "generally negative"
+    else:
+        sentiment_trend = "mixed or neutral"
+
+    comparisons.append({
+        "Comparison": f"The overall sentiment across articles is {sentiment_trend}.",
+        "Impact": f"This suggests that current media coverage is {sentiment_trend}, which may influence public and investor perception."
+    })
+
+    # Ensure we have at least 3 comparisons
+    if len(comparisons) < 3:
+        comparisons.append({
+            "Comparison": "Coverage varies in depth and focus across different sources.",
+            "Impact": "This highlights the importance of consulting multiple sources for a comprehensive understanding."
+        })
+
+    # Create topic overlap analysis
+    topic_overlap = {
+        "Common Topics": common_topics[:3] if common_topics else [],
+        "Unique Topics": unique_topics[:5] if 'unique_topics' in locals() and unique_topics else []
+    }
+
+    return {
+        "Sentiment Distribution": sentiment_counts,
+        "Coverage Differences": comparisons,
+        "Topic Overlap": topic_overlap,
+        "Final Sentiment Analysis": final_sentiment_analysis(sentiment_counts)
+    }
+
+def benchmark_comparative(args) -> None:
+    """Compare the Counter-based comparative analysis with the columnar one, up to 100k articles"""
+    import random
+    import pandas as pd
+    import utils
+
+    random.seed(args.seed)
+    # Topic popularity falls off like in real coverage: a few themes dominate, many appear once
+    vocabulary = [f"Topic {index}" for index in range(args.topics)]
+    weights = [1 / (rank + 1) for rank in range(args.topics)]
+
+    def make_articles(count):
+        return [{"Sentiment": random.choice(utils.SENTIMENTS),
+                 "Topics": random.choices(vocabulary, weights, k=random.randint(1, 5))} for _ in range(count)]
+
+    # The pipeline's case: 10 articles with up to 3 topics each from a small
+    # vocabulary, so ties, unique topics and missing sentiments all occur
+    def make_small(count):
+        articles = [{"Sentiment": random.choice(utils.SENTIMENTS),
+                     "Topics": random.sample(vocabulary[:15], random.randint(0, 3))} for _ in range(count)]
+        for article in random.sample(articles, count // 5):
+            del article["Sentiment"]
+        return articles
+
+    small_sets = [make_small(10) for _ in range(args.small_sets)] + [make_small(count) for count in range(10)]
+    identical = all(utils.perform_comparative_analysis(articles) == reference_comparative_analysis(articles)
+                    for articles in small_sets)
+    print(f"identical output on {len(small_sets)} sets of up to 10 articles: {'yes' if identical else 'NO'}")
+
+    # "from dicts" includes reading the article dictionaries into columns;
+    # "from columns" is the grouped pass alone, on a categorical topic column
+    # as a columnar store would hold it
+    print("articles   Counters  from dicts  speedup  from columns  speedup  same output")
+    for count in args.articles:
+        articles = make_articles(count)
+        article_sentiment, topic_sentiment, topics = utils.comparative_columns(articles)
+        categorical = pd.Categorical(topics)
+        rounds = max(1, min(args.rounds, 200000 // count))
+
+        reference = statistics.median(time_rounds(lambda: reference_comparative_analysis(articles), rounds))
+        from_dicts = statistics.median(time_rounds(lambda: utils.perform_comparative_analysis(articles), rounds))
+        from_columns = statistics.median(time_rounds(
+            lambda: utils.comparative_analysis_from_columns(article_sentiment, topic_sentiment, categorical), rounds))
+
+        expected = reference_comparative_analysis(articles)
+        same = (utils.perform_comparative_analysis(articles) == expected
+                and utils.perform_comparative_analysis(pd.DataFrame(articles)) == expected
+                and utils.comparative_analysis_from_columns(article_sentiment, topic_sentiment, categorical) == expected)
+        print(f"{count:>8} {reference * 1000:8.2f}ms {from_dicts * 1000:8.2f}ms {reference / from_dicts:7.2f}x "
+              f"{from_columns * 1000:10.2f}ms {reference / from_columns:7.2f}x  {'yes' if same else 'NO'}")
+
+class ArticleHandler(BaseHTTPRequestHandler):
+    """Serve the saved article page after the delay in the `delay` query parameter, e.g. `/article/3?delay=0.2`"""
+    protocol_version = "HTTP/1.1"
+    page = b""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        time.sleep(float(query.get("delay", ["0"])[0]))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(self.page)))
+        self.end_headers()
+        self.wfile.write(self.page)
+
+    def log_message(self, format, *args):
+        pass
+
+def benchmark_store(args) -> None:
+    """Time article store lookups at scale, and a repeated company lookup with and without the store"""
+    import random
+    import tempfile
+    import store
+    import utils
+
+    def fetched_articles(name, count, start=1):
+        # Simulated articles standing in for fetched ones; the store skips articles marked simulated
+        return [{**article, "simulated": False} for article in utils.simulate_article_elements(name, count, start)]
+
+    random.seed(args.seed)
+    directory = tempfile.mkdtemp()
+    article_store = store.ArticleStore(os.path.join(directory, "articles.db"))
+    model_versions = utils.analysis_models()
+
+    # A store holding many companies, written the way the pipeline writes it
+    start = time.perf_counter()
+    for company in range(args.companies):
+        name = f"Company {company}"
+        articles = fetched_articles(name, args.articles)
+        outputs = [{"summarize": article["content"][:200], "sentiment": random.choice(utils.SENTIMENTS),
+                    "topics": ["Markets", "Growth"]} for article in articles]
+        article_store.save(name, articles, outputs, model_versions)
+    filled = time.perf_counter() - start
+    stats = article_store.stats()
+    print(f"{stats['articles']} stored articles, {stats['analyses']} outputs, filled in {filled:.1f}s")
+
+    names = [f"Company {random.randrange(args.companies)}" for _ in range(args.lookups)]
+    lookups = [(name, fetched_articles(name, 10, start=random.randrange(args.articles - 10) + 1))
+               for name in names]
+    start = time.perf_counter()
+    for name, articles in lookups:
+        article_store.articles(name, [article["url"] for article in articles])
+        article_store.analyses(name, articles, model_versions)
+    elapsed = time.perf_counter() - start
+    print(f"  10-article lookup of articles and outputs: {elapsed / len(lookups) * 1000:.2f} ms")
+
+    # The same company twice: the first request analyzes every article, the
+    # second reuses the stored outputs; the in-memory result cache is cleared
+    # so it does not hide the model work
+    feed = fetched_articles("Acme Corp", 10)
+    utils.extract_news_articles = lambda name, num_articles=10: [dict(article) for article in feed]
+    utils.convert_text_to_hindi_speech = lambda text, *args, **kwargs: ""
+    utils.article_store = store.ArticleStore(os.path.join(directory, "pipeline.db"))
+    utils.process_company_news("Warm Up")
+    for label in ("first request", "repeated request"):
+        utils.nlp_cache.clear()
+        start = time.perf_counter()
+        result = utils.process_company_news("Acme Corp", debug=True)
+        elapsed = time.perf_counter() - start
+        print(f"  {label:<17} {elapsed:6.2f}s  {result['Store']['outputs_reused']} outputs reused, "
+              f"{result['Store']['outputs_computed']} computed")
+
+def benchmark_trends(args) -> None:
+    """Compare /api/trends served from per-day counts with counting the stored articles on every request"""
+    import json
+    import random
+    import tempfile
+    from collections import Counter
+    import pandas as pd
+    import store
+    import utils
+
+    random.seed(args.seed)
+    vocabulary = [f"Topic {index}" for index in range(args.topics)]
+    model_versions = utils.analysis_models()
+    today = pd.Timestamp.now().normalize()
+    print(f"{args.window}-day window, 1-day buckets, {args.rounds} rounds")
+
+    for size in args.articles:
+        article_store = store.ArticleStore(os.path.join(tempfile.mkdtemp(), "articles.db"))
+        articles = []
+        for index in range(size):
+            published = today - pd.Timedelta(days=random.randrange(args.history))
+            articles.append({"title": f"Story {index}", "content": f"Story {index}", "url": f"https://example.com/{index}",
+                             "published_date": published.strftime("%Y-%m-%d"), "source": "example.com"})
+        outputs = [{"sentiment": {"sentiment": random.choice(utils.SENTIMENTS)},
+                    "topics": random.sample(vocabulary, 3)} for _ in articles]
+        article_store.save("Acme Corp", articles, outputs, model_versions)
+
+        def from_articles():
+            # What the endpoint would do without the counts: read and count every article of the window
+            first = (today - pd.Timedelta(days=args.window - 1)).strftime("%Y-%m-%d")
+            rows = article_store._db.execute(
+                "SELECT articles.published_date, analyses.kind, analyses.value FROM articles "
+                "JOIN analyses ON analyses.article_id = articles.id "
+                "WHERE articles.company = ? AND articles.published_date >= ? AND analyses.kind IN ('sentiment', 'topics')",
+                ("acme corp", first)
+            ).fetchall()
+            sentiments, topics = {}, {}
+            for day, kind, value in rows:
+                value = json.loads(value)
+                if kind == "sentiment":
+                    sentiments.setdefault(day, Counter())[value["sentiment"]] += 1
+                else:
+                    topics.setdefault(day, Counter()).update(value)
+            return sentiments, topics
+
+        def from_counts():
+            utils.article_store = article_store
+            return utils.sentiment_trends("Acme Corp", args.window, 1)
+
+        reference = from_articles()
+        trends = from_counts()
+        matches = all(bucket["Sentiment Distribution"] == {**{sentiment: 0 for sentiment in utils.SENTIMENTS},
+                                                           **reference[0].get(bucket["Start"], {})}
+                      for bucket in trends["Buckets"])
+
+        print(f"  {size:>7} stored articles over {args.history} days (same output: {'yes' if matches else 'NO'})")
+        for name, func in [("count articles", from_articles), ("per-day counts", from_counts)]:
+            timings = time_rounds(func, args.rounds)
+            print(f"    {name:<15} mean {statistics.mean(timings) * 1000:8.2f} ms  min {min(timings) * 1000:8.2f} ms")
+
+def benchmark_articles(args) -> None:
+    """Compare serial article downloads with the concurrent body fetching stage"""
+    import requests
+    import extraction
+    import fetcher
+    import utils
+
+    path = os.path.join(FIXTURES_DIR, "article_pages", "article")
+    with open(path + ".html", "rb") as f:
+        ArticleHandler.page = f.read()
+
+    server, base_url = start_stub_server(ArticleHandler)
+    urls = [f"{base_url}/article/{i}?delay={args.delay}" for i in range(args.articles)]
+
+    def serial():
+        # One article after the other, each body read in full before extraction
+        for url in urls:
+            response = requests.get(url, headers=fetcher.DEFAULT_HEADERS, timeout=10)
+            extraction.extract_main_text(response.text)
+
+    def concurrent():
+        utils.fetch_article_bodies([{"url": url, "content": ""} for url in urls])
+
+    print(f"{args.articles} article pages, {args.delay}s server delay, "
+          f"{utils.ARTICLE_FETCH_WORKERS} download workers, {args.rounds} rounds")
+    for name, func in [("serial", serial), ("concurrent", concurrent)]:
+        timings = time_rounds(func, args.rounds)
+        print(f"  {name:<12} mean {statistics.mean(timings):.3f}s  min {min(timings):.3f}s")
+
+    server.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="News summarization benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    fetch_parser = subparsers.add_parser("fetch", help="Serial vs concurrent source fetching")
+    fetch_parser.add_argument("--sources", type=int, default=3, help="Number of sources to fetch")
+    fetch_parser.add_argument("--delay", type=float, default=1.0, help="Server delay per source in seconds")
+    fetch_parser.add_argument("--rounds", type=int, default=3, help="Number of timed rounds")
+    fetch_parser.set_defaults(func=benchmark_fetch)
+
+    sentiment_parser = subparsers.add_parser("sentiment", help="Sentence sentiment throughput by batch size")
+    sentiment_parser.add_argument("--articles", type=int, default=10, help="Number of simulated articles")
+    sentiment_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    sentiment_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Torch CPU threads")
+    sentiment_parser.set_defaults(func=benchmark_sentiment)
+
+    summarize_parser = subparsers.add_parser("summarize", help="Per-article vs batched summarization")
+    summarize_parser.add_argument("--articles", type=int, default=10, help="Number of simulated articles")
+    summarize_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[2, 4, 8])
+    summarize_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Torch CPU threads")
+    summarize_parser.set_defaults(func=benchmark_summarize)
+
+    startup_parser = subparsers.add_parser("startup", help="API startup time and peak RSS per MODEL_WARMUP mode")
+    startup_parser.add_argument("--modes", nargs="+", default=["lazy", "eager"],
+                                help="MODEL_WARMUP modes to compare; eager matches loading at import")
+    startup_parser.set_defaults(func=benchmark_startup)
+
+    loadtest_parser = subparsers.add_parser("loadtest", help="/api/health latency while /api/news is saturated")
+    loadtest_parser.add_argument("--clients", type=int, default=32, help="Concurrent /api/news clients")
+    loadtest_parser.add_argument("--work", type=float, default=1.0, help="Seconds of blocking work per request")
+    loadtest_parser.add_argument("--duration", type=float, default=5.0, help="Seconds of health probing per phase")
+    loadtest_parser.set_defaults(func=benchmark_loadtest)
+
+    batch_parser = subparsers.add_parser("batch", help="Looped single-company analysis vs the batch pipeline")
+    batch_parser.add_argument("--companies", type=int, default=20, help="Number of companies")
+    batch_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Torch CPU threads")
+    batch_parser.set_defaults(func=benchmark_batch)
+
+    topics_parser = subparsers.add_parser("topics", help="Per-article vs bulk nlp.pipe topic extraction")
+    topics_parser.add_argument("--articles", type=int, default=3000, help="Number of simulated articles")
+    topics_parser.add_argument("--batch-sizes", type=int, nargs="+", default=[16, 64, 256])
+    topics_parser.add_argument("--processes", type=int, nargs="+", default=[1, 2])
+    topics_parser.set_defaults(func=benchmark_topics)
+
+    tiered_parser = subparsers.add_parser("tiered", help="Tiered lexicon + transformer sentiment vs transformer only")
+    tiered_parser.add_argument("--articles", type=int, default=50, help="Simulated articles per label")
+    tiered_parser.add_argument("--seed", type=int, default=0, help="Random seed for the labeled set")
+    tiered_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Torch CPU threads")
+    tiered_parser.set_defaults(func=benchmark_tiered)
+
+    backends_parser = subparsers.add_parser("backends", help="Latency, memory and accuracy drift per inference backend")
+    backends_parser.add_argument("--backends", nargs="+", default=["pytorch", "pytorch-int8", "onnx"],
+                                 help="Backends to compare; the first one is the accuracy reference")
+    backends_parser.add_argument("--articles", type=int, default=10, help="Number of simulated articles")
+    backends_parser.add_argument("--seed", type=int, default=0, help="Random seed for the simulated articles")
+    backends_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Torch CPU threads")
+    backends_parser.add_argument("--worker", help=argparse.SUPPRESS)
+    backends_parser.add_argument("--output", help=argparse.SUPPRESS)
+    backends_parser.set_defaults(func=benchmark_backends)
+
+    modes_parser = subparsers.add_parser("summary-modes", help="ROUGE and latency of extractive vs abstractive summaries")
+    modes_parser.add_argument("--corpus", help="JSONL file with a \"text\" and optional \"summary\" per line")
+    modes_parser.add_argument("--articles", type=int, default=20, help="Number of simulated articles without --corpus")
+    modes_parser.add_argument("--seed", type=int, default=0, help="Random seed for the simulated articles")
+    modes_parser.add_argument("--threads", type=int, default=os.cpu_count() or 1, help="Torch CPU threads")
+    modes_parser.set_defaults(func=benchmark_summary_modes)
+
+    prepare_parser = subparsers.add_parser("prepare", help="Per-stage sentence splitting vs shared PreparedArticle")
+    prepare_parser.add_argument("--articles", type=int, default=200, help="Number of simulated articles")
+    prepare_parser.add_argument("--rounds", type=int, default=5, help="Timed rounds per variant")
+    prepare_parser.add_argument("--seed", type=int, default=0, help="Random seed for the simulated articles")
+    prepare_parser.set_defaults(func=benchmark_prepare)
+
+    parse_parser = subparsers.add_parser("parse", help="Search result page parse throughput per HTML parser")
+    parse_parser.add_argument("--rounds", type=int, default=20, help="Timed rounds per parser")
+    parse_parser.set_defaults(func=benchmark_parse)
+
+    articles_parser = subparsers.add_parser("articles", help="Serial vs concurrent article body fetching and extraction")
+    articles_parser.add_argument("--articles", type=int, default=10, help="Number of article pages")
+    articles_parser.add_argument("--delay", type=float, default=0.3, help="Server delay per page in seconds")
+    articles_parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per variant")
+    articles_parser.set_defaults(func=benchmark_articles)
+
+    dedup_parser = subparsers.add_parser("dedup", help="Articles and model calls removed by deduplication")
+    dedup_parser.add_argument("--articles", type=int, default=200, help="Number of distinct simulated articles")
+    dedup_parser.add_argument("--duplicate-rate", type=float, default=0.5, help="Copies added per distinct article")
+    dedup_parser.add_argument("--seed", type=int, default=0, help="Random seed of the simulated articles")
+    dedup_parser.set_defaults(func=benchmark_dedup)
+
+    tts_parser = subparsers.add_parser("tts", help="Speech synthesis latency per engine, one call vs parallel chunks")
+    tts_parser.add_argument("--engines", nargs="+", default=["gtts", "piper", "espeak", "stub", "stub+latency"],
+                            help="Engines to measure; stub+latency simulates network round-trips")
+    tts_parser.add_argument("--sentences", type=int, nargs="+", default=[1, 8, 32], help="Text lengths in sentences")
+    tts_parser.add_argument("--chunk-chars", type=int, default=200, help="Largest chunk in characters")
+    tts_parser.add_argument("--latency", type=float, default=0.15, help="Seconds per round-trip of stub+latency")
+    tts_parser.add_argument("--rounds", type=int, default=3, help="Timed rounds per engine and text")
+    tts_parser.set_defaults(func=benchmark_tts)
+
+    comparative_parser = subparsers.add_parser("comparative", help="Counter-based vs columnar comparative analysis")
+    comparative_parser.add_argument("--articles", type=int, nargs="+", default=[10, 100, 1000, 10000, 100000],
+                                    help="Numbers of articles to analyze")
+    comparative_parser.add_argument("--topics", type=int, default=2000, help="Size of the topic vocabulary")
+    comparative_parser.add_argument("--small-sets", type=int, default=2000,
+                                    help="Random 10-article sets checked for identical output")
+    comparative_parser.add_argument("--rounds", type=int, default=20, help="Timed rounds per size")
+    comparative_parser.add_argument("--seed", type=int, default=0, help="Random seed of the articles")
+    comparative_parser.set_defaults(func=benchmark_comparative)
+
+    store_parser = subparsers.add_parser("store", help="Article store lookups and repeated company analysis")
+    store_parser.add_argument("--companies", type=int, default=500, help="Companies in the filled store")
+    store_parser.add_argument("--articles", type=int, default=200, help="Stored articles per company")
+    store_parser.add_argument("--lookups", type=int, default=1000, help="Timed 10-article lookups")
+    store_parser.add_argument("--seed", type=int, default=0, help="Random seed of the lookups")
+    store_parser.set_defaults(func=benchmark_store)
+
+    trends_parser = subparsers.add_parser("trends", help="Trends from per-day counts vs counting stored articles")
+    trends_parser.add_argument("--articles", type=int, nargs="+", default=[1000, 10000, 100000],
+                               help="Stored articles of the company")
+    trends_parser.add_argument("--history", type=int, default=365, help="Days the stored articles are spread over")
+    trends_parser.add_argument("--window", type=int, default=30, help="Days of the requested window")
+    trends_parser.add_argument("--topics", type=int, default=200, help="Size of the topic vocabulary")
+    trends_parser.add_argument("--rounds", type=int, default=20, help="Timed rounds per size")
+    trends_parser.add_argument("--seed", type=int, default=0, help="Random seed of the articles")
+    trends_parser.set_defaults(func=benchmark_trends)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,575 @@
+import os
+import re
+import glob
+import json
+import time
+import hashlib
+import functools
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, Tuple, List
+
+class ResultCache:
+    """
+    Content-addressed cache for per-article model outputs.
+
+    Entries are keyed by a hash of the kind of output, the model that
+    produced it, the call parameters and the article text, so the same
+    article seen in different requests is only analyzed once, and outputs
+    of a different model never match. Entries are kept in an in-memory LRU
+    and, when a path is given, in an SQLite file shared across restarts.
+    Values must be JSON serializable; every `get` returns a fresh copy.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, path: Optional[str] = None,
+                 max_disk_entries: int = 100000):
+        """
+        Args:
+            max_entries: Maximum number of entries kept in memory
+            ttl: Seconds after which an entry expires, or None to keep entries until evicted
+            path: Optional SQLite file for the on-disk backend
+            max_disk_entries: Maximum number of entries kept on disk
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (stored_at, model, serialized value), least recently used first
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes = 0
+
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_model ON entries (model)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS entries_stored_at ON entries (stored_at)")
+            self._db.commit()
+
+    @staticmethod
+    def make_key(kind: str, model: str, text: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash the kind of output, model name, parameters and content into a cache key"""
+        payload = json.dumps([kind, model, params or {}, text], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def get(self, kind: str, model: str, text: str, params: Optional[Dict[str, Any]] = None) -> Optional[Any]:
+        """
+        Look up a cached output.
+
+        Returns:
+            A copy of the cached value, or None on a miss
+        """
+        key = self.make_key(kind, model, text, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0]):
+                del self._entries[key]
+                entry = None
+
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT stored_at, model, value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and self._expired(row[0]):
+                    self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    self._db.commit()
+                    row = None
+                if row is not None:
+                    entry = tuple(row)
+                    self._remember(key, entry)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return json.loads(entry[2])
+
+    def set(self, kind: str, model: str, text: str, value: Any, params: Optional[Dict[str, Any]] = None) -> None:
+        """Store an output produced by `model` for `text`"""
+        key = self.make_key(kind, model, text, params)
+        entry = (time.time(), model, json.dumps(value))
+
+        with self._lock:
+            self._remember(key, entry)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO entries (key, model, value, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, entry[1], entry[2], entry[0])
+                )
+                self._writes += 1
+                # Trimming the table is a full index scan, so only do it now and then
+                if self._writes % 100 == 0:
+                    self._db.execute(
+                        "DELETE FROM entries WHERE key IN "
+                        "(SELECT key FROM entries ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                        (self.max_disk_entries,)
+                    )
+                self._db.commit()
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        """Add an entry to the in-memory LRU, evicting the oldest ones beyond max_entries"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate_model(self, model: str) -> int:
+        """
+        Drop every entry produced by a model, e.g. after it was retrained or replaced.
+
+        Returns:
+            Number of entries removed from memory and disk
+        """
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[1] == model]
+            for key in keys:
+                del self._entries[key]
+            removed = len(keys)
+
+            if self._db is not None:
+                removed += self._db.execute("DELETE FROM entries WHERE model = ?", (model,)).rowcount
+                self._db.commit()
+
+        return removed
+
+    def clear(self) -> None:
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM entries")
+                self._db.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the number of entries in memory"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries)
+            }
+
+def result_cache_from_env() -> ResultCache:
+    """Create the NLP result cache configured through NLP_CACHE_* environment variables"""
+    ttl = float(os.environ.get("NLP_CACHE_TTL", "0"))
+    return ResultCache(
+        max_entries=int(os.environ.get("NLP_CACHE_SIZE", "2048")),
+        ttl=ttl if ttl > 0 else None,
+        path=os.environ.get("NLP_CACHE_PATH") or None,
+        max_disk_entries=int(os.environ.get("NLP_CACHE_DISK_SIZE", "100000"))
+    )
+
+class ResponseCache:
+    """
+    Cache of whole API responses with stale-while-revalidate and single-flight.
+
+    A cached response younger than `refresh_after` is served as is. An older
+    one is still served right away, but a background refresh is started so
+    the next caller gets a fresh result. Responses older than `max_age` are
+    never served. Concurrent callers asking for the same key while it is
+    being computed wait for that one computation instead of starting their own.
+    """
+
+    def __init__(self, refresh_after: float = 300, max_age: float = 3600, max_entries: int = 256,
+                 submit_refresh: Optional[Callable[[Callable[[], None]], bool]] = None):
+        """
+        Args:
+            refresh_after: Age in seconds after which a response is refreshed in the background
+            max_age: Age in seconds after which a response is no longer served
+            max_entries: Maximum number of cached responses
+            submit_refresh: Schedules a background refresh on a worker and
+                returns False when it cannot take more work, in which case
+                the stale response is served without a refresh; a private
+                pool of two threads by default
+        """
+        self.refresh_after = refresh_after
+        self.max_age = max_age
+        self.max_entries = max_entries
+
+        # key -> (stored_at, value), least recently used first
+        self._entries = OrderedDict()
+        # key -> Future of the computation currently running for it
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        if submit_refresh is None:
+            refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="refresh")
+
+            def submit_refresh(refresh):
+                refresh_executor.submit(refresh)
+                return True
+        self.submit_refresh = submit_refresh
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        """Normalize a company name into a cache key"""
+        return " ".join(name.split()).casefold()
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Tuple[Any, str]:
+        """
+        Return the cached response for `key`, computing it if needed.
+
+        Args:
+            key: Normalized cache key
+            compute: Function producing a fresh response
+
+        Returns:
+            Tuple of the response and the cache status: HIT, STALE (served
+            while a refresh runs), COALESCED (waited for another caller's
+            computation) or MISS
+        """
+        future, status = self.get_or_start(key, compute, lambda run: run())
+        return future.result(), status
+
+    def get_or_start(self, key: str, compute: Callable[[], Any],
+                     submit: Callable[[Callable[[], None]], Any]) -> Tuple[Future, str]:
+        """
+        Like get_or_compute, but return the response as a Future without blocking.
+
+        Only a miss calls `submit`, with the function computing the
+        response; callers sharing another caller's computation or served
+        from cache take no worker. When `submit` raises, the error is handed
+        to every caller waiting on the key and raised.
+
+        Args:
+            key: Normalized cache key
+            compute: Function producing a fresh response
+            submit: Schedules a function on a worker
+
+        Returns:
+            Tuple of a Future of the response and the cache status, see
+            get_or_compute
+        """
+        with self._lock:
+            cached = self._lookup(key, compute)
+            if cached is not None:
+                future = Future()
+                self._settle(future, cached[0])
+                return future, cached[1]
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                return future, "COALESCED"
+            future = self._in_flight[key] = Future()
+
+        try:
+            submit(functools.partial(self._run, key, compute))
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            self._settle(future, error=e)
+            raise
+        return future, "MISS"
+
+    def lookup(self, key: str, compute: Callable[[], Any]) -> Optional[Tuple[Any, str]]:
+        """
+        Return the cached response for `key` without blocking.
+
+        A stale response still starts a background refresh with `compute`.
+
+        Returns:
+            Tuple of the response and HIT or STALE, or None when the response
+            has to be computed or is being computed
+        """
+        with self._lock:
+            return self._lookup(key, compute)
+
+    def _lookup(self, key: str, compute: Callable[[], Any]) -> Optional[Tuple[Any, str]]:
+        """Serve a cached response; the caller must hold the lock"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        age = time.time() - entry[0]
+        if age > self.max_age:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        if age <= self.refresh_after:
+            return entry[1], "HIT"
+
+        if key not in self._in_flight:
+            self._in_flight[key] = Future()
+            if not self.submit_refresh(functools.partial(self._run, key, compute)):
+                # No capacity: keep serving the stale response, a later request refreshes it
+                del self._in_flight[key]
+        return entry[1], "STALE"
+
+    def _run(self, key: str, compute: Callable[[], Any]) -> None:
+        """Compute a response, store it and hand it to every caller waiting on it"""
+        future = self._in_flight[key]
+        try:
+            value = compute()
+        except Exception as e:
+            with self._lock:
+                del self._in_flight[key]
+            self._settle(future, error=e)
+            print(f"Error computing response for {key}: {e}")
+            return
+
+        with self._lock:
+            self._store(key, value)
+            del self._in_flight[key]
+        self._settle(future, value)
+
+    @staticmethod
+    def _settle(future: Future, value: Any = None, error: Optional[BaseException] = None) -> None:
+        """Complete a Future shared by many callers, unless one of them cancelled it"""
+        if future.done():
+            return
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(value)
+        except InvalidStateError:
+            # Cancelled between the check and the call
+            pass
+
+    def put(self, key: str, value: Any) -> None:
+        """Store a response computed outside of get_or_compute"""
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: str, value: Any) -> None:
+        """Add a response, evicting the least recently used ones; the caller must hold the lock"""
+        self._entries[key] = (time.time(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop the response for `key`, or every response when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+def response_cache_from_env(submit_refresh: Optional[Callable[[Callable[[], None]], bool]] = None) -> ResponseCache:
+    """
+    Create the API response cache configured through RESPONSE_CACHE_* environment variables.
+
+    Args:
+        submit_refresh: Schedules background refreshes, see ResponseCache
+    """
+    return ResponseCache(
+        refresh_after=float(os.environ.get("RESPONSE_CACHE_REFRESH_AFTER", "300")),
+        max_age=float(os.environ.get("RESPONSE_CACHE_MAX_AGE", "3600")),
+        max_entries=int(os.environ.get("RESPONSE_CACHE_SIZE", "256")),
+        submit_refresh=submit_refresh
+    )
+
+class AudioCache:
+    """
+    Content-addressed store of synthesized speech files.
+
+    Files are named after a hash of the spoken text and the voice settings,
+    so the same text is only synthesized once and the name is a stable
+    reference to the audio. Synthesis runs on a background pool: `request`
+    returns the key right away, and concurrent requests for the same audio
+    share one synthesis. Files are written under a temporary name and then
+    renamed, so a reader never sees a partial file. When the directory grows
+    beyond `max_bytes`, the least recently used files are deleted.
+
+    A synthesis may be spoken by another voice than the one requested, in
+    another format. The file is then named after the voice that spoke it,
+    with that voice's extension, and the requested key points to it until
+    the requested voice succeeds; the next request for the key tries again.
+    """
+
+    _KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+    def __init__(self, directory: str = "audio_cache", max_bytes: int = 256 * 1024 * 1024, workers: int = 2):
+        """
+        Args:
+            directory: Directory holding the audio files, created if missing
+            max_bytes: Total size of the files kept before the least recently used are deleted
+            workers: Number of syntheses running at the same time
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        # key -> Future of the synthesis currently running for it
+        self._in_flight = {}
+        # Requested key -> key of the audio another voice spoke for it
+        self._substitutes = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="audio")
+
+    @staticmethod
+    def make_key(text: str, params: Optional[Dict[str, Any]] = None) -> str:
+        """Hash the voice settings and the text into an audio key"""
+        payload = json.dumps([params or {}, text], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def path(self, key: str) -> Optional[str]:
+        """
+        Path of the finished audio file for `key`, in whichever format it is.
+
+        Returns:
+            Path of the file, of the audio another voice spoke in its place,
+            or None when there is none
+        """
+        if not self._KEY_PATTERN.fullmatch(key):
+            raise ValueError(f"Invalid audio key: {key}")
+        for candidate in (key, self._substitutes.get(key)):
+            if candidate is not None:
+                paths = [path for path in glob.glob(os.path.join(self.directory, f"{candidate}.*"))
+                         if not path.endswith(".tmp")]
+                if paths:
+                    return paths[0]
+        return None
+
+    def is_substitute(self, key: str, path: str) -> bool:
+        """Whether `path`, as returned by `path(key)`, was spoken by another voice than requested"""
+        return not os.path.basename(path).startswith(f"{key}.")
+
+    def request(self, text: str, synthesize: Callable[[str, str], Tuple[str, Optional[Dict[str, Any]]]],
+                params: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Make sure the audio of `text` exists or is being synthesized.
+
+        Args:
+            text: Text to speak
+            synthesize: Function writing the audio of a text to a file path,
+                called on the background pool when the audio is not cached.
+                Returns the file extension of the audio and the voice
+                settings that spoke it
+            params: Voice settings that change the audio, part of the key
+
+        Returns:
+            Key of the audio, see `wait` and `path`
+        """
+        key = self.make_key(text, params)
+
+        with self._lock:
+            if key not in self._in_flight:
+                path = self.path(key)
+                if path is not None and not self.is_substitute(key, path):
+                    self._touch(path)
+                else:
+                    self._in_flight[key] = self._executor.submit(self._synthesize, key, text, synthesize, params)
+        return key
+
+    def pending(self, key: str) -> Optional[Future]:
+        """Return the Future of the synthesis running for `key`, if there is one"""
+        with self._lock:
+            return self._in_flight.get(key)
+
+    def wait(self, key: str, timeout: Optional[float] = None) -> Optional[str]:
+        """
+        Return the path of an audio file, waiting for its synthesis if needed.
+
+        Returns:
+            Path of the file, or None when the key is unknown or was evicted
+
+        Raises:
+            Exception raised by the synthesis, or TimeoutError
+        """
+        future = self.pending(key)
+        if future is not None:
+            future.result(timeout)
+
+        path = self.path(key)
+        if path is None:
+            return None
+        self._touch(path)
+        return path
+
+    def _synthesize(self, key: str, text: str, synthesize: Callable[[str, str], Tuple[str, Optional[Dict[str, Any]]]],
+                    params: Optional[Dict[str, Any]]) -> None:
+        """Synthesize one file under a temporary name, publish it and make room for it"""
+        temporary = os.path.join(self.directory, f"{key}.{threading.get_ident()}.tmp")
+        try:
+            extension, spoken_params = synthesize(text, temporary)
+            # Audio of another voice is kept under its own key
+            spoken_key = key if spoken_params == params else self.make_key(text, spoken_params)
+            path = os.path.join(self.directory, f"{spoken_key}.{extension}")
+            os.replace(temporary, path)
+            with self._lock:
+                if spoken_key == key:
+                    self._substitutes.pop(key, None)
+                else:
+                    self._substitutes[key] = spoken_key
+        except Exception as e:
+            print(f"Error synthesizing audio {key}: {e}")
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+        self._evict(keep=path)
+
+    def _files(self) -> List[Tuple[float, int, str]]:
+        """(last used, size, path) of every finished audio file, in any format"""
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".tmp"):
+                    try:
+                        info = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((info.st_mtime, info.st_size, entry.path))
+        return files
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Delete the least recently used files until the directory fits in max_bytes"""
+        files = sorted(self._files())
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        """Mark a file as just used; eviction goes by modification time"""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number and total size of the cached files and the syntheses running"""
+        files = self._files()
+        with self._lock:
+            pending = len(self._in_flight)
+        return {"files": len(files), "bytes": sum(size for _, size, _ in files), "pending": pending}
+
+def audio_cache_from_env() -> AudioCache:
+    """Create the speech audio cache configured through AUDIO_CACHE_* environment variables"""
+    return AudioCache(
+        directory=os.environ.get("AUDIO_CACHE_DIR", "audio_cache"),
+        max_bytes=int(os.environ.get("AUDIO_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+        workers=int(os.environ.get("AUDIO_WORKERS", "2"))
+    )
@@ -0,0 +1,169 @@
+import os
+import re
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Any, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import numpy as np
+
+# Estimated Jaccard similarity of content shingles above which two articles
+# are the same story. A byline or footer added by a syndicating site keeps
+# copies above 0.9; the MinHash estimate is within about 0.03 of the exact
+# value, so lower thresholds start merging stories written from one template.
+DEDUP_THRESHOLD = float(os.environ.get("DEDUP_THRESHOLD", "0.9"))
+
+# Words per shingle, MinHash signature length, and LSH bands the signature
+# is cut into (NUM_PERMUTATIONS / LSH_BANDS rows per band)
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+LSH_BANDS = 32
+
+# Candidates whose estimate is within this margin of the threshold get their
+# exact similarity computed; with many candidates, the largest of their
+# noisy estimates would otherwise overshoot
+VERIFY_MARGIN = 0.1
+
+# Query parameters that only track where a click came from
+_TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|ocid|cmpid|smid|"
+                              r"ref|ref_src|src|guccounter|guce_referrer\w*|_ga)$", re.IGNORECASE)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+# Fixed seed, so signatures are comparable across processes
+_rng = np.random.default_rng(20240305)
+_MULTIPLIERS = _rng.integers(1, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64) | np.uint64(1)
+_OFFSETS = _rng.integers(0, 2 ** 63, NUM_PERMUTATIONS, dtype=np.uint64)
+
+def canonicalize_url(url: str) -> str:
+    """
+    Reduce the variants of an article URL to one form.
+
+    Drops the scheme difference, www./m./amp. host prefixes, AMP and
+    trailing-slash path variants, the fragment and tracking parameters,
+    and sorts the remaining query parameters.
+    """
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    for prefix in ("www.", "m.", "amp."):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+            break
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/{2,}", "/", parts.path)
+    path = re.sub(r"/amp/?$|\.amp$|/index\.html?$", "", path).rstrip("/") or "/"
+
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(key)))
+    return urlunsplit(("https", host, path, query, ""))
+
+def shingles(text: str) -> Set[str]:
+    """Distinct SHINGLE_SIZE-word sequences of a text, lowercased"""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[start:start + SHINGLE_SIZE]) for start in range(len(words) - SHINGLE_SIZE + 1)}
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Hash the distinct word shingles of a text into sorted, distinct 32-bit values"""
+    shingles_ = shingles(text)
+    return np.unique(np.fromiter((zlib.crc32(shingle.encode("utf-8")) for shingle in shingles_),
+                                 dtype=np.uint64, count=len(shingles_)))
+
+def jaccard(first: np.ndarray, second: np.ndarray) -> float:
+    """Exact Jaccard similarity of two shingle_hashes arrays"""
+    if first.size == 0 and second.size == 0:
+        return 1.0
+    shared = np.intersect1d(first, second, assume_unique=True).size
+    return shared / (first.size + second.size - shared)
+
+def minhash_signature(hashes: np.ndarray) -> np.ndarray:
+    """
+    Compute the MinHash signature of a text's shingles.
+
+    Each of the NUM_PERMUTATIONS hash functions is a multiply-shift hash
+    over the 32-bit shingle hashes; the fraction of equal positions in two
+    signatures estimates the Jaccard similarity of the shingle sets.
+
+    Args:
+        hashes: Shingle hashes of the text, see shingle_hashes
+    """
+    if hashes.size == 0:
+        return np.full(NUM_PERMUTATIONS, np.iinfo(np.uint64).max, dtype=np.uint64)
+
+    # Wrapping uint64 arithmetic is part of the hash
+    with np.errstate(over="ignore"):
+        values = (hashes[:, None] * _MULTIPLIERS + _OFFSETS) >> np.uint64(32)
+    return values.min(axis=0)
+
+def _band_keys(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    return [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(LSH_BANDS)]
+
+def deduplicate(articles: List[Dict[str, Any]],
+                threshold: float = DEDUP_THRESHOLD) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Drop repeated articles, keeping the first copy of each story.
+
+    An article is a duplicate when its canonical URL was already seen, or
+    when the similarity of its content's shingles to an earlier article's
+    reaches `threshold`. Candidate pairs are found with LSH banding over
+    MinHash signatures, so each article is only compared with articles
+    sharing a band, and candidates whose MinHash estimate comes close to
+    the threshold are checked with the exact similarity.
+
+    Args:
+        articles: Articles with "url" and "content"
+        threshold: Similarity at which two contents are the same story;
+            above 1 only identical URLs are dropped
+
+    Returns:
+        Tuple of the articles kept, in their original order, and one entry
+        per dropped article with its index, the index of the article it
+        duplicates, the reason ("url" or "content") and the similarity
+    """
+    kept = []
+    duplicates = []
+    urls = {}
+    # Signatures and shingle hashes of the kept articles, and their input indices
+    signatures = np.empty((len(articles), NUM_PERMUTATIONS), dtype=np.uint64)
+    kept_hashes = []
+    kept_indices = []
+    buckets = defaultdict(list)
+
+    for index, article in enumerate(articles):
+        url = canonicalize_url(article["url"])
+        if url in urls:
+            duplicates.append({"index": index, "duplicate_of": urls[url], "reason": "url", "similarity": 1.0})
+            continue
+
+        hashes = shingle_hashes(article["content"])
+        signature = minhash_signature(hashes)
+        keys = _band_keys(signature)
+
+        candidates = np.array(sorted({row for key in keys for row in buckets.get(key, ())}), dtype=np.intp)
+        if candidates.size:
+            estimates = (signatures[candidates] == signature).mean(axis=1)
+            best, best_similarity = None, 0.0
+            for row in candidates[estimates >= threshold - VERIFY_MARGIN]:
+                similarity = jaccard(kept_hashes[row], hashes)
+                if similarity > best_similarity:
+                    best, best_similarity = row, similarity
+
+            if best is not None and best_similarity >= threshold:
+                duplicates.append({"index": index, "duplicate_of": kept_indices[best], "reason": "content",
+                                   "similarity": best_similarity})
+                continue
+
+        row = len(kept)
+        urls[url] = index
+        signatures[row] = signature
+        kept_hashes.append(hashes)
+        kept_indices.append(index)
+        for key in keys:
+            buckets[key].append(row)
+        kept.append(article)
+
+    return kept, duplicates
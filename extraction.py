@@ -0,0 +1,94 @@
+import re
+from typing import List, Any, Optional
+
+import parsers
+
+# Elements that never hold article text
+BOILERPLATE_TAGS = ["script", "style", "noscript", "template", "nav", "header", "footer", "aside", "form",
+                    "iframe", "svg", "button", "select"]
+
+# Class or id values of page furniture, unless they also look like content
+_UNLIKELY = re.compile(r"comment|related|share|social|promo|newsletter|sidebar|subscribe|advert|cookie|"
+                       r"popup|modal|breadcrumb|footer|masthead|menu|nav|banner", re.IGNORECASE)
+_LIKELY = re.compile(r"article|body|content|main|story|text", re.IGNORECASE)
+
+# Paragraphs shorter than this, or mostly made of link text, are not article text
+MIN_PARAGRAPH_CHARS = 40
+MAX_LINK_DENSITY = 0.5
+
+def extract_main_text(html: str, backend: Optional[Any] = None) -> str:
+    """
+    Strip an article page down to its main text.
+
+    Scripts, navigation, headers, footers and other page furniture are
+    removed first. Every remaining paragraph that is long enough and not
+    mostly links then scores its parent with its length and its grandparent
+    with half of it, and the paragraphs of the best scoring element make up
+    the article.
+
+    Args:
+        html: Article page HTML, possibly truncated
+        backend: HTML parser backend, see parsers.get_backend; HTML_PARSER by default
+
+    Returns:
+        Paragraphs of the main content separated by blank lines, or an
+        empty string when the page has no article-like text
+    """
+    backend = backend or parsers.default_backend()
+    body = backend.body(html, BOILERPLATE_TAGS)
+    if body is None:
+        return ""
+
+    _remove_unlikely(backend, body)
+
+    paragraphs = []
+    scores = {}
+    for node in backend.select(body, "p"):
+        text = " ".join(backend.text(node).split())
+        if len(text) < MIN_PARAGRAPH_CHARS:
+            continue
+
+        link_chars = sum(len(" ".join(backend.text(link).split())) for link in backend.select(node, "a"))
+        if link_chars / len(text) > MAX_LINK_DENSITY:
+            continue
+
+        parent = backend.parent(node)
+        grandparent = backend.parent(parent) if parent is not None else None
+        containers = [backend.key(container) for container in (parent, grandparent) if container is not None]
+        for weight, container in zip((1.0, 0.5), containers):
+            scores[container] = scores.get(container, 0.0) + weight * len(text)
+        paragraphs.append((containers, text))
+
+    if not scores:
+        return ""
+
+    best = max(scores, key=scores.get)
+    return "\n\n".join(text for containers, text in paragraphs if best in containers)
+
+def _remove_unlikely(backend: Any, body: Any) -> None:
+    """Remove elements whose class or id marks them as page furniture"""
+    # Decide on the intact tree first: removing an element frees its
+    # descendants, which must not be touched afterwards
+    candidates = []
+    for node in backend.select(body, "[class], [id]"):
+        marker = f"{backend.attribute(node, 'class') or ''} {backend.attribute(node, 'id') or ''}"
+        if _UNLIKELY.search(marker) and not _LIKELY.search(marker):
+            candidates.append((node, _ancestors(backend, node)))
+
+    removed = set()
+    outermost = []
+    for node, ancestors in candidates:
+        if not removed.intersection(ancestors):
+            removed.add(backend.key(node))
+            outermost.append(node)
+
+    for node in outermost:
+        backend.remove(node)
+
+def _ancestors(backend: Any, node: Any) -> List[Any]:
+    keys = []
+    parent = backend.parent(node)
+    while parent is not None:
+        keys.append(backend.key(parent))
+        parent = backend.parent(parent)
+    return keys
@@ -0,0 +1,142 @@
+import re
+from typing import List
+
+import numpy as np
+
+# Damping factor and convergence settings of the TextRank power iteration
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_MAX_ITERATIONS = 100
+TEXTRANK_TOLERANCE = 1e-6
+
+_WORD_PATTERN = re.compile(r"[a-z0-9][a-z0-9'-]*")
+
+def tfidf_matrix(sentences: List[str]) -> np.ndarray:
+    """
+    Build L2-normalized TF-IDF vectors for sentences.
+
+    Args:
+        sentences: Sentences to vectorize
+
+    Returns:
+        Matrix with one row per sentence and one column per distinct word
+    """
+    tokenized = [_WORD_PATTERN.findall(sentence.lower()) for sentence in sentences]
+    vocabulary = {}
+    rows = []
+    columns = []
+    for row, tokens in enumerate(tokenized):
+        for token in tokens:
+            rows.append(row)
+            columns.append(vocabulary.setdefault(token, len(vocabulary)))
+
+    counts = np.zeros((len(sentences), len(vocabulary)))
+    np.add.at(counts, (rows, columns), 1.0)
+
+    # Smoothed IDF, as in scikit-learn's TfidfVectorizer
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1
+    weights = counts * idf
+
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+
+def textrank_scores(vectors: np.ndarray) -> np.ndarray:
+    """
+    Score sentences with TextRank over their cosine similarity graph.
+
+    Args:
+        vectors: L2-normalized sentence vectors, one row per sentence
+
+    Returns:
+        PageRank score of every sentence
+    """
+    count = vectors.shape[0]
+    similarity = vectors @ vectors.T
+    np.fill_diagonal(similarity, 0.0)
+
+    # Row-normalize into transition probabilities; sentences sharing no
+    # words with any other one link to every sentence
+    out_weight = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_weight, out=np.full_like(similarity, 1.0 / count),
+                           where=out_weight > 0)
+
+    scores = np.full(count, 1.0 / count)
+    for _ in range(TEXTRANK_MAX_ITERATIONS):
+        updated = (1 - TEXTRANK_DAMPING) / count + TEXTRANK_DAMPING * (transition.T @ scores)
+        if np.abs(updated - scores).sum() < TEXTRANK_TOLERANCE:
+            return updated
+        scores = updated
+    return scores
+
+def centroid_scores(vectors: np.ndarray) -> np.ndarray:
+    """Score sentences by cosine similarity to the TF-IDF centroid of the document"""
+    centroid = vectors.sum(axis=0)
+    norm = np.linalg.norm(centroid)
+    if norm == 0:
+        return np.zeros(vectors.shape[0])
+    return vectors @ (centroid / norm)
+
+def rank_sentences(sentences: List[str], method: str = "textrank") -> List[int]:
+    """
+    Rank sentences by how central they are to the text.
+
+    Args:
+        sentences: Sentences of the text
+        method: "textrank" for PageRank over the sentence similarity graph,
+            or "tfidf" for similarity to the document centroid
+
+    Returns:
+        Sentence indices, most important first
+    """
+    if len(sentences) < 2:
+        return list(range(len(sentences)))
+
+    vectors = tfidf_matrix(sentences)
+    if method == "textrank":
+        scores = textrank_scores(vectors)
+    elif method == "tfidf":
+        scores = centroid_scores(vectors)
+    else:
+        raise ValueError(f"Unknown extractive method: {method}")
+
+    # Stable sort, so ties keep the earlier sentence first
+    return np.argsort(-scores, kind="stable").tolist()
+
+def summarize(sentences: List[str], max_length: int = 150, method: str = "textrank") -> str:
+    """
+    Build an extractive summary from the highest ranked sentences.
+
+    Sentences are taken in rank order while they fit in `max_length`
+    characters, skipping repeats, then put back in their original order.
+    If not even the best sentence fits, it is returned on its own.
+
+    Args:
+        sentences: Sentences of the text
+        max_length: Maximum length of the summary in characters
+        method: Ranking method, see rank_sentences
+
+    Returns:
+        Summary text
+    """
+    ranking = rank_sentences(sentences, method)
+    if not ranking:
+        return ""
+
+    chosen = []
+    seen = set()
+    length = 0
+    for index in ranking:
+        # Repeated sentences rank equally high, but only one copy is useful
+        normalized = " ".join(sentences[index].split()).casefold()
+        if normalized in seen:
+            continue
+        sentence_length = len(sentences[index]) + (1 if chosen else 0)
+        if length + sentence_length <= max_length:
+            chosen.append(index)
+            seen.add(normalized)
+            length += sentence_length
+
+    if not chosen:
+        chosen = ranking[:1]
+
+    return " ".join(sentences[index].strip() for index in sorted(chosen))
@@ -0,0 +1,191 @@
+import os
+import re
+import time
+import codecs
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from typing import List, Dict, Any, Optional, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Default browser-like headers sent with every request
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Deadlines (in seconds) for a single source and for a whole batch of sources
+SOURCE_TIMEOUT = float(os.environ.get("FETCH_SOURCE_TIMEOUT", "10"))
+OVERALL_TIMEOUT = float(os.environ.get("FETCH_OVERALL_TIMEOUT", "12"))
+
+# Size of the keep-alive connection pool and of the fetch worker pool
+POOL_SIZE = int(os.environ.get("FETCH_POOL_SIZE", "16"))
+
+# Number of hosts the session keeps a connection pool for. Article links
+# point to many different sites, each one gets its own pool.
+HOST_POOLS = int(os.environ.get("FETCH_HOST_POOLS", "64"))
+
+# Bytes read per response; anything beyond is dropped
+MAX_RESPONSE_BYTES = int(os.environ.get("FETCH_MAX_BYTES", str(2 * 1024 * 1024)))
+
+_META_CHARSET = re.compile(rb"""<meta[^>]+charset=["']?([A-Za-z0-9_-]+)""", re.IGNORECASE)
+
+_session = None
+_session_lock = threading.Lock()
+
+_executor = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="fetch")
+
+class FetchTimeout(Exception):
+    """Raised when a single source does not finish within its deadline"""
+
+def get_session() -> requests.Session:
+    """
+    Return the shared HTTP session.
+
+    The session keeps connections alive between calls, so repeated requests
+    to the same host skip the TCP and TLS handshakes.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HOST_POOLS, pool_maxsize=POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers.update(DEFAULT_HEADERS)
+            _session = session
+    return _session
+
+def detect_encoding(response: requests.Response, first_chunk: bytes) -> str:
+    """
+    Pick the text encoding of a response.
+
+    The charset of the Content-Type header wins, then a <meta charset> in
+    the first chunk of the body, then UTF-8. `requests` itself falls back
+    to ISO-8859-1 for any text/* response without a charset, which garbles
+    most modern pages.
+    """
+    candidates = []
+    if "charset=" in response.headers.get("Content-Type", "").lower():
+        candidates.append(response.encoding)
+    match = _META_CHARSET.search(first_chunk)
+    if match:
+        candidates.append(match.group(1).decode("ascii"))
+
+    for candidate in candidates:
+        try:
+            return codecs.lookup(candidate).name
+        except (LookupError, TypeError):
+            continue
+    return "utf-8"
+
+def iter_body(response: requests.Response, chunk_size: int = 16384) -> Iterator[bytes]:
+    """
+    Yield the decompressed body of a streamed response as it arrives.
+
+    `iter_content` waits until a whole chunk has arrived, so against a
+    server trickling a few bytes at a time nothing comes back for a long
+    while. urllib3 2's `read1` returns whatever one socket read produced.
+    """
+    read1 = getattr(response.raw, "read1", None)
+    if read1 is None:
+        yield from response.iter_content(chunk_size=chunk_size)
+        return
+
+    while True:
+        chunk = read1(chunk_size, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+def fetch_url(url: str, timeout: float = SOURCE_TIMEOUT, max_bytes: int = MAX_RESPONSE_BYTES) -> Dict[str, Any]:
+    """
+    Download a single URL, enforcing a deadline on the whole transfer.
+
+    `requests` only applies its timeout to the connect and to each individual
+    socket read, so a slow server trickling bytes could hold a call open far
+    longer than `timeout`. The body is therefore streamed and the deadline is
+    checked between chunks. Chunks are decoded as they arrive, and reading
+    stops after `max_bytes`.
+
+    Args:
+        url: URL to download
+        timeout: Maximum number of seconds for the whole request
+        max_bytes: Maximum number of body bytes to read
+
+    Returns:
+        Dictionary with the url, status code, decoded text, elapsed time,
+        number of bytes read and whether the body was cut off at max_bytes
+    """
+    start = time.monotonic()
+    deadline = start + timeout
+
+    with get_session().get(url, timeout=timeout, stream=True) as response:
+        decoder = None
+        parts = []
+        received = 0
+        truncated = False
+
+        for chunk in iter_body(response):
+            if time.monotonic() > deadline:
+                raise FetchTimeout(f"{url} did not finish within {timeout}s")
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(detect_encoding(response, chunk))(errors="replace")
+
+            if received + len(chunk) > max_bytes:
+                chunk = chunk[:max_bytes - received]
+                truncated = True
+            received += len(chunk)
+            parts.append(decoder.decode(chunk))
+            if truncated:
+                break
+
+        if decoder is not None:
+            parts.append(decoder.decode(b"", final=True))
+
+        return {
+            "url": url,
+            "status_code": response.status_code,
+            "text": "".join(parts),
+            "elapsed": time.monotonic() - start,
+            "bytes": received,
+            "truncated": truncated
+        }
+
+def fetch_all(urls: List[str], source_timeout: float = SOURCE_TIMEOUT,
+              overall_timeout: float = OVERALL_TIMEOUT, max_bytes: int = MAX_RESPONSE_BYTES,
+              executor: Optional[ThreadPoolExecutor] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Download several URLs at the same time.
+
+    Args:
+        urls: URLs to download
+        source_timeout: Deadline for each individual URL
+        overall_timeout: Deadline for the whole batch
+        max_bytes: Maximum number of body bytes read per URL
+        executor: Worker pool bounding how many URLs download at once,
+            the shared fetch pool by default
+
+    Returns:
+        Dictionary mapping each URL that arrived in time to its fetch result.
+        Sources that failed or missed a deadline are left out.
+    """
+    results = {}
+    executor = executor or _executor
+    futures = {executor.submit(fetch_url, url, source_timeout, max_bytes): url for url in urls}
+
+    try:
+        for future in as_completed(futures, timeout=overall_timeout):
+            url = futures[future]
+            try:
+                results[url] = future.result()
+            except Exception as e:
+                print(f"Error fetching {url}: {e}")
+    except FuturesTimeoutError:
+        missing = [url for future, url in futures.items() if not future.done()]
+        print(f"Overall fetch deadline of {overall_timeout}s reached, skipping: {', '.join(missing)}")
+        # Stragglers still stop on their own source deadline
+        for future in futures:
+            future.cancel()
+
+    return results
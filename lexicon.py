@@ -0,0 +1,83 @@
+import re
+from typing import Dict, Any, List
+
+# Small finance-news sentiment lexicon, in the spirit of the Loughran-McDonald word lists
+POSITIVE_WORDS = {
+    "achieve", "achieved", "advance", "advanced", "beat", "beats", "benefit", "benefits", "best", "boost",
+    "boosted", "breakthrough", "commitment", "confidence", "confident", "exceed", "exceeded", "exceeding",
+    "exceptional", "expand", "expanded", "expands", "expansion", "favorable", "gain", "gains", "growth",
+    "improve", "improved", "improvement", "innovative", "innovation", "leader", "leading", "optimistic",
+    "outperform", "outperformed", "praise", "praised", "profit", "profitable", "profits", "progress",
+    "quality", "rally", "record", "recovery", "rise", "rising", "robust", "satisfaction", "soar", "soared",
+    "strong", "stronger", "strength", "success", "successful", "surge", "surged", "upgrade", "upgraded",
+    "well-received", "win", "wins"
+}
+
+NEGATIVE_WORDS = {
+    "caution", "cautious", "challenge", "challenges", "concern", "concerns", "crisis", "critic", "critics",
+    "cut", "cuts", "decline", "declined", "declines", "deficit", "delay", "delayed", "difficult", "downgrade",
+    "downgraded", "drop", "dropped", "drops", "fail", "failed", "failure", "fall", "fell", "fined",
+    "fraud", "investigation", "lawsuit", "layoff", "layoffs", "lose", "loss", "losses", "miss", "missed",
+    "negative", "penalty", "pressure", "problem", "problems", "question", "questions", "recall", "risk",
+    "risks", "scrutiny", "shortfall", "slump", "struggle", "struggles", "uncertainty", "weak", "weaker",
+    "weakness", "worse", "worst"
+}
+
+NEGATIONS = {"no", "not", "never", "without", "hardly", "nor", "cannot", "isn't", "wasn't", "don't",
+             "doesn't", "didn't", "won't"}
+
+# How many tokens before a sentiment word a negation still applies to
+NEGATION_WINDOW = 3
+
+_TOKEN_PATTERN = re.compile(r"[a-z][a-z'-]*")
+
+def score_sentence(sentence: str) -> Dict[str, Any]:
+    """
+    Score a sentence with the sentiment lexicon.
+
+    Confidence grows with the share of sentiment words that agree on the
+    label and with the number of sentiment words found: a single word gives
+    0.5, two agreeing words 0.67, three 0.75. A sentence without sentiment
+    words, or with as many positive as negative ones, gets 0.
+
+    Args:
+        sentence: Sentence to score
+
+    Returns:
+        Dictionary with a POSITIVE/NEGATIVE label and its confidence in the
+        same shape as the transformer pipeline output
+    """
+    tokens = _TOKEN_PATTERN.findall(sentence.lower())
+
+    positive = 0
+    negative = 0
+    for index, token in enumerate(tokens):
+        if token in POSITIVE_WORDS:
+            polarity = 1
+        elif token in NEGATIVE_WORDS:
+            polarity = -1
+        else:
+            continue
+
+        if any(previous in NEGATIONS for previous in tokens[max(0, index - NEGATION_WINDOW):index]):
+            polarity = -polarity
+
+        if polarity > 0:
+            positive += 1
+        else:
+            negative += 1
+
+    hits = positive + negative
+    if hits == 0:
+        return {"label": "POSITIVE", "score": 0.0}
+
+    margin = abs(positive - negative) / hits
+    evidence = hits / (hits + 1)
+    return {
+        "label": "POSITIVE" if positive >= negative else "NEGATIVE",
+        "score": margin * evidence
+    }
+
+def score_sentences(sentences: List[str]) -> List[Dict[str, Any]]:
+    """Score several sentences with the sentiment lexicon"""
+    return [score_sentence(sentence) for sentence in sentences]
@@ -0,0 +1,191 @@
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Names of the models behind each analysis step
+TOPIC_MODEL = "en_core_web_sm"
+SENTIMENT_MODEL = "distilbert-base-uncased-finetuned-sst-2-english"
+SUMMARIZATION_MODEL = "facebook/bart-large-cnn"
+
+# Inference backend of the transformer models: "pytorch" (fp32), "pytorch-int8"
+# or "onnx". INFERENCE_BACKEND sets both, the per-model variables override it.
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "pytorch")
+SENTIMENT_BACKEND = os.environ.get("SENTIMENT_BACKEND", INFERENCE_BACKEND)
+SUMMARIZATION_BACKEND = os.environ.get("SUMMARIZATION_BACKEND", INFERENCE_BACKEND)
+ONNX_CACHE_DIR = os.environ.get("ONNX_CACHE_DIR", "onnx_models")
+
+# Model and backend together identify the outputs, e.g. for cached results
+SENTIMENT_MODEL_ID = f"{SENTIMENT_MODEL}@{SENTIMENT_BACKEND}"
+SUMMARIZATION_MODEL_ID = f"{SUMMARIZATION_MODEL}@{SUMMARIZATION_BACKEND}"
+
+# Topic extraction only reads noun chunks and entities. Noun chunks need the
+# tagger and attribute_ruler (POS tags) and the parser (dependencies), and
+# entities need ner, so only the lemmatizer can be left out.
+TOPIC_PIPELINE_EXCLUDE = ["lemmatizer"]
+
+# When to load the models: "lazy" on first use, "background" in a warm-up
+# thread at startup, or "eager" before the API starts serving requests
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "lazy")
+
+class ModelRegistry:
+    """
+    Loads each model the first time it is needed.
+
+    Loading is thread-safe: if several requests need a model that is not
+    loaded yet, one of them loads it while the others wait for the result.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._states = {}
+        self._locks = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """Register a function that loads the model called `name`"""
+        self._loaders[name] = loader
+        self._states[name] = "not loaded"
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """Return the model called `name`, loading it on first use"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._locks[name]:
+            if name not in self._models:
+                self._states[name] = "loading"
+                try:
+                    self._models[name] = self._loaders[name]()
+                except Exception as e:
+                    self._states[name] = f"error: {e}"
+                    raise
+                self._states[name] = "ready"
+            return self._models[name]
+
+    def status(self) -> Dict[str, str]:
+        """Return the loading state of every registered model"""
+        return dict(self._states)
+
+    def ready(self) -> bool:
+        """Whether every registered model is loaded"""
+        return all(state == "ready" for state in self._states.values())
+
+    def warm_up(self, names: Optional[List[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Load models ahead of their first use.
+
+        Args:
+            names: Models to load, all registered models by default
+            background: Load in a daemon thread instead of blocking the caller
+
+        Returns:
+            The warm-up thread when loading in the background
+        """
+        names = names or list(self._loaders)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Error loading model {name}: {e}")
+
+        if not background:
+            load_all()
+            return None
+
+        thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+def _load_punkt() -> bool:
+    import nltk
+
+    # Download required NLTK data
+    try:
+        nltk.data.find('tokenizers/punkt')
+    except LookupError:
+        nltk.download('punkt')
+    return True
+
+def _load_spacy() -> Any:
+    import spacy
+
+    # Load spaCy model for topic extraction
+    try:
+        return spacy.load(TOPIC_MODEL, exclude=TOPIC_PIPELINE_EXCLUDE)
+    except OSError:
+        # Download if not available
+        os.system(f"python -m spacy download {TOPIC_MODEL}")
+        return spacy.load(TOPIC_MODEL, exclude=TOPIC_PIPELINE_EXCLUDE)
+
+def build_pipeline(task: str, model_name: str, backend: str) -> Any:
+    """
+    Build a transformers pipeline on the given inference backend.
+
+    Args:
+        task: "sentiment-analysis" or "summarization"
+        model_name: Hugging Face model name
+        backend: "pytorch" (fp32), "pytorch-int8" (dynamic int8 quantization
+            of the linear layers) or "onnx" (ONNX Runtime through optimum)
+
+    Returns:
+        Pipeline that is called the same way on every backend
+    """
+    from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification, AutoModelForSeq2SeqLM
+
+    if backend == "pytorch":
+        return pipeline(task, model=model_name)
+
+    if backend == "pytorch-int8":
+        import torch
+
+        model_class = AutoModelForSequenceClassification if task == "sentiment-analysis" else AutoModelForSeq2SeqLM
+        model = torch.ao.quantization.quantize_dynamic(model_class.from_pretrained(model_name),
+                                                       {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+    if backend == "onnx":
+        # No silent fallback to pytorch: outputs are cached and stored under
+        # the model ID, which names the configured backend
+        try:
+            from optimum.onnxruntime import ORTModelForSequenceClassification, ORTModelForSeq2SeqLM
+        except ImportError as e:
+            raise ImportError("The onnx inference backend needs optimum[onnxruntime]; "
+                              "install it or choose another INFERENCE_BACKEND") from e
+
+        model_class = ORTModelForSequenceClassification if task == "sentiment-analysis" else ORTModelForSeq2SeqLM
+
+        # Exporting to ONNX takes a while, so keep the exported model
+        export_dir = os.path.join(ONNX_CACHE_DIR, model_name.replace("/", "--"))
+        if os.path.isdir(export_dir):
+            model = model_class.from_pretrained(export_dir)
+        else:
+            model = model_class.from_pretrained(model_name, export=True)
+            model.save_pretrained(export_dir)
+        return pipeline(task, model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+
+    raise ValueError(f"Unknown inference backend: {backend}")
+
+def _load_sentiment() -> Any:
+    # Initialize sentiment analysis pipeline
+    return build_pipeline("sentiment-analysis", SENTIMENT_MODEL, SENTIMENT_BACKEND)
+
+def _load_summarizer() -> Any:
+    # Initialize text summarization model
+    return build_pipeline("summarization", SUMMARIZATION_MODEL, SUMMARIZATION_BACKEND)
+
+registry = ModelRegistry()
+registry.register("punkt", _load_punkt)
+registry.register("spacy", _load_spacy)
+registry.register("sentiment", _load_sentiment)
+registry.register("summarizer", _load_summarizer)
+
+def warm_up_from_env() -> None:
+    """Start loading models according to MODEL_WARMUP"""
+    if MODEL_WARMUP == "background":
+        registry.warm_up(background=True)
+    elif MODEL_WARMUP == "eager":
+        registry.warm_up(background=False)
@@ -0,0 +1,361 @@
+import os
+import re
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs, unquote, urljoin
+
+# HTML parser used for search result and article pages: "selectolax", "lxml" or
+# "html.parser". Parsers that are not installed fall back to the next one.
+HTML_PARSER = os.environ.get("HTML_PARSER", "selectolax")
+
+class SelectolaxBackend:
+    """CSS selection on selectolax's Lexbor parser, the fastest of the three"""
+
+    name = "selectolax"
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+        self._parser = LexborHTMLParser
+
+    def root(self, html: str) -> Any:
+        return self._parser(html)
+
+    def select(self, node: Any, selector: str) -> List[Any]:
+        return node.css(selector)
+
+    def text(self, node: Any) -> str:
+        return node.text(deep=True)
+
+    def attribute(self, node: Any, name: str) -> Optional[str]:
+        return node.attributes.get(name)
+
+    # Article pages, see extraction.extract_main_text
+
+    def body(self, html: str, strip_tags: List[str]) -> Optional[Any]:
+        tree = self._parser(html)
+        if tree.body is None:
+            return None
+        tree.strip_tags(strip_tags)
+        return tree.body
+
+    def parent(self, node: Any) -> Optional[Any]:
+        return node.parent
+
+    def key(self, node: Any) -> int:
+        return node.mem_id
+
+    def remove(self, node: Any) -> None:
+        node.decompose()
+
+class LxmlBackend:
+    """CSS selection on lxml trees through cssselect"""
+
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.etree
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._etree = lxml.etree
+        self._fromstring = lxml.html.fromstring
+        self._document_fromstring = lxml.html.document_fromstring
+        self._selector = CSSSelector
+        self._compiled = {}
+
+    def root(self, html: str) -> Any:
+        return self._fromstring(html)
+
+    def select(self, node: Any, selector: str) -> List[Any]:
+        # Compiling a selector to XPath costs more than running it, so keep them
+        compiled = self._compiled.get(selector)
+        if compiled is None:
+            compiled = self._compiled[selector] = self._selector(selector)
+        return compiled(node)
+
+    def text(self, node: Any) -> str:
+        return node.text_content()
+
+    def attribute(self, node: Any, name: str) -> Optional[str]:
+        return node.get(name)
+
+    # Article pages, see extraction.extract_main_text
+
+    def body(self, html: str, strip_tags: List[str]) -> Optional[Any]:
+        if not html.strip():
+            return None
+        tree = self._document_fromstring(html)
+        self._etree.strip_elements(tree, *strip_tags, with_tail=False)
+        return tree.find("body")
+
+    def parent(self, node: Any) -> Optional[Any]:
+        return node.getparent()
+
+    def key(self, node: Any) -> Any:
+        # lxml elements are only identical while referenced, and the caller keeps them
+        return node
+
+    def remove(self, node: Any) -> None:
+        # Keep the text that follows the element, it belongs to the parent
+        node.drop_tree()
+
+class SoupBackend:
+    """CSS selection on BeautifulSoup with the standard library's html.parser"""
+
+    name = "html.parser"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+
+    def root(self, html: str) -> Any:
+        return self._soup(html, "html.parser")
+
+    def select(self, node: Any, selector: str) -> List[Any]:
+        return node.select(selector)
+
+    def text(self, node: Any) -> str:
+        return node.get_text()
+
+    def attribute(self, node: Any, name: str) -> Optional[str]:
+        value = node.get(name)
+        # BeautifulSoup returns multi-valued attributes such as class as lists
+        return " ".join(value) if isinstance(value, list) else value
+
+    # Article pages, see extraction.extract_main_text
+
+    def body(self, html: str, strip_tags: List[str]) -> Optional[Any]:
+        soup = self._soup(html, "html.parser")
+        if soup.body is None:
+            return None
+        for node in soup.find_all(strip_tags):
+            node.decompose()
+        return soup.body
+
+    def parent(self, node: Any) -> Optional[Any]:
+        return node.parent
+
+    def key(self, node: Any) -> int:
+        return id(node)
+
+    def remove(self, node: Any) -> None:
+        node.decompose()
+
+BACKENDS = {"selectolax": SelectolaxBackend, "lxml": LxmlBackend, "html.parser": SoupBackend}
+
+def get_backend(name: str = HTML_PARSER) -> Any:
+    """
+    Create the HTML parser backend called `name`.
+
+    Falls back to the next backend in selectolax, lxml, html.parser order
+    when the requested one is not installed.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown HTML parser: {name}")
+
+    names = list(BACKENDS)
+    for candidate in names[names.index(name):]:
+        try:
+            return BACKENDS[candidate]()
+        except ImportError:
+            print(f"HTML parser {candidate} is not installed, trying the next one")
+    raise ImportError("No HTML parser available")
+
+_RELATIVE_DATE = re.compile(r"(\d+)\s*(minutes|minute|mins|min|m|hours|hour|hrs|hr|h|days|day|d|weeks|week|w|"
+                            r"months|month|mon|years|year|y)\.?(?:\s+ago)?", re.IGNORECASE)
+
+_ABSOLUTE_DATE_FORMATS = ["%b %d, %Y", "%B %d, %Y", "%d %b %Y", "%d %B %Y", "%Y-%m-%d", "%m/%d/%Y"]
+
+def parse_date(text: str, now: Optional[datetime] = None) -> Optional[str]:
+    """
+    Normalize the date shown next to a search result.
+
+    Args:
+        text: Relative ("3 hours ago", "2d", "yesterday") or absolute
+            ("Mar 5, 2024") date as shown on the page
+        now: Reference time for relative dates, the current time by default
+
+    Returns:
+        Date as YYYY-MM-DD, or None when the text is not a date
+    """
+    now = now or datetime.now()
+    text = " ".join(text.replace("·", " ").split()).strip(" .,")
+    if not text:
+        return None
+
+    if text.lower() == "yesterday":
+        return (now - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    match = _RELATIVE_DATE.fullmatch(text)
+    if match:
+        amount = int(match.group(1))
+        unit = match.group(2).lower()
+        if unit in ("minutes", "minute", "mins", "min", "m"):
+            delta = timedelta(minutes=amount)
+        elif unit.startswith("h"):
+            delta = timedelta(hours=amount)
+        elif unit.startswith("d"):
+            delta = timedelta(days=amount)
+        elif unit.startswith("w"):
+            delta = timedelta(weeks=amount)
+        elif unit.startswith("mon"):
+            delta = timedelta(days=30 * amount)
+        else:
+            delta = timedelta(days=365 * amount)
+        return (now - delta).strftime("%Y-%m-%d")
+
+    for date_format in _ABSOLUTE_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, date_format).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+class SearchResultParser:
+    """
+    Extracts news results from one search engine's result page.
+
+    Subclasses describe the page with CSS selectors: `result_selector`
+    matches one element per result, and `fields` maps each output field to
+    a (selector, attribute) pair applied inside that element. A selector of
+    None means the result element itself, an attribute of None means the
+    element's text. `clean_url` can be overridden to unwrap redirect links.
+    Selectors are plain CSS, so every parser works with every backend.
+    """
+
+    name = ""
+    hosts: Tuple[str, ...] = ()
+    base_url = ""
+    result_selector = ""
+    fields: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+    def parse(self, html: str, backend: Optional[Any] = None) -> List[Dict[str, Any]]:
+        """
+        Parse a result page.
+
+        Args:
+            html: Result page HTML
+            backend: HTML parser backend, see get_backend; HTML_PARSER by default
+
+        Returns:
+            One dictionary per result with title, url, source, published_date
+            and snippet. Results without a title or URL are skipped.
+        """
+        backend = backend or default_backend()
+        results = []
+
+        for element in backend.select(backend.root(html), self.result_selector):
+            values = {}
+            for field, (selector, attribute) in self.fields.items():
+                values[field] = self.extract(backend, element, selector, attribute)
+
+            title = values.get("title")
+            url = self.clean_url(values.get("url") or "")
+            if not title or not url:
+                continue
+
+            results.append({
+                "title": title,
+                "url": url,
+                "source": values.get("source") or urlparse(url).netloc,
+                "published_date": parse_date(values.get("date") or ""),
+                "snippet": values.get("snippet") or ""
+            })
+
+        return results
+
+    @staticmethod
+    def extract(backend: Any, element: Any, selector: Optional[str], attribute: Optional[str]) -> Optional[str]:
+        """Read one field from a result element, with whitespace collapsed"""
+        if selector is not None:
+            matches = backend.select(element, selector)
+            if not matches:
+                return None
+            element = matches[0]
+
+        value = backend.text(element) if attribute is None else backend.attribute(element, attribute)
+        if value is None:
+            return None
+        return " ".join(value.split()) or None
+
+    def clean_url(self, url: str) -> str:
+        """Turn a link found on the page into the article URL"""
+        return urljoin(self.base_url, url) if url else ""
+
+class GoogleNewsParser(SearchResultParser):
+    """Google News search (tbm=nws) result pages"""
+
+    name = "google"
+    hosts = ("www.google.com", "google.com")
+    base_url = "https://www.google.com/"
+    result_selector = "div.SoaBEf"
+    fields = {
+        "title": ("div[role=heading]", None),
+        "url": ("a", "href"),
+        "source": ("div.MgUUmf span", None),
+        "date": ("div.OSrXXb span", None),
+        "snippet": ("div.GI74Re", None)
+    }
+
+    def clean_url(self, url: str) -> str:
+        # Links of the basic HTML page go through /url?q=<article url>
+        if url.startswith("/url?"):
+            target = parse_qs(urlparse(url).query).get("q")
+            if target:
+                return target[0]
+        return super().clean_url(url)
+
+class YahooNewsParser(SearchResultParser):
+    """Yahoo News search result pages"""
+
+    name = "yahoo"
+    hosts = ("news.search.yahoo.com",)
+    base_url = "https://news.search.yahoo.com/"
+    result_selector = "div.NewsArticle"
+    fields = {
+        "title": ("h4.s-title a", None),
+        "url": ("h4.s-title a", "href"),
+        "source": ("span.s-source", None),
+        "date": ("span.s-time", None),
+        "snippet": ("p.s-desc", None)
+    }
+
+    def clean_url(self, url: str) -> str:
+        # Links go through r.search.yahoo.com/.../RU=<quoted article url>/RK=...
+        match = re.search(r"/RU=([^/]+)/R[KS]=", url)
+        if match:
+            return unquote(match.group(1))
+        return super().clean_url(url)
+
+class BingNewsParser(SearchResultParser):
+    """Bing News search result pages"""
+
+    name = "bing"
+    hosts = ("www.bing.com", "bing.com")
+    base_url = "https://www.bing.com/"
+    result_selector = "div.news-card"
+    fields = {
+        "title": (None, "data-title"),
+        "url": (None, "data-url"),
+        "source": (None, "data-author"),
+        "date": ("div.source span[aria-label]", "aria-label"),
+        "snippet": ("div.snippet", None)
+    }
+
+PARSERS = [GoogleNewsParser(), YahooNewsParser(), BingNewsParser()]
+
+_default_backend = None
+
+def default_backend() -> Any:
+    """Return the shared HTML_PARSER backend, creating it on first use"""
+    global _default_backend
+    if _default_backend is None:
+        _default_backend = get_backend(HTML_PARSER)
+    return _default_backend
+
+def parser_for_url(url: str) -> Optional[SearchResultParser]:
+    """Return the parser for the search engine serving `url`, if there is one"""
+    host = urlparse(url).netloc.lower()
+    for parser in PARSERS:
+        if host in parser.hosts:
+            return parser
+    return None
@@ -0,0 +1,79 @@
+from array import array
+from typing import List, Tuple, Union
+
+from nltk.tokenize import sent_tokenize
+
+import models
+
+class PreparedArticle:
+    """
+    Article text together with the preprocessing every analysis step shares.
+
+    Sentences are split once when the article is prepared. They are kept as
+    character offsets into the text rather than as copies of it, packed in
+    an array. Summarization, sentiment analysis and topic extraction all
+    accept a PreparedArticle in place of the raw text.
+    """
+
+    __slots__ = ("text", "_bounds")
+
+    def __init__(self, text: str):
+        """
+        Args:
+            text: Article text
+        """
+        self.text = text
+        # Start and end offset of every sentence, one after the other
+        self._bounds = array("L", [offset for span in sentence_spans(text) for offset in span])
+
+    @property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) character offsets of every sentence"""
+        return list(zip(self._bounds[::2], self._bounds[1::2]))
+
+    @property
+    def sentences(self) -> List[str]:
+        """Sentences of the article, as the punkt tokenizer splits them"""
+        bounds = self._bounds
+        return [self.text[bounds[index]:bounds[index + 1]] for index in range(0, len(bounds), 2)]
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __repr__(self) -> str:
+        return f"PreparedArticle({len(self.text)} chars, {len(self._bounds) // 2} sentences)"
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences with the NLTK punkt tokenizer"""
+    models.registry.get("punkt")
+    return sent_tokenize(text)
+
+def sentence_spans(text: str) -> Tuple[Tuple[int, int], ...]:
+    """
+    Split text into sentences and locate each one in the text.
+
+    Returns:
+        (start, end) character offsets of every sentence, in order
+    """
+    spans = []
+    offset = 0
+    for sentence in split_sentences(text):
+        start = text.find(sentence, offset)
+        if start < 0:
+            # Not expected with punkt, which returns slices of the text
+            raise ValueError(f"Sentence not found in text: {sentence[:50]!r}")
+        offset = start + len(sentence)
+        spans.append((start, offset))
+    return tuple(spans)
+
+def prepare(article: Union[str, PreparedArticle]) -> PreparedArticle:
+    """Prepare raw text, or return an already prepared article unchanged"""
+    if isinstance(article, PreparedArticle):
+        return article
+    return PreparedArticle(article)
+
+def text_of(article: Union[str, PreparedArticle]) -> str:
+    """Return the text of a raw or prepared article, without preparing it"""
+    if isinstance(article, PreparedArticle):
+        return article.text
+    return article
@@ -0,0 +1,316 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+import dedup
+
+class ArticleStore:
+    """
+    SQLite store of analyzed articles and the model outputs for them.
+
+    Articles are kept per company and identified by a hash of their
+    canonical URL (see dedup.canonicalize_url), together with their
+    extracted content. Each model output is stored with the model version
+    that produced it, so outputs of a replaced model are not reused but
+    recomputed and overwritten.
+
+    Per-day counts of article sentiments and topic mentions are kept up to
+    date with every save, so trends over any window are read from at most
+    one row per day, sentiment and topic instead of from the articles. The
+    counts follow the "sentiment" output's label and the "topics" output's
+    list of each article, on the day it was published.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: SQLite file, created if missing
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA foreign_keys=ON")
+        aggregated = self._db.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name = 'daily_sentiment'"
+        ).fetchone()[0]
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS articles ("
+            "id INTEGER PRIMARY KEY, company TEXT NOT NULL, url_hash TEXT NOT NULL, url TEXT NOT NULL, "
+            "title TEXT NOT NULL, source TEXT NOT NULL, published_date TEXT NOT NULL, content TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, UNIQUE (company, url_hash));"
+            "CREATE INDEX IF NOT EXISTS articles_company ON articles (company, published_date);"
+            "CREATE INDEX IF NOT EXISTS articles_url_hash ON articles (url_hash);"
+            "CREATE INDEX IF NOT EXISTS articles_published_date ON articles (published_date);"
+            "CREATE TABLE IF NOT EXISTS analyses ("
+            "article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE, kind TEXT NOT NULL, "
+            "model TEXT NOT NULL, value TEXT NOT NULL, analyzed_at REAL NOT NULL, PRIMARY KEY (article_id, kind));"
+            "CREATE TABLE IF NOT EXISTS daily_sentiment ("
+            "company TEXT NOT NULL, day TEXT NOT NULL, sentiment TEXT NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (company, day, sentiment)) WITHOUT ROWID;"
+            "CREATE TABLE IF NOT EXISTS daily_topics ("
+            "company TEXT NOT NULL, day TEXT NOT NULL, topic TEXT NOT NULL, count INTEGER NOT NULL, "
+            "PRIMARY KEY (company, day, topic)) WITHOUT ROWID;"
+        )
+        self._db.commit()
+        # Stores written before the counts existed get them from their articles once
+        if not aggregated:
+            self.rebuild_aggregates()
+
+    @staticmethod
+    def normalize(company: str) -> str:
+        """Normalize a company name into the key articles are stored under"""
+        return " ".join(company.split()).casefold()
+
+    @staticmethod
+    def url_hash(url: str) -> str:
+        """Hash of an article's canonical URL, so URL variants of one article match"""
+        return hashlib.sha1(dedup.canonicalize_url(url).encode("utf-8")).hexdigest()
+
+    def articles(self, company: str, urls: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up stored articles by URL.
+
+        Returns:
+            Stored article for every URL of `urls` that is in the store
+        """
+        by_hash = {self.url_hash(url): url for url in urls}
+        if not by_hash:
+            return {}
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT url_hash, title, content, url, published_date, source FROM articles "
+                f"WHERE company = ? AND url_hash IN ({', '.join('?' * len(by_hash))})",
+                (self.normalize(company), *by_hash)
+            ).fetchall()
+        return {by_hash[row[0]]: self._article(row[1:]) for row in rows}
+
+    def recent_articles(self, company: str, limit: int, exclude: Iterable[str] = (),
+                        exclude_prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Return a company's most recently published stored articles.
+
+        Args:
+            company: Company name
+            limit: Maximum number of articles
+            exclude: URLs of articles to leave out
+            exclude_prefix: Leave out articles whose URL starts with this
+
+        Returns:
+            Articles, newest first
+        """
+        excluded = [self.url_hash(url) for url in exclude]
+        prefix = exclude_prefix or ""
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT title, content, url, published_date, source FROM articles "
+                f"WHERE company = ? AND url_hash NOT IN ({', '.join('?' * len(excluded))}) "
+                f"AND (? = '' OR substr(url, 1, ?) != ?) "
+                f"ORDER BY published_date DESC, stored_at DESC LIMIT ?",
+                (self.normalize(company), *excluded, prefix, len(prefix), prefix, limit)
+            ).fetchall()
+        return [self._article(row) for row in rows]
+
+    def analyses(self, company: str, articles: List[Dict[str, Any]],
+                 model_versions: Dict[str, str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up stored model outputs of articles.
+
+        Args:
+            company: Company name
+            articles: Articles with url and content; outputs stored for
+                different content under the same URL are left out
+            model_versions: Model version expected for each kind of output;
+                outputs produced by another version are left out
+
+        Returns:
+            For the URL of every article with at least one usable output,
+            the outputs by kind
+        """
+        by_hash = {self.url_hash(article["url"]): article for article in articles}
+        if not by_hash:
+            return {}
+
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT articles.url_hash, articles.content, analyses.kind, analyses.model, analyses.value "
+                f"FROM articles JOIN analyses ON analyses.article_id = articles.id "
+                f"WHERE articles.company = ? AND articles.url_hash IN ({', '.join('?' * len(by_hash))})",
+                (self.normalize(company), *by_hash)
+            ).fetchall()
+
+        outputs = {}
+        for url_hash, content, kind, model, value in rows:
+            article = by_hash[url_hash]
+            if model_versions.get(kind) == model and article["content"] == content:
+                outputs.setdefault(article["url"], {})[kind] = json.loads(value)
+        return outputs
+
+    def save(self, company: str, articles: List[Dict[str, Any]], outputs: List[Dict[str, Any]],
+             model_versions: Dict[str, str]) -> None:
+        """
+        Store articles and their model outputs, replacing earlier versions.
+
+        Articles marked "simulated" are made up to fill a page and are
+        skipped, so they are never returned as stored articles.
+
+        Args:
+            company: Company name
+            articles: Articles with title, content, url, published_date and source
+            outputs: Model outputs by kind, one dictionary per article
+            model_versions: Model version of each kind of output
+        """
+        now = time.time()
+        company = self.normalize(company)
+
+        with self._lock:
+            for article, article_outputs in zip(articles, outputs):
+                if article.get("simulated"):
+                    continue
+                url_hash = self.url_hash(article["url"])
+                row = self._db.execute(
+                    "SELECT id FROM articles WHERE company = ? AND url_hash = ?", (company, url_hash)
+                ).fetchone()
+                before = self._contribution(row[0]) if row else None
+                # Outputs for an earlier version of the content no longer apply
+                self._db.execute(
+                    "DELETE FROM analyses WHERE article_id = "
+                    "(SELECT id FROM articles WHERE company = ? AND url_hash = ? AND content != ?)",
+                    (company, url_hash, article["content"])
+                )
+                # An upsert keeps the row id, so the article's other outputs stay attached
+                self._db.execute(
+                    "INSERT INTO articles (company, url_hash, url, title, source, published_date, content, stored_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT (company, url_hash) DO UPDATE SET "
+                    "url = excluded.url, title = excluded.title, source = excluded.source, "
+                    "published_date = excluded.published_date, content = excluded.content",
+                    (company, url_hash, article["url"], article["title"], article["source"],
+                     article["published_date"], article["content"], now)
+                )
+                article_id = self._db.execute(
+                    "SELECT id FROM articles WHERE company = ? AND url_hash = ?", (company, url_hash)
+                ).fetchone()[0]
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO analyses (article_id, kind, model, value, analyzed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(article_id, kind, model_versions[kind], json.dumps(value), now) for kind, value in article_outputs.items()]
+                )
+                # Move the article's counts to its new day, sentiment and topics
+                if before is not None:
+                    self._count(company, *before, -1)
+                self._count(company, *self._contribution(article_id), 1)
+            self._db.commit()
+
+    def daily_counts(self, company: str, first_day: str,
+                     last_day: str) -> Tuple[Dict[str, Dict[str, int]], Dict[str, Dict[str, int]]]:
+        """
+        Read a company's per-day counts.
+
+        Args:
+            company: Company name
+            first_day: First day, as YYYY-MM-DD
+            last_day: Last day, included
+
+        Returns:
+            Tuple of the article count per sentiment and the mention count
+            per topic, each by day; days without articles are left out
+        """
+        company = self.normalize(company)
+        with self._lock:
+            sentiment_rows = self._db.execute(
+                "SELECT day, sentiment, count FROM daily_sentiment WHERE company = ? AND day BETWEEN ? AND ?",
+                (company, first_day, last_day)
+            ).fetchall()
+            topic_rows = self._db.execute(
+                "SELECT day, topic, count FROM daily_topics WHERE company = ? AND day BETWEEN ? AND ?",
+                (company, first_day, last_day)
+            ).fetchall()
+
+        sentiments, topics = {}, {}
+        for day, sentiment, count in sentiment_rows:
+            sentiments.setdefault(day, {})[sentiment] = count
+        for day, topic, count in topic_rows:
+            topics.setdefault(day, {})[topic] = count
+        return sentiments, topics
+
+    def has_url_prefix(self, prefix: str) -> bool:
+        """Whether any stored article's URL starts with `prefix`"""
+        with self._lock:
+            row = self._db.execute("SELECT 1 FROM articles WHERE substr(url, 1, ?) = ? LIMIT 1",
+                                   (len(prefix), prefix)).fetchone()
+        return row is not None
+
+    def rebuild_aggregates(self, purge_url_prefix: Optional[str] = None) -> int:
+        """
+        Recount the per-day sentiments and topics of every stored article.
+
+        Args:
+            purge_url_prefix: First delete the articles whose URL starts with
+                this, with their outputs, e.g. simulated articles stored by
+                mistake
+
+        Returns:
+            Number of articles deleted
+        """
+        with self._lock:
+            purged = 0
+            if purge_url_prefix:
+                purged = self._db.execute("DELETE FROM articles WHERE substr(url, 1, ?) = ?",
+                                          (len(purge_url_prefix), purge_url_prefix)).rowcount
+            self._db.execute("DELETE FROM daily_sentiment")
+            self._db.execute("DELETE FROM daily_topics")
+            for article_id, company in self._db.execute("SELECT id, company FROM articles").fetchall():
+                self._count(company, *self._contribution(article_id), 1)
+            self._db.commit()
+        return purged
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the number of stored companies, articles and model outputs"""
+        with self._lock:
+            companies, articles = self._db.execute("SELECT COUNT(DISTINCT company), COUNT(*) FROM articles").fetchone()
+            analyses = self._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        return {"companies": companies, "articles": articles, "analyses": analyses}
+
+    def _contribution(self, article_id: int) -> Tuple[str, Optional[str], List[str]]:
+        """Day, sentiment label and topics an article adds to the per-day counts"""
+        day = self._db.execute("SELECT published_date FROM articles WHERE id = ?", (article_id,)).fetchone()[0][:10]
+        values = dict(self._db.execute(
+            "SELECT kind, value FROM analyses WHERE article_id = ? AND kind IN ('sentiment', 'topics')", (article_id,)
+        ).fetchall())
+
+        sentiment = json.loads(values["sentiment"]) if "sentiment" in values else None
+        if isinstance(sentiment, dict):
+            sentiment = sentiment.get("sentiment")
+        topics = json.loads(values["topics"]) if "topics" in values else []
+        return day, sentiment, list(dict.fromkeys(topics))
+
+    def _count(self, company: str, day: str, sentiment: Optional[str], topics: List[str], delta: int) -> None:
+        """Add `delta` to the counts of one article's day, sentiment and topics"""
+        rows = [("daily_topics", "topic", topic) for topic in topics]
+        if sentiment is not None:
+            rows.append(("daily_sentiment", "sentiment", sentiment))
+
+        for table, column, value in rows:
+            self._db.execute(
+                f"INSERT INTO {table} (company, day, {column}, count) VALUES (?, ?, ?, ?) "
+                f"ON CONFLICT (company, day, {column}) DO UPDATE SET count = count + excluded.count",
+                (company, day, value, delta)
+            )
+            if delta < 0:
+                self._db.execute(f"DELETE FROM {table} WHERE company = ? AND day = ? AND {column} = ? AND count <= 0",
+                                 (company, day, value))
+
+    @staticmethod
+    def _article(row: tuple) -> Dict[str, Any]:
+        title, content, url, published_date, source = row
+        return {"title": title, "content": content, "url": url, "published_date": published_date, "source": source}
+
+def article_store_from_env() -> Optional[ArticleStore]:
+    """Create the article store configured through ARTICLE_STORE_PATH, or None when it is disabled"""
+    path = os.environ.get("ARTICLE_STORE_PATH", "articles.db")
+    return ArticleStore(path) if path else None
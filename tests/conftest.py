@@ -0,0 +1,78 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Importing utils must not write an article store or audio files into the checkout
+os.environ.setdefault("ARTICLE_STORE_PATH", "")
+os.environ.setdefault("AUDIO_CACHE_DIR", os.path.join(os.environ.get("TMPDIR", "/tmp"), "news-summarization-audio"))
+
+class ArticlePageHandler(BaseHTTPRequestHandler):
+    """
+    Serve the saved article page, plus pathological pages.
+
+    `/article/<n>?delay=0.2` serves the fixture page after a delay,
+    `/slow` trickles a page out one small chunk per second, `/huge` serves
+    a page of about 64 MB and `/latin1` serves the fixture in ISO-8859-1
+    declared only in a <meta> tag.
+    """
+    protocol_version = "HTTP/1.1"
+    page = b""
+
+    def do_GET(self):
+        try:
+            self.serve_page()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on a slow or huge page, which is the point
+            pass
+
+    def serve_page(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        time.sleep(float(query.get("delay", ["0"])[0]))
+
+        if parsed.path == "/slow":
+            self.send_page_headers(len(self.page), "text/html; charset=utf-8")
+            for start in range(0, len(self.page), 512):
+                self.wfile.write(self.page[start:start + 512])
+                self.wfile.flush()
+                time.sleep(1.0)
+        elif parsed.path == "/huge":
+            filler = b"<p>" + b"Filler paragraph of a page that never ends. " * 20 + b"</p>\n"
+            repeats = 64 * 1024 * 1024 // len(filler)
+            head, tail = self.page.split(b"</body>", 1)
+            self.send_page_headers(len(head) + repeats * len(filler) + len(tail) + 7, "text/html; charset=utf-8")
+            self.wfile.write(head)
+            for _ in range(repeats):
+                self.wfile.write(filler)
+            self.wfile.write(b"</body>" + tail)
+        elif parsed.path == "/latin1":
+            body = self.page.decode("utf-8").replace("Tesla", "Tesla électrique").encode("latin-1", errors="replace")
+            body = body.replace(b'charset="utf-8"', b'charset="iso-8859-1"')
+            self.send_page_headers(len(body), "text/html")
+            self.wfile.write(body)
+        else:
+            self.send_page_headers(len(self.page), "text/html; charset=utf-8")
+            self.wfile.write(self.page)
+
+    def send_page_headers(self, length: int, content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(length))
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(handler):
+    """Start an HTTP server on a free local port and return it with its base URL"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return server, f"http://{host}:{port}"
@@ -0,0 +1,141 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+import api
+
+def make_result(company_name):
+    return {
+        "Company": company_name,
+        "Articles": [],
+        "Comparative Sentiment Score": {
+            "Sentiment Distribution": {"Positive": 0, "Negative": 0, "Neutral": 0},
+            "Coverage Differences": [],
+            "Topic Overlap": {"Common Topics": [], "Unique Topics": []},
+            "Final Sentiment Analysis": ""
+        },
+        "Final Sentiment Analysis": "",
+        "Audio": ""
+    }
+
+def test_coalesced_requests_wait_without_taking_a_worker(monkeypatch):
+    calls = []
+    peak_in_flight = []
+
+    def process_company_news(company_name, summary_mode=None, debug=False):
+        calls.append(company_name)
+        time.sleep(0.3)
+        return make_result(company_name)
+
+    monkeypatch.setattr(api.utils, "process_company_news", process_company_news)
+    monkeypatch.setattr(api, "API_MAX_IN_FLIGHT", 1)
+    api.response_cache.invalidate()
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            async def watch():
+                while len(peak_in_flight) < 20:
+                    peak_in_flight.append(api.in_flight)
+                    await asyncio.sleep(0.01)
+
+            requests = [client.post("/api/news", json={"company_name": "Acme Corp"}) for _ in range(5)]
+            responses, _ = await asyncio.gather(asyncio.gather(*requests), watch())
+            while api.in_flight:
+                await asyncio.sleep(0.01)
+            return responses
+
+    responses = asyncio.run(run())
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert sorted(response.headers["X-Cache"] for response in responses) == ["COALESCED"] * 4 + ["MISS"]
+    assert calls == ["Acme Corp"]
+    assert max(peak_in_flight) == 1
+
+def test_stale_refresh_counts_as_in_flight_and_is_dropped_when_saturated(monkeypatch):
+    calls = []
+    release = threading.Event()
+
+    def process_company_news(company_name, summary_mode=None, debug=False):
+        calls.append(company_name)
+        release.wait(5)
+        return make_result(company_name)
+
+    monkeypatch.setattr(api.utils, "process_company_news", process_company_news)
+    monkeypatch.setattr(api.response_cache, "refresh_after", 0)
+    api.response_cache.invalidate()
+    key = api.response_key("Acme Corp", api.utils.SUMMARY_MODE)
+    api.response_cache.put(key, api.format_company_response(make_result("Acme Corp")))
+
+    async def run(max_in_flight):
+        monkeypatch.setattr(api, "API_MAX_IN_FLIGHT", max_in_flight)
+        release.clear()
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/api/news", json={"company_name": "Acme Corp"})
+            in_flight = api.in_flight
+            release.set()
+            while api.in_flight:
+                await asyncio.sleep(0.01)
+            return response, in_flight
+
+    time.sleep(0.01)
+    response, in_flight = asyncio.run(run(0))
+    assert response.headers["X-Cache"] == "STALE"
+    assert (in_flight, calls) == (0, [])
+
+    response, in_flight = asyncio.run(run(8))
+    assert response.headers["X-Cache"] == "STALE"
+    assert in_flight == 1
+    assert calls == ["Acme Corp"]
+
+def test_cancelled_waiter_does_not_cancel_coalesced_requests(monkeypatch):
+    calls = []
+
+    def process_company_news(company_name, summary_mode=None, debug=False):
+        calls.append(company_name)
+        time.sleep(0.3)
+        return make_result(company_name)
+
+    monkeypatch.setattr(api.utils, "process_company_news", process_company_news)
+    api.response_cache.invalidate()
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            first = asyncio.ensure_future(client.post("/api/news", json={"company_name": "Acme Corp"}))
+            second = asyncio.ensure_future(client.post("/api/news", json={"company_name": "Acme Corp"}))
+            await asyncio.sleep(0.1)
+            first.cancel()
+            response = await second
+            while api.in_flight:
+                await asyncio.sleep(0.01)
+            return response
+
+    response = asyncio.run(run())
+
+    assert response.status_code == 200
+    assert response.headers["X-Cache"] == "COALESCED"
+    assert response.json()["Company"] == "Acme Corp"
+    assert calls == ["Acme Corp"]
+    assert api.response_cache.lookup(api.response_key("Acme Corp", api.utils.SUMMARY_MODE), None)[1] == "HIT"
+
+def test_blank_company_names_are_rejected(monkeypatch):
+    def process_companies_batch(company_names, include_audio=False, summary_mode=None):
+        raise AssertionError("blank names must not be analyzed")
+
+    monkeypatch.setattr(api.utils, "process_companies_batch", process_companies_batch)
+
+    async def run():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            batch = await client.post("/api/news/batch", json={"company_names": ["Acme Corp", "  "]})
+            single = await client.post("/api/news", json={"company_name": ""})
+            return batch, single
+
+    batch, single = asyncio.run(run())
+
+    assert batch.status_code == 400
+    assert single.status_code == 400
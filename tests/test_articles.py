@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+
+import pytest
+
+import extraction
+import fetcher
+import parsers
+import utils
+from conftest import ROOT, ArticlePageHandler, start_server
+
+ARTICLE = os.path.join(ROOT, "fixtures", "article_pages", "article")
+
+@pytest.fixture(scope="module")
+def expected_text():
+    with open(ARTICLE + ".txt", encoding="utf-8") as f:
+        return f.read().strip()
+
+@pytest.fixture(scope="module")
+def base_url():
+    with open(ARTICLE + ".html", "rb") as f:
+        ArticlePageHandler.page = f.read()
+    server, url = start_server(ArticlePageHandler)
+    yield url
+    server.shutdown()
+
+@pytest.fixture
+def deadlines(monkeypatch):
+    monkeypatch.setattr(utils, "ARTICLE_FETCH_TIMEOUT", 1.0)
+    monkeypatch.setattr(utils, "ARTICLE_FETCH_OVERALL_TIMEOUT", 2.0)
+
+@pytest.mark.parametrize("backend_name", list(parsers.BACKENDS))
+def test_extract_main_text_of_saved_page(backend_name, expected_text):
+    try:
+        backend = parsers.BACKENDS[backend_name]()
+    except ImportError:
+        pytest.skip(f"HTML parser {backend_name} is not installed")
+    with open(ARTICLE + ".html", encoding="utf-8") as f:
+        assert extraction.extract_main_text(f.read(), backend) == expected_text
+    assert extraction.extract_main_text("", backend) == ""
+
+def test_extraction_falls_back_when_selectolax_is_missing(monkeypatch, expected_text):
+    monkeypatch.setitem(sys.modules, "selectolax", None)
+    monkeypatch.setitem(sys.modules, "selectolax.lexbor", None)
+    backend = parsers.get_backend("selectolax")
+    assert backend.name == "lxml"
+    with open(ARTICLE + ".html", encoding="utf-8") as f:
+        assert extraction.extract_main_text(f.read(), backend) == expected_text
+
+def test_article_page_replaces_snippet(base_url, expected_text, deadlines):
+    articles = [{"url": f"{base_url}/article/{index}", "content": "snippet"} for index in range(3)]
+    utils.fetch_article_bodies(articles)
+    assert [article["content"] for article in articles] == [expected_text] * 3
+
+def test_slow_page_misses_deadline_and_keeps_snippet(base_url, deadlines):
+    articles = [{"url": f"{base_url}/slow", "content": "snippet"}, {"url": f"{base_url}/article/0", "content": "snippet"}]
+    start = time.monotonic()
+    utils.fetch_article_bodies(articles)
+    assert time.monotonic() - start < 3.0
+    assert articles[0]["content"] == "snippet"
+    assert articles[1]["content"] != "snippet"
+
+def test_huge_page_is_cut_off_at_max_bytes(base_url, deadlines):
+    response = fetcher.fetch_url(f"{base_url}/huge", timeout=10, max_bytes=utils.ARTICLE_MAX_BYTES)
+    assert response["truncated"]
+    assert response["bytes"] <= utils.ARTICLE_MAX_BYTES
+
+    articles = [{"url": f"{base_url}/huge", "content": "snippet"}]
+    utils.fetch_article_bodies(articles)
+    assert articles[0]["content"] != "snippet"
+
+def test_page_charset_from_meta_tag(base_url, deadlines):
+    articles = [{"url": f"{base_url}/latin1", "content": "snippet"}]
+    utils.fetch_article_bodies(articles)
+    assert "Tesla électrique" in articles[0]["content"]
@@ -0,0 +1,20 @@
+import sys
+import types
+
+import pytest
+
+import models
+
+def test_onnx_backend_without_optimum_fails_instead_of_running_pytorch(monkeypatch):
+    built = []
+    transformers = types.ModuleType("transformers")
+    transformers.pipeline = lambda *args, **kwargs: built.append((args, kwargs))
+    transformers.AutoTokenizer = transformers.AutoModelForSequenceClassification = object
+    transformers.AutoModelForSeq2SeqLM = object
+    monkeypatch.setitem(sys.modules, "transformers", transformers)
+    monkeypatch.setitem(sys.modules, "optimum", None)
+    monkeypatch.setitem(sys.modules, "optimum.onnxruntime", None)
+
+    with pytest.raises(ImportError, match="optimum"):
+        models.build_pipeline("sentiment-analysis", models.SENTIMENT_MODEL, "onnx")
+    assert built == []
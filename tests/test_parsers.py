@@ -0,0 +1,64 @@
+import json
+import os
+from datetime import datetime
+
+import pytest
+
+import parsers
+from conftest import ROOT
+
+SEARCH_PAGES = os.path.join(ROOT, "fixtures", "search_pages")
+
+def load_page(name):
+    with open(os.path.join(SEARCH_PAGES, name + ".html"), encoding="utf-8") as f:
+        html = f.read()
+    with open(os.path.join(SEARCH_PAGES, name + ".json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    return html, expected
+
+def make_backend(name):
+    # Built directly, so a missing parser is skipped instead of falling back to another one
+    try:
+        return parsers.BACKENDS[name]()
+    except ImportError:
+        pytest.skip(f"HTML parser {name} is not installed")
+
+@pytest.mark.parametrize("backend_name", list(parsers.BACKENDS))
+@pytest.mark.parametrize("parser", parsers.PARSERS, ids=lambda parser: parser.name)
+def test_parser_reads_saved_result_page(parser, backend_name):
+    html, expected = load_page(parser.name)
+    assert expected
+    assert parser.parse(html, make_backend(backend_name)) == expected
+
+@pytest.mark.parametrize("backend_name", list(parsers.BACKENDS))
+def test_parser_skips_results_without_title_or_url(backend_name):
+    html = ("<div class='news-card' data-title='Kept' data-url='https://example.com/kept'></div>"
+            "<div class='news-card' data-title='No link'></div>"
+            "<div class='news-card' data-url='https://example.com/untitled'></div>")
+    results = parsers.BingNewsParser().parse(html, make_backend(backend_name))
+    assert [result["url"] for result in results] == ["https://example.com/kept"]
+    assert results[0]["source"] == "example.com"
+
+@pytest.mark.parametrize("url, name", [
+    ("https://www.google.com/search?q=Tesla+news&tbm=nws", "google"),
+    ("https://news.search.yahoo.com/search?p=Tesla+news", "yahoo"),
+    ("https://www.bing.com/news/search?q=Tesla+news", "bing"),
+])
+def test_parser_for_url(url, name):
+    assert parsers.parser_for_url(url).name == name
+
+def test_parser_for_unknown_host():
+    assert parsers.parser_for_url("https://example.com/search?q=Tesla") is None
+
+@pytest.mark.parametrize("text, expected", [
+    ("3 hours ago", "2024-03-05"),
+    ("2d", "2024-03-03"),
+    ("yesterday", "2024-03-04"),
+    ("1 week ago", "2024-02-27"),
+    ("Mar 1, 2024", "2024-03-01"),
+    (" · 2024-02-29", "2024-02-29"),
+    ("Sponsored", None),
+    ("", None),
+])
+def test_parse_date(text, expected):
+    assert parsers.parse_date(text, now=datetime(2024, 3, 5, 12, 0)) == expected
@@ -0,0 +1,30 @@
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+TIERED_SCRIPT = """
+import models
+import utils
+
+calls = []
+
+def transformer(batch, batch_size=None):
+    calls.append(list(batch))
+    return [{"label": "NEGATIVE", "score": 0.97} for _ in batch]
+
+models.registry.register("sentiment", lambda: transformer)
+results = utils.classify_sentences(["The meeting is on Tuesday.", "Profits soared to a record high."])
+
+assert calls == [["The meeting is on Tuesday."]], calls
+assert results[0] == {"label": "NEGATIVE", "score": 0.97}, results
+assert results[1]["label"] == "POSITIVE", results
+"""
+
+def test_tiered_mode_from_env_sends_uncertain_sentences_to_the_transformer(tmp_path):
+    # SENTIMENT_MODE is the default of classify_sentences, so it has to be set before utils is imported
+    env = dict(os.environ, SENTIMENT_MODE="tiered", ARTICLE_STORE_PATH="", AUDIO_CACHE_DIR=str(tmp_path))
+    completed = subprocess.run([sys.executable, "-c", TIERED_SCRIPT], cwd=ROOT, env=env,
+                               capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
@@ -0,0 +1,77 @@
+import asyncio
+
+import api
+import store
+
+MODELS = {"summarize": "summarizer", "sentiment": "classifier", "topics": "tagger"}
+
+def make_article(index, simulated=False, published_date="2026-10-01"):
+    article = {"title": f"Story {index}", "content": f"Content of story {index}.",
+               "url": f"https://example.com/story/{index}", "published_date": published_date,
+               "source": "example.com"}
+    if simulated:
+        article.update(url=f"https://news.example.com/acme/{index}", simulated=True)
+    return article
+
+def make_outputs(sentiment="Positive", topics=("Markets",)):
+    return {"summarize": "Summary.", "sentiment": {"sentiment": sentiment}, "topics": list(topics)}
+
+def test_simulated_articles_are_not_stored(tmp_path):
+    article_store = store.ArticleStore(str(tmp_path / "articles.db"))
+    articles = [make_article(1), make_article(2, simulated=True)]
+    article_store.save("Acme", articles, [make_outputs(), make_outputs()], MODELS)
+
+    assert article_store.stats()["articles"] == 1
+    assert list(article_store.articles("Acme", [article["url"] for article in articles])) == [articles[0]["url"]]
+    assert article_store.analyses("Acme", articles[1:], MODELS) == {}
+
+def test_recent_articles_leave_out_excluded_urls_and_prefix(tmp_path):
+    article_store = store.ArticleStore(str(tmp_path / "articles.db"))
+    # A store written before simulated articles were skipped
+    polluted = dict(make_article(3, simulated=True), simulated=False)
+    articles = [make_article(1), make_article(2), polluted]
+    article_store.save("Acme", articles, [make_outputs()] * 3, MODELS)
+
+    recent = article_store.recent_articles("acme ", 10, exclude=[articles[0]["url"]],
+                                           exclude_prefix="https://news.example.com/")
+    assert [article["url"] for article in recent] == [articles[1]["url"]]
+
+def test_daily_counts_follow_changed_outputs_and_dates(tmp_path):
+    article_store = store.ArticleStore(str(tmp_path / "articles.db"))
+    first, second = make_article(1), make_article(2)
+    article_store.save("Acme", [first, second], [make_outputs("Positive", ["Markets", "Growth"]),
+                                                 make_outputs("Negative", ["Markets"])], MODELS)
+    moved = dict(first, published_date="2026-10-02")
+    article_store.save("Acme", [moved], [{"sentiment": {"sentiment": "Neutral"}}], MODELS)
+    article_store.save("Acme", [make_article(3, simulated=True)], [make_outputs()], MODELS)
+
+    sentiments, topics = article_store.daily_counts("Acme", "2026-10-01", "2026-10-31")
+    assert sentiments == {"2026-10-01": {"Negative": 1}, "2026-10-02": {"Neutral": 1}}
+    assert topics == {"2026-10-01": {"Markets": 1}, "2026-10-02": {"Markets": 1, "Growth": 1}}
+
+def test_rebuild_aggregates_purges_stored_simulated_articles(tmp_path):
+    article_store = store.ArticleStore(str(tmp_path / "articles.db"))
+    polluted = dict(make_article(2, simulated=True), simulated=False)
+    article_store.save("Acme", [make_article(1), polluted],
+                       [make_outputs("Positive"), make_outputs("Negative", ["Layoffs"])], MODELS)
+    assert article_store.has_url_prefix("https://news.example.com/")
+
+    assert article_store.rebuild_aggregates(purge_url_prefix="https://news.example.com/") == 1
+    assert not article_store.has_url_prefix("https://news.example.com/")
+    assert article_store.stats() == {"companies": 1, "articles": 1, "analyses": 3}
+    assert article_store.daily_counts("Acme", "2026-10-01", "2026-10-01") == (
+        {"2026-10-01": {"Positive": 1}}, {"2026-10-01": {"Markets": 1}})
+
+def test_api_startup_purges_simulated_articles(tmp_path, monkeypatch):
+    article_store = store.ArticleStore(str(tmp_path / "articles.db"))
+    polluted = dict(make_article(2, simulated=True), simulated=False)
+    article_store.save("Acme", [make_article(1), polluted], [make_outputs(), make_outputs()], MODELS)
+    monkeypatch.setattr(api.utils, "article_store", article_store)
+
+    async def start():
+        async with api.lifespan(api.app):
+            pass
+
+    asyncio.run(start())
+    assert not article_store.has_url_prefix(api.utils.SIMULATED_URL_PREFIX)
+    assert api.utils.purge_simulated_articles() == 0
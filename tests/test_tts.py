@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+import api
+import cache
+import tts
+
+class FailingEngine(tts.StubEngine):
+    name = "failing"
+
+    def synthesize(self, text, language):
+        raise OSError("no network")
+
+def test_engine_base_requires_synthesize():
+    with pytest.raises(TypeError):
+        tts.TTSEngine()
+
+def test_stub_is_not_a_fallback(monkeypatch):
+    def missing():
+        raise ImportError("not installed")
+
+    monkeypatch.setitem(tts.ENGINES, "gtts", missing)
+    monkeypatch.setitem(tts.ENGINES, "piper", missing)
+    monkeypatch.setitem(tts.ENGINES, "espeak", missing)
+
+    with pytest.raises(ImportError):
+        tts.get_engine("gtts")
+    assert isinstance(tts.get_engine("stub"), tts.StubEngine)
+
+def test_failed_synthesis_falls_back_to_the_next_engine(monkeypatch):
+    monkeypatch.setitem(tts.ENGINES, "piper", FailingEngine)
+    monkeypatch.setitem(tts.ENGINES, "espeak", tts.StubEngine)
+
+    engine = tts.get_engine("piper")
+    assert isinstance(engine.fallback, tts.StubEngine)
+
+    text = "पहला वाक्य। दूसरा वाक्य।"
+    audio, spoken_by = tts.synthesize_with_fallback(engine, text, "hi", max_chars=12)
+    assert spoken_by is engine.fallback
+    assert audio == tts.synthesize(tts.StubEngine(), text, "hi", max_chars=12)
+
+def test_gtts_failure_is_served_as_wav_from_a_local_engine(monkeypatch, tmp_path):
+    class FailingGTTSEngine(FailingEngine):
+        name = "gtts"
+        extension = "mp3"
+        media_type = "audio/mpeg"
+
+    def missing():
+        raise ImportError("not installed")
+
+    monkeypatch.setitem(tts.ENGINES, "gtts", FailingGTTSEngine)
+    monkeypatch.setitem(tts.ENGINES, "piper", missing)
+    monkeypatch.setitem(tts.ENGINES, "espeak", tts.StubEngine)
+    engine = tts.get_engine("gtts")
+    monkeypatch.setattr(api.utils, "tts_engine", engine)
+    monkeypatch.setattr(api.utils, "audio_cache", cache.AudioCache(str(tmp_path)))
+
+    text = "कंपनी की खबरें मिश्रित हैं।"
+    key = api.utils.convert_text_to_hindi_speech(text).rsplit("/", 1)[1]
+    path = api.utils.audio_cache.wait(key, 10)
+
+    # Named after the voice that spoke it, in that voice's format
+    spoken_key = cache.AudioCache.make_key(text, api.utils.hindi_voice(engine.fallback))
+    assert os.path.basename(path) == f"{spoken_key}.wav"
+
+    async def get_audio():
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(f"/api/audio/{key}")
+
+    response = asyncio.run(get_audio())
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "audio/wav"
+    assert response.headers["cache-control"] == "no-cache"
+    assert response.content == tts.StubEngine().synthesize(text, "hi")
+
+def test_failed_synthesis_without_fallback_is_logged(capsys):
+    with pytest.raises(OSError):
+        tts.synthesize(FailingEngine(), "वाक्य", "hi")
+    assert "TTS engine failing failed: no network" in capsys.readouterr().out
@@ -0,0 +1,276 @@
+import abc
+import io
+import math
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import wave
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Any, Optional, Tuple
+
+# Speech engine: "gtts" (Google, needs network access), "piper" or "espeak"
+# (local, offline) or "stub" (deterministic tone, for tests). Engines that
+# are not installed, or fail to synthesize, fall back to the next one of
+# gtts, piper and espeak; "stub" is only used when asked for by name.
+TTS_ENGINE = os.environ.get("TTS_ENGINE", "gtts")
+
+# Texts are cut into chunks of whole sentences of at most this many
+# characters, synthesized at the same time and joined
+TTS_CHUNK_CHARS = int(os.environ.get("TTS_CHUNK_CHARS", "200"))
+TTS_CHUNK_WORKERS = int(os.environ.get("TTS_CHUNK_WORKERS", "4"))
+
+# Local engine programs; piper also needs a voice model (.onnx)
+ESPEAK_BINARY = os.environ.get("ESPEAK_BINARY", "espeak-ng")
+PIPER_BINARY = os.environ.get("PIPER_BINARY", "piper")
+PIPER_MODEL = os.environ.get("PIPER_MODEL", "")
+
+class TTSEngine(abc.ABC):
+    """
+    Turns text into audio bytes.
+
+    Subclasses implement `synthesize` for one chunk of text and set the
+    audio format; `concatenate` joins the audio of consecutive chunks.
+    `fallback` is the engine tried when synthesis fails, see get_engine;
+    it may use a different audio format.
+    """
+
+    name = ""
+    extension = "wav"
+    media_type = "audio/wav"
+    fallback: Optional["TTSEngine"] = None
+
+    @abc.abstractmethod
+    def synthesize(self, text: str, language: str) -> bytes:
+        """Speak one chunk of text"""
+
+    def concatenate(self, parts: List[bytes]) -> bytes:
+        """Join WAV files with the same sample format into one"""
+        output = io.BytesIO()
+        with wave.open(output, "wb") as joined:
+            for index, part in enumerate(parts):
+                with wave.open(io.BytesIO(part), "rb") as chunk:
+                    if index == 0:
+                        joined.setparams(chunk.getparams())
+                    joined.writeframes(chunk.readframes(chunk.getnframes()))
+        return output.getvalue()
+
+    def voice(self) -> str:
+        """Identifies the voice, so audio of a different voice is cached separately"""
+        return self.name
+
+class GTTSEngine(TTSEngine):
+    """Google Translate's text-to-speech through gTTS; one HTTPS request per 100 characters"""
+
+    name = "gtts"
+    extension = "mp3"
+    media_type = "audio/mpeg"
+
+    def __init__(self):
+        from gtts import gTTS
+        self._gtts = gTTS
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        output = io.BytesIO()
+        self._gtts(text=text, lang=language, slow=False).write_to_fp(output)
+        return output.getvalue()
+
+    def concatenate(self, parts: List[bytes]) -> bytes:
+        # MP3 is a sequence of self-contained frames, as gTTS itself relies on
+        return b"".join(parts)
+
+class PiperEngine(TTSEngine):
+    """Local neural voices with the piper command line program and a PIPER_MODEL voice"""
+
+    name = "piper"
+
+    def __init__(self, binary: str = PIPER_BINARY, model: str = PIPER_MODEL):
+        self.binary = shutil.which(binary)
+        if self.binary is None:
+            raise FileNotFoundError(f"{binary} not found")
+        if not model or not os.path.exists(model):
+            raise FileNotFoundError(f"Piper voice model not found: {model or '(PIPER_MODEL is not set)'}")
+        self.model = model
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        # The voice model decides the language; piper reads one utterance per line
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "speech.wav")
+            subprocess.run([self.binary, "--model", self.model, "--output_file", path],
+                           input=" ".join(text.split()).encode("utf-8"), capture_output=True, check=True)
+            with open(path, "rb") as f:
+                return f.read()
+
+    def voice(self) -> str:
+        return f"{self.name}:{os.path.basename(self.model)}"
+
+class EspeakEngine(TTSEngine):
+    """Local formant synthesis with the espeak-ng command line program"""
+
+    name = "espeak"
+
+    def __init__(self, binary: str = ESPEAK_BINARY):
+        self.binary = shutil.which(binary)
+        if self.binary is None:
+            raise FileNotFoundError(f"{binary} not found")
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "speech.wav")
+            # Text on stdin, so text starting with "-" is not taken for an option
+            subprocess.run([self.binary, "-v", language, "-w", path, "--stdin"],
+                           input=text.encode("utf-8"), capture_output=True, check=True)
+            with open(path, "rb") as f:
+                return f.read()
+
+class StubEngine(TTSEngine):
+    """
+    Deterministic stand-in that needs nothing installed.
+
+    Produces a tone whose pitch depends on the text and whose duration
+    grows with its length, so the same text always gives the same bytes.
+    """
+
+    name = "stub"
+    sample_rate = 16000
+    seconds_per_char = 0.06
+
+    def synthesize(self, text: str, language: str) -> bytes:
+        frequency = 200 + zlib.crc32(f"{language}:{text}".encode("utf-8")) % 400
+        period = [int(8000 * math.sin(2 * math.pi * sample / self.sample_rate * frequency))
+                  for sample in range(self.sample_rate // frequency)]
+        period_bytes = b"".join(sample.to_bytes(2, "little", signed=True) for sample in period)
+        frames = int(len(text) * self.seconds_per_char * self.sample_rate)
+
+        output = io.BytesIO()
+        with wave.open(output, "wb") as audio:
+            audio.setnchannels(1)
+            audio.setsampwidth(2)
+            audio.setframerate(self.sample_rate)
+            audio.writeframes((period_bytes * (frames // len(period) + 1))[:frames * 2])
+        return output.getvalue()
+
+ENGINES = {"gtts": GTTSEngine, "piper": PiperEngine, "espeak": EspeakEngine, "stub": StubEngine}
+
+# Engines tried in turn; the stub is left out, so a server without a real
+# engine does not serve tones as speech
+FALLBACK_ORDER = ["gtts", "piper", "espeak"]
+
+# Media type of every engine's file extension
+MEDIA_TYPES = {engine.extension: engine.media_type for engine in ENGINES.values()}
+
+def get_engine(name: str = TTS_ENGINE) -> TTSEngine:
+    """
+    Create the speech engine called `name`.
+
+    Falls back to the next engine in gtts, piper, espeak order when the
+    requested one is not installed. The installed engines after it are
+    chained through `fallback`, for synthesize_with_fallback. "stub" is
+    only returned when asked for by name.
+    """
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine: {name}")
+    if name not in FALLBACK_ORDER:
+        return ENGINES[name]()
+
+    available = []
+    for candidate in FALLBACK_ORDER[FALLBACK_ORDER.index(name):]:
+        try:
+            available.append(ENGINES[candidate]())
+        except (ImportError, OSError) as e:
+            if not available:
+                print(f"TTS engine {candidate} is not available ({e}), trying the next one")
+    if not available:
+        raise ImportError("No TTS engine available; install gTTS, piper or espeak-ng, "
+                          "or set TTS_ENGINE=stub for tests")
+
+    for engine, fallback in zip(available, available[1:]):
+        engine.fallback = fallback
+    return available[0]
+
+_SENTENCE_END = re.compile(r"(?<=[.!?।॥])\s+")
+
+def split_chunks(text: str, max_chars: int = TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Cut text into chunks of whole sentences of at most `max_chars` characters.
+
+    Sentences end at ".", "!", "?" or the Devanagari danda. A sentence longer
+    than `max_chars` is cut at the last space that fits.
+    """
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END.split(" ".join(text.split())):
+        while len(sentence) > max_chars:
+            cut = sentence.rfind(" ", 0, max_chars + 1)
+            if cut <= 0:
+                cut = max_chars
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}" if current else sentence
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+_chunk_executor = ThreadPoolExecutor(max_workers=TTS_CHUNK_WORKERS, thread_name_prefix="tts-chunk")
+
+def synthesize(engine: TTSEngine, text: str, language: str = "hi", max_chars: int = TTS_CHUNK_CHARS,
+               executor: Optional[Any] = None) -> bytes:
+    """
+    Synthesize text of any length.
+
+    The text is cut into sentence chunks, see split_chunks, which are
+    synthesized at the same time and joined in order. Failures are logged
+    with the engine's name and raised.
+
+    Args:
+        engine: Speech engine, see get_engine
+        text: Text to speak
+        language: Language code of the text
+        max_chars: Largest chunk in characters
+        executor: Pool synthesizing the chunks; a shared pool of
+            TTS_CHUNK_WORKERS threads by default
+
+    Returns:
+        Audio in the engine's format
+    """
+    try:
+        chunks = split_chunks(text, max_chars)
+        if len(chunks) <= 1:
+            return engine.synthesize(text, language)
+
+        executor = executor or _chunk_executor
+        parts = list(executor.map(lambda chunk: engine.synthesize(chunk, language), chunks))
+        return engine.concatenate(parts)
+    except Exception as e:
+        print(f"TTS engine {engine.name} failed: {e}")
+        raise
+
+def synthesize_with_fallback(engine: TTSEngine, text: str, language: str = "hi", max_chars: int = TTS_CHUNK_CHARS,
+                             executor: Optional[Any] = None) -> Tuple[bytes, TTSEngine]:
+    """
+    Synthesize text with `engine`, or with its fallbacks when it fails.
+
+    The whole text is spoken again by the next engine, so the chunks of one
+    audio file share a voice and a format. Arguments as for synthesize.
+
+    Returns:
+        Tuple of the audio and the engine that spoke it, whose format it is in
+    """
+    while True:
+        try:
+            return synthesize(engine, text, language, max_chars, executor), engine
+        except Exception:
+            if engine.fallback is None:
+                raise
+            print(f"Falling back to TTS engine {engine.fallback.name}")
+            engine = engine.fallback
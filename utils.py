@@ -1,44 +1,110 @@
 import requests
 from bs4 import BeautifulSoup
 import pandas as pd
+import numpy as np
 import re
-from transformers import pipeline
 from nltk.tokenize import sent_tokenize
-import nltk
-import spacy
 from collections import Counter
-import torch
-from transformers import AutoModelForSeq2SeqLM, AutoTokenizer
+from datetime import date, timedelta
 import os
 import json
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Optional, Callable, Union
 import time
 import random
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import fetcher
+import parsers
+import extraction
+import dedup
+import store
+import tts
+import cache
+import models
+import lexicon
+import extractive
+import preprocessing
+from preprocessing import PreparedArticle
+from models import TOPIC_MODEL, SENTIMENT_MODEL_ID, SUMMARIZATION_MODEL_ID
 
-# Download required NLTK data
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    nltk.download('punkt')
+# Models are loaded on first use through models.registry, see MODEL_WARMUP
+
+# Cache of per-article model outputs, keyed by content and model name
+nlp_cache = cache.result_cache_from_env()
+
+# Articles analyzed earlier and their model outputs, see store.ArticleStore;
+# None when ARTICLE_STORE_PATH is empty
+article_store = store.article_store_from_env()
 
-# Load spaCy model for topic extraction
+# Simulated articles live under this URL prefix, see purge_simulated_articles
+SIMULATED_URL_PREFIX = "https://news.example.com/"
+
+# Speech engine of the audio summaries, see tts.TTS_ENGINE; None without
+# any engine installed, and analyses then come without audio
 try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    # Download if not available
-    os.system("python -m spacy download en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+    tts_engine = tts.get_engine(tts.TTS_ENGINE)
+except ImportError as e:
+    print(f"Error loading speech engine: {str(e)}")
+    tts_engine = None
+
+# Synthesized speech files, named after a hash of the spoken text; the
+# files are synthesized in the background and served by /api/audio/{key}
+audio_cache = cache.audio_cache_from_env()
+
+# Number of sentences sent through the sentiment model in one forward pass
+SENTIMENT_BATCH_SIZE = int(os.environ.get("SENTIMENT_BATCH_SIZE", "16"))
+
+# "transformer" classifies every sentence with the model; "tiered" scores
+# sentences with the lexicon first and only sends uncertain ones to the model
+SENTIMENT_MODE = os.environ.get("SENTIMENT_MODE", "transformer")
+SENTIMENT_LEXICON_THRESHOLD = float(os.environ.get("SENTIMENT_LEXICON_THRESHOLD", "0.6"))
+
+# Batch size and number of processes for bulk topic extraction with nlp.pipe
+TOPIC_BATCH_SIZE = int(os.environ.get("TOPIC_BATCH_SIZE", "64"))
+TOPIC_PROCESSES = int(os.environ.get("TOPIC_PROCESSES", "1"))
+
+# Number of articles summarized together in one generate call
+SUMMARY_BATCH_SIZE = int(os.environ.get("SUMMARY_BATCH_SIZE", "4"))
+
+# Token budget of one summarizer input, special tokens included. Longer
+# articles are summarized in sentence-aligned chunks, then the chunk
+# summaries are summarized again. 0 uses the model's own limit.
+SUMMARY_CHUNK_TOKENS = int(os.environ.get("SUMMARY_CHUNK_TOKENS", "0"))
+
+# "abstractive" summarizes with the transformer model; "extractive" picks the
+# most central sentences of the article, ranked with EXTRACTIVE_METHOD
+# ("textrank" or "tfidf")
+SUMMARY_MODE = os.environ.get("SUMMARY_MODE", "abstractive")
+EXTRACTIVE_METHOD = os.environ.get("EXTRACTIVE_METHOD", "textrank")
 
-# Initialize sentiment analysis pipeline
-sentiment_analyzer = pipeline("sentiment-analysis", model="distilbert-base-uncased-finetuned-sst-2-english")
+# Worker pool for the per-article NLP stages
+PIPELINE_WORKERS = int(os.environ.get("PIPELINE_WORKERS", "4"))
+_pipeline_executor = ThreadPoolExecutor(max_workers=PIPELINE_WORKERS, thread_name_prefix="pipeline")
 
-# Initialize text summarization model
-summarizer = pipeline("summarization", model="facebook/bart-large-cnn")
+# Number of companies whose articles are fetched at the same time in batch mode
+BATCH_FETCH_WORKERS = int(os.environ.get("BATCH_FETCH_WORKERS", "8"))
+_batch_fetch_executor = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix="batch-fetch")
+
+# Article pages downloaded at the same time across all requests, deadlines
+# (in seconds) for one page and for all pages of a company, and bytes read per page
+ARTICLE_FETCH_WORKERS = int(os.environ.get("ARTICLE_FETCH_WORKERS", "8"))
+ARTICLE_FETCH_TIMEOUT = float(os.environ.get("ARTICLE_FETCH_TIMEOUT", "8"))
+ARTICLE_FETCH_OVERALL_TIMEOUT = float(os.environ.get("ARTICLE_FETCH_OVERALL_TIMEOUT", "10"))
+ARTICLE_MAX_BYTES = int(os.environ.get("ARTICLE_MAX_BYTES", str(1024 * 1024)))
+_article_fetch_executor = ThreadPoolExecutor(max_workers=ARTICLE_FETCH_WORKERS, thread_name_prefix="article-fetch")
+
+# Extracted page text shorter than this is not trusted over the search snippet
+ARTICLE_MIN_CHARS = 200
 
 def extract_news_articles(company_name: str, num_articles: int = 10) -> List[Dict[str, Any]]:
     """
     Extract news articles related to a given company.
     
+    Articles already in article_store keep their stored content instead of
+    being downloaded again. When the sources return too few results, the
+    company's most recent stored articles fill the list up first.
+    
     Args:
         company_name: Name of the company to search for
         num_articles: Number of articles to extract (default: 10)
@@ -58,30 +124,21 @@ def extract_news_articles(company_name: str, num_articles: int = 10) -> List[Dic
         f"https://www.bing.com/news/search?q={query}"
     ]
     
-    # For demonstration purposes, I'll create a function to simulate article extraction
-    # In a real implementation, you would use BeautifulSoup to parse the actual HTML
+    # Fetch every source at the same time; sources that miss their deadline are skipped
+    responses = fetcher.fetch_all(sources)
     
     for source in sources:
+        response = responses.get(source)
+        if response is None:
+            continue
+        
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            response = requests.get(source, headers=headers, timeout=10)
-            
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.text, 'html.parser')
+            if response["status_code"] == 200:
+                # Each search engine has its own parser, see parsers.PARSERS
+                results = parsers.parser_for_url(source).parse(response["text"])
                 
-                # The actual parsing would depend on the specific website structure
-                # For demonstration, I'll create a simulation
-                
-                # Simulate finding articles
-                article_elements = simulate_article_elements(company_name, min(5, num_articles - len(articles)))
-                
-                for article in article_elements:
-                    if len(articles) < num_articles:
-                        articles.append(article)
-                    else:
-                        break
+                for result in results[:min(5, num_articles - len(articles))]:
+                    articles.append(article_from_result(result))
             
             if len(articles) >= num_articles:
                 break
@@ -89,13 +146,80 @@ def extract_news_articles(company_name: str, num_articles: int = 10) -> List[Dic
         except Exception as e:
             print(f"Error extracting from {source}: {e}")
     
-    # Ensure we have exactly num_articles articles
+    stored = {}
+    if article_store is not None:
+        stored = article_store.articles(company_name, [article["url"] for article in articles])
+        articles = [stored.get(article["url"], article) for article in articles]
+    
+    # Replace the search snippets with the text of the article pages
+    fetch_article_bodies([article for article in articles if article["url"] not in stored])
+    
+    # Fill up with earlier articles, then simulated ones, when the sources returned too few results
+    if article_store is not None and len(articles) < num_articles:
+        articles.extend(article_store.recent_articles(company_name, num_articles - len(articles),
+                                                      exclude=[article["url"] for article in articles],
+                                                      exclude_prefix=SIMULATED_URL_PREFIX))
+    
     while len(articles) < num_articles:
         articles.append(simulate_article(company_name, len(articles) + 1))
     
     return articles[:10]
 
-def simulate_article_elements(company_name: str, count: int) -> List[Dict[str, Any]]:
+def fetch_article_bodies(articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Download the article pages and use their main text as article content.
+    
+    Pages are downloaded at the same time, at most ARTICLE_MAX_BYTES each,
+    and stripped of navigation, ads and other boilerplate. Articles whose
+    page fails, misses its deadline or yields too little text keep their
+    current content.
+    
+    Args:
+        articles: Articles to update in place
+        
+    Returns:
+        The same articles
+    """
+    if not articles:
+        return articles
+    
+    urls = list(dict.fromkeys(article["url"] for article in articles))
+    responses = fetcher.fetch_all(urls, ARTICLE_FETCH_TIMEOUT, ARTICLE_FETCH_OVERALL_TIMEOUT,
+                                  ARTICLE_MAX_BYTES, _article_fetch_executor)
+    
+    for article in articles:
+        response = responses.get(article["url"])
+        if response is None or response["status_code"] != 200:
+            continue
+        
+        try:
+            text = extraction.extract_main_text(response["text"])
+        except Exception as e:
+            print(f"Error extracting text from {article['url']}: {e}")
+            continue
+        
+        if len(text) >= ARTICLE_MIN_CHARS:
+            article["content"] = text
+    
+    return articles
+
+def article_from_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Turn a parsed search result into an article.
+    
+    Until the article page itself is downloaded, the result snippet (or the
+    title when there is none) stands in for the article content.
+    """
+    return {
+        "title": result["title"],
+        "content": result["snippet"] or result["title"],
+        "url": result["url"],
+        # Results without a recognizable date are treated as published today
+        "published_date": result["published_date"] or pd.Timestamp.now().strftime("%Y-%m-%d"),
+        "source": result["source"]
+    }
+
+def simulate_article_elements(company_name: str, count: int, start: int = 1) -> List[Dict[str, Any]]:
     """Simulate article extraction for demonstration purposes"""
     articles = []
     
@@ -151,9 +275,11 @@ def simulate_article_elements(company_name: str, count: int) -> List[Dict[str, A
         article = {
             "title": title,
             "content": content,
-            "url": f"https://news.example.com/{company_name.lower().replace(' ', '-')}/{i+1}",
+            "url": f"{SIMULATED_URL_PREFIX}{company_name.lower().replace(' ', '-')}/{start + i}",
             "published_date": simulate_date(),
-            "source": random.choice(["Business News", "Tech Today", "Financial Times", "Market Watch", "Industry Insider"])
+            "source": random.choice(["Business News", "Tech Today", "Financial Times", "Market Watch", "Industry Insider"]),
+            # Made-up articles are analyzed like others but never stored, see ArticleStore.save
+            "simulated": True
         }
         
         articles.append(article)
@@ -162,7 +288,8 @@ def simulate_article_elements(company_name: str, count: int) -> List[Dict[str, A
 
 def simulate_article(company_name: str, index: int) -> Dict[str, Any]:
     """Create a simulated article for demonstration purposes"""
-    return simulate_article_elements(company_name, 1)[0]
+    # The index keeps simulated URLs distinct, so they are not taken for duplicates
+    return simulate_article_elements(company_name, 1, index)[0]
 
 def simulate_date() -> str:
     """Generate a random recent date"""
@@ -231,29 +358,91 @@ def generate_article_content(company_name: str, title: str, sentiment: str, topi
     
     return "\n\n".join(paragraphs)
 
-def analyze_sentiment(text: str) -> Dict[str, Any]:
+def sentiment_model_name(mode: str = SENTIMENT_MODE) -> str:
+    """Name of the model behind a sentiment mode, used to key cached results"""
+    if mode == "tiered":
+        return f"lexicon@{SENTIMENT_LEXICON_THRESHOLD}+{SENTIMENT_MODEL_ID}"
+    return SENTIMENT_MODEL_ID
+
+def split_sentences(text: str) -> List[str]:
+    """Split text into sentences with the NLTK punkt tokenizer"""
+    return preprocessing.split_sentences(text)
+
+def split_for_sentiment(text: Union[str, PreparedArticle]) -> Tuple[List[str], bool]:
     """
-    Analyze sentiment of the given text.
+    Split text into the pieces that are sent to the sentiment model.
     
     Args:
-        text: Text to analyze
+        text: Text or prepared article to analyze
         
     Returns:
-        Dictionary containing sentiment analysis results
+        Tuple of the pieces to classify and whether the text is long enough
+        to be analyzed sentence by sentence
     """
     # For longer texts, we'll analyze sentences and aggregate
     if len(text) > 512:
-        sentences = sent_tokenize(text)
+        sentences = preprocessing.prepare(text).sentences
+        return [sentence for sentence in sentences if len(sentence.strip()) > 10], True  # Skip very short sentences
+    
+    # For shorter texts, analyze directly
+    return [preprocessing.text_of(text)], False
+
+def classify_sentences(sentences: List[str], batch_size: int = SENTIMENT_BATCH_SIZE,
+                       mode: str = SENTIMENT_MODE) -> List[Optional[Dict[str, Any]]]:
+    """
+    Run the sentiment model over sentences in padded batches.
+    
+    In "tiered" mode every sentence is first scored with the sentiment
+    lexicon, and only sentences scored below SENTIMENT_LEXICON_THRESHOLD
+    confidence are sent to the transformer.
+    
+    Args:
+        sentences: Sentences to classify
+        batch_size: Number of sentences per forward pass
+        mode: "transformer" or "tiered"
         
-        # Analyze each sentence
-        results = []
-        for sentence in sentences:
-            if len(sentence.strip()) > 10:  # Skip very short sentences
+    Returns:
+        One model result per sentence, or None where classification failed
+    """
+    if mode == "tiered":
+        results = lexicon.score_sentences(sentences)
+        uncertain = [index for index, result in enumerate(results) if result["score"] < SENTIMENT_LEXICON_THRESHOLD]
+        transformer_results = classify_sentences([sentences[index] for index in uncertain], batch_size,
+                                                 mode="transformer")
+        for index, result in zip(uncertain, transformer_results):
+            results[index] = result
+        return results
+    
+    sentiment_analyzer = models.registry.get("sentiment")
+    results = [None] * len(sentences)
+    
+    for start in range(0, len(sentences), batch_size):
+        batch = sentences[start:start + batch_size]
+        try:
+            results[start:start + len(batch)] = sentiment_analyzer(batch, batch_size=len(batch))
+        except Exception as e:
+            # Retry one by one so that a single bad sentence only loses itself
+            for offset, sentence in enumerate(batch):
                 try:
-                    result = sentiment_analyzer(sentence)[0]
-                    results.append(result)
+                    results[start + offset] = sentiment_analyzer(sentence)[0]
                 except Exception as e:
                     print(f"Error analyzing sentence: {e}")
+    
+    return results
+
+def aggregate_sentiment(results: List[Optional[Dict[str, Any]]], is_long: bool) -> Dict[str, Any]:
+    """
+    Turn the model results for one text into its sentiment analysis result.
+    
+    Args:
+        results: Model results for the pieces returned by split_for_sentiment
+        is_long: Whether the text was analyzed sentence by sentence
+        
+    Returns:
+        Dictionary containing sentiment analysis results
+    """
+    if is_long:
+        results = [r for r in results if r is not None]
         
         # Count positive, negative, neutral sentiments
         positive_count = sum(1 for r in results if r['label'] == 'POSITIVE')
@@ -279,46 +468,153 @@ def analyze_sentiment(text: str) -> Dict[str, Any]:
                 "neutral_sentences": len(results) - positive_count - negative_count
             }
         }
-    else:
-        # For shorter texts, analyze directly
-        try:
-            result = sentiment_analyzer(text)[0]
-            sentiment = "Positive" if result['label'] == 'POSITIVE' else "Negative"
-            return {
-                "sentiment": sentiment,
-                "confidence": result['score'],
-                "details": {
-                    "positive_sentences": 1 if sentiment == "Positive" else 0,
-                    "negative_sentences": 1 if sentiment == "Negative" else 0,
-                    "neutral_sentences": 0
-                }
-            }
-        except Exception as e:
-            print(f"Error analyzing text: {e}")
-            return {
-                "sentiment": "Neutral",
-                "confidence": 0.5,
-                "details": {
-                    "positive_sentences": 0,
-                    "negative_sentences": 0,
-                    "neutral_sentences": 1
-                }
+    
+    result = results[0]
+    if result is None:
+        return {
+            "sentiment": "Neutral",
+            "confidence": 0.5,
+            "details": {
+                "positive_sentences": 0,
+                "negative_sentences": 0,
+                "neutral_sentences": 1
             }
+        }
+    
+    sentiment = "Positive" if result['label'] == 'POSITIVE' else "Negative"
+    return {
+        "sentiment": sentiment,
+        "confidence": result['score'],
+        "details": {
+            "positive_sentences": 1 if sentiment == "Positive" else 0,
+            "negative_sentences": 1 if sentiment == "Negative" else 0,
+            "neutral_sentences": 0
+        }
+    }
 
-def extract_topics(text: str, num_topics: int = 3) -> List[str]:
+def analyze_sentiment(text: Union[str, PreparedArticle], mode: str = SENTIMENT_MODE) -> Dict[str, Any]:
+    """
+    Analyze sentiment of the given text.
+    
+    Args:
+        text: Text or prepared article to analyze
+        mode: "transformer" to classify every sentence with the model, or
+            "tiered" to let the lexicon settle confident sentences first
+        
+    Returns:
+        Dictionary containing sentiment analysis results
+    """
+    return analyze_sentiment_batch([text], mode=mode)[0]
+
+def analyze_sentiment_batch(texts: List[Union[str, PreparedArticle]], batch_size: int = SENTIMENT_BATCH_SIZE,
+                            mode: str = SENTIMENT_MODE) -> List[Dict[str, Any]]:
+    """
+    Analyze sentiment of several texts, sharing model batches between them.
+    
+    The sentences of all texts are pooled and classified in padded batches,
+    then mapped back to the text they came from. Each result is the same as
+    calling analyze_sentiment on that text alone.
+    
+    Args:
+        texts: Texts or prepared articles to analyze
+        batch_size: Number of sentences per forward pass
+        mode: "transformer" or "tiered", see analyze_sentiment
+        
+    Returns:
+        One sentiment analysis result per text, in the same order
+    """
+    model_name = sentiment_model_name(mode)
+    analyses = [nlp_cache.get("sentiment", model_name, preprocessing.text_of(text)) for text in texts]
+    
+    pieces = []
+    owners = []
+    long_flags = {}
+    for index, text in enumerate(texts):
+        if analyses[index] is not None:
+            continue
+        sentences, is_long = split_for_sentiment(text)
+        pieces.extend(sentences)
+        owners.extend([index] * len(sentences))
+        long_flags[index] = is_long
+    
+    # Classify everything at once, then regroup by text
+    grouped = {index: [] for index in long_flags}
+    for owner, result in zip(owners, classify_sentences(pieces, batch_size, mode)):
+        grouped[owner].append(result)
+    
+    for index, results in grouped.items():
+        analyses[index] = aggregate_sentiment(results, long_flags[index])
+        
+        # Only cache complete analyses, a failed sentence may succeed next time
+        if all(result is not None for result in results):
+            nlp_cache.set("sentiment", model_name, preprocessing.text_of(texts[index]), analyses[index])
+    
+    return analyses
+
+def extract_topics(text: Union[str, PreparedArticle], num_topics: int = 3) -> List[str]:
     """
     Extract key topics from the text.
     
     Args:
-        text: Text to analyze
+        text: Text or prepared article to analyze
         num_topics: Number of topics to extract
         
     Returns:
         List of topics
     """
+    text = preprocessing.text_of(text)
+    cached = nlp_cache.get("topics", TOPIC_MODEL, text, {"num_topics": num_topics})
+    if cached is not None:
+        return cached
+    
     # Parse text with spaCy
-    doc = nlp(text)
+    doc = models.registry.get("spacy")(text)
     
+    formatted_topics = topics_from_doc(doc, num_topics)
+    nlp_cache.set("topics", TOPIC_MODEL, text, formatted_topics, {"num_topics": num_topics})
+    return formatted_topics
+
+def extract_topics_many(texts: List[Union[str, PreparedArticle]], num_topics: int = 3, batch_size: int = TOPIC_BATCH_SIZE,
+                        n_process: int = TOPIC_PROCESSES) -> List[List[str]]:
+    """
+    Extract key topics from many texts at once.
+    
+    The texts are parsed with spaCy's nlp.pipe, which processes them in
+    batches and optionally in several processes. Each result is the same as
+    calling extract_topics on that text alone.
+    
+    Args:
+        texts: Texts or prepared articles to analyze
+        num_topics: Number of topics to extract per text
+        batch_size: Number of texts spaCy parses per batch
+        n_process: Number of processes spaCy parses with
+        
+    Returns:
+        One list of topics per text, in the same order
+    """
+    texts = [preprocessing.text_of(text) for text in texts]
+    topics = [nlp_cache.get("topics", TOPIC_MODEL, text, {"num_topics": num_topics}) for text in texts]
+    pending = [index for index, cached in enumerate(topics) if cached is None]
+    
+    docs = models.registry.get("spacy").pipe((texts[index] for index in pending),
+                                             batch_size=batch_size, n_process=n_process)
+    for index, doc in zip(pending, docs):
+        topics[index] = topics_from_doc(doc, num_topics)
+        nlp_cache.set("topics", TOPIC_MODEL, texts[index], topics[index], {"num_topics": num_topics})
+    
+    return topics
+
+def topics_from_doc(doc: Any, num_topics: int = 3) -> List[str]:
+    """
+    Pick the key topics of a parsed spaCy document.
+    
+    Args:
+        doc: Document parsed by the topic model
+        num_topics: Number of topics to extract
+        
+    Returns:
+        List of topics
+    """
     # Extract noun phrases and named entities
     noun_phrases = []
     for chunk in doc.noun_chunks:
@@ -356,13 +652,15 @@ def extract_topics(text: str, num_topics: int = 3) -> List[str]:
     
     return formatted_topics
 
-def generate_summary(text: str, max_length: int = 150) -> str:
+def generate_summary(text: Union[str, PreparedArticle], max_length: int = 150, mode: str = SUMMARY_MODE) -> str:
     """
     Generate a summary of the text.
     
     Args:
-        text: Text to summarize
+        text: Text or prepared article to summarize
         max_length: Maximum length of the summary
+        mode: "abstractive" to summarize with the transformer model, or
+            "extractive" to pick the highest ranked sentences of the text
         
     Returns:
         Summary text
@@ -370,19 +668,34 @@ def generate_summary(text: str, max_length: int = 150) -> str:
     # For demonstration, we'll use a simple approach
     # In a real implementation, you would use a more sophisticated model
     
+    article = text
+    text = preprocessing.text_of(article)
+    
     # Check if text is short enough already
     if len(text) <= max_length:
         return text
     
+    if mode == "extractive":
+        # Cheap enough to recompute, so extractive summaries are not cached
+        return extractive.summarize(preprocessing.prepare(article).sentences, max_length, EXTRACTIVE_METHOD)
+    
+    cached = nlp_cache.get("summary", SUMMARIZATION_MODEL_ID, text, summary_cache_params(max_length))
+    if cached is not None:
+        return cached
+    
     try:
         # Use transformers summarization pipeline
-        summary = summarizer(text, max_length=max_length, min_length=30, do_sample=False)[0]['summary_text']
+        if count_summary_tokens([text])[0] <= summary_token_limit():
+            summary = models.registry.get("summarizer")(text, max_length=max_length, min_length=30, do_sample=False)[0]['summary_text']
+        else:
+            summary = summarize_chunks(preprocessing.prepare(article).sentences, max_length)
+        nlp_cache.set("summary", SUMMARIZATION_MODEL_ID, text, summary, summary_cache_params(max_length))
         return summary
     except Exception as e:
         print(f"Error generating summary: {e}")
         
         # Fallback: extract first few sentences
-        sentences = sent_tokenize(text)
+        sentences = preprocessing.prepare(article).sentences
         summary = ""
         for sentence in sentences:
             if len(summary) + len(sentence) <= max_length:
@@ -392,57 +705,267 @@ def generate_summary(text: str, max_length: int = 150) -> str:
         
         return summary.strip()
 
-def perform_comparative_analysis(articles: List[Dict[str, Any]]) -> Dict[str, Any]:
+def summary_cache_params(max_length: int) -> Dict[str, Any]:
+    """Parameters that change a cached summary besides the model and the text"""
+    return {"max_length": max_length, "chunk_tokens": SUMMARY_CHUNK_TOKENS}
+
+def summary_token_limit() -> int:
+    """Return the largest number of tokens, special tokens included, sent to the summarizer at once"""
+    if SUMMARY_CHUNK_TOKENS > 0:
+        return SUMMARY_CHUNK_TOKENS
+    
+    limit = models.registry.get("summarizer").tokenizer.model_max_length
+    # Tokenizers without a configured limit report a huge placeholder value
+    return limit if limit <= 100000 else 1024
+
+def count_summary_tokens(texts: List[str], special_tokens: bool = True) -> List[int]:
+    """Count the summarizer tokens of each text"""
+    tokenizer = models.registry.get("summarizer").tokenizer
+    return [len(ids) for ids in tokenizer(texts, add_special_tokens=special_tokens)["input_ids"]]
+
+def chunk_sentences(sentences: List[str], budget: int) -> List[str]:
+    """
+    Group consecutive sentences into chunks that fit the summarizer.
+    
+    Args:
+        sentences: Sentences to group, in order
+        budget: Maximum number of tokens per chunk, special tokens included
+        
+    Returns:
+        Chunks of space-joined sentences. A sentence longer than the budget
+        becomes a chunk of its own and is truncated by the summarizer.
+    """
+    budget -= models.registry.get("summarizer").tokenizer.num_special_tokens_to_add()
+    
+    chunks = []
+    current = []
+    used = 0
+    for sentence, count in zip(sentences, count_summary_tokens(sentences, special_tokens=False)):
+        # One extra token per sentence for the space joining it to the previous one
+        if current and used + count + 1 > budget:
+            chunks.append(" ".join(current))
+            current = []
+            used = 0
+        current.append(sentence)
+        used += count + 1
+    
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+def summarize_chunks(sentences: List[str], max_length: int = 150) -> str:
+    """
+    Summarize a text too long for the summarizer with map-reduce.
+    
+    The sentences are grouped into chunks within the token limit and all
+    chunks are summarized in one batch. The chunk summaries are then
+    summarized together; if they are still too long, they are chunked and
+    summarized again.
+    
+    Args:
+        sentences: Sentences of the text
+        max_length: Maximum length of each summary
+        
+    Returns:
+        Summary text
+    """
+    summarizer = models.registry.get("summarizer")
+    limit = summary_token_limit()
+    
+    chunks = chunk_sentences(sentences, limit)
+    while len(chunks) > 1:
+        outputs = summarizer(chunks, max_length=max_length, min_length=30, do_sample=False,
+                             truncation=True, batch_size=len(chunks))
+        partial_summaries = [output['summary_text'] for output in outputs]
+        
+        reduced = chunk_sentences(partial_summaries, limit)
+        if len(reduced) >= len(chunks):
+            # The summaries do not get any shorter, so let the model truncate them
+            reduced = [" ".join(partial_summaries)]
+        chunks = reduced
+    
+    return summarizer(chunks[0], max_length=max_length, min_length=30, do_sample=False,
+                      truncation=True)[0]['summary_text']
+
+def generate_summaries(texts: List[Union[str, PreparedArticle]], max_length: int = 150, batch_size: int = SUMMARY_BATCH_SIZE,
+                       batch_timings: Optional[List[Dict[str, Any]]] = None,
+                       mode: str = SUMMARY_MODE) -> List[str]:
+    """
+    Generate summaries for several texts, sharing model batches between them.
+    
+    Texts are sorted by length before batching so that each batch holds
+    articles of similar size and little time is spent on padding. Texts that
+    are already short enough are returned unchanged, and texts over the
+    summarizer's token limit are summarized in chunks, as in generate_summary.
+    
+    Args:
+        texts: Texts or prepared articles to summarize
+        max_length: Maximum length of each summary
+        batch_size: Number of texts per generate call
+        batch_timings: Optional list that receives one entry per batch with
+            its size, longest input in characters and latency in seconds
+        mode: "abstractive" or "extractive", see generate_summary
+        
+    Returns:
+        One summary per text, in the same order
+    """
+    if mode == "extractive":
+        return [generate_summary(text, max_length, mode) for text in texts]
+    
+    articles = texts
+    texts = [preprocessing.text_of(text) for text in articles]
+    summaries = [text if len(text) <= max_length else None for text in texts]
+    for index, text in enumerate(texts):
+        if summaries[index] is None:
+            summaries[index] = nlp_cache.get("summary", SUMMARIZATION_MODEL_ID, text, summary_cache_params(max_length))
+    
+    pending = [index for index, summary in enumerate(summaries) if summary is None]
+    pending.sort(key=lambda index: len(texts[index]))
+    
+    # Articles over the token limit cannot share a batch, their chunks are batched instead
+    too_long = []
+    if pending:
+        try:
+            limit = summary_token_limit()
+            token_counts = count_summary_tokens([texts[index] for index in pending])
+            too_long = [index for index, count in zip(pending, token_counts) if count > limit]
+            pending = [index for index, count in zip(pending, token_counts) if count <= limit]
+        except Exception as e:
+            print(f"Error counting summary tokens: {e}")
+    
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        batch_start = time.perf_counter()
+        
+        try:
+            summarizer = models.registry.get("summarizer")
+            outputs = summarizer([texts[index] for index in batch], max_length=max_length, min_length=30,
+                                 do_sample=False, batch_size=len(batch))
+            for index, output in zip(batch, outputs):
+                summaries[index] = output['summary_text']
+                nlp_cache.set("summary", SUMMARIZATION_MODEL_ID, texts[index], summaries[index], summary_cache_params(max_length))
+        except Exception as e:
+            print(f"Error generating summary batch: {e}")
+            
+            # Summarize one by one so each article gets its own fallback
+            for index in batch:
+                summaries[index] = generate_summary(articles[index], max_length)
+        
+        if batch_timings is not None:
+            batch_timings.append({
+                "articles": len(batch),
+                "max_chars": max(len(texts[index]) for index in batch),
+                "seconds": time.perf_counter() - batch_start
+            })
+    
+    for index in too_long:
+        summaries[index] = generate_summary(articles[index], max_length)
+    
+    return summaries
+
+# Sentiment labels in the order of the sentiment distribution
+SENTIMENTS = ["Positive", "Negative", "Neutral"]
+
+def comparative_columns(articles: Union[List[Dict[str, Any]], pd.DataFrame]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Turn processed articles into the columns comparative analysis works on.
+    
+    Args:
+        articles: Processed articles, or a DataFrame with one row per
+            article and "Sentiment" and "Topics" (list) columns
+        
+    Returns:
+        Tuple of the sentiment code of every article (index into
+        SENTIMENTS), and the exploded topic column: the sentiment code of
+        every topic mention and the topic itself, in article order
+    """
+    if isinstance(articles, pd.DataFrame):
+        sentiments = articles["Sentiment"].fillna("Neutral").to_numpy(dtype=object)
+        topic_lists = [topics if isinstance(topics, list) else [] for topics in articles["Topics"]]
+    else:
+        sentiments = np.array([article.get("Sentiment", "Neutral") for article in articles], dtype=object)
+        topic_lists = [article.get("Topics", []) for article in articles]
+    
+    # Categorical codes: hashing the labels once and mapping the few distinct
+    # ones is much cheaper than a pd.Categorical built from the strings
+    codes, labels = pd.factorize(sentiments)
+    unknown = [label for label in labels if label not in SENTIMENTS]
+    if unknown:
+        # As counting it into the sentiment distribution would
+        raise KeyError(unknown[0])
+    article_sentiment = np.array([SENTIMENTS.index(label) for label in labels], dtype=np.intp)[codes]
+    
+    lengths = np.fromiter((len(topics) for topics in topic_lists), dtype=np.intp, count=len(topic_lists))
+    topic_sentiment = np.repeat(article_sentiment, lengths)
+    topics = np.array(list(itertools.chain.from_iterable(topic_lists)), dtype=object)
+    return article_sentiment, topic_sentiment, topics
+
+def top_topics(names: np.ndarray, counts: np.ndarray, first: np.ndarray, limit: int) -> List[str]:
+    """Most mentioned topics, ties broken by first mention, as Counter.most_common orders them"""
+    present = np.flatnonzero(counts > 0)
+    ranked = present[np.lexsort((first[present], -counts[present]))]
+    return names[ranked[:limit]].tolist()
+
+def perform_comparative_analysis(articles: Union[List[Dict[str, Any]], pd.DataFrame]) -> Dict[str, Any]:
     """
     Perform comparative analysis across articles.
     
     Args:
-        articles: List of article dictionaries with sentiment and topics
+        articles: List of article dictionaries with sentiment and topics,
+            or a DataFrame with "Sentiment" and "Topics" columns
         
     Returns:
         Dictionary containing comparative analysis results
     """
-    # Count sentiments
-    sentiment_counts = {
-        "Positive": 0,
-        "Negative": 0,
-        "Neutral": 0
-    }
+    return comparative_analysis_from_columns(*comparative_columns(articles))
+
+def comparative_analysis_from_columns(article_sentiment: np.ndarray, topic_sentiment: np.ndarray,
+                                      topics: Union[np.ndarray, pd.Categorical]) -> Dict[str, Any]:
+    """
+    Perform comparative analysis on the columns comparative_columns returns.
     
-    for article in articles:
-        sentiment = article.get("Sentiment", "Neutral")
-        sentiment_counts[sentiment] += 1
+    Topics are factorized into integer codes in order of first mention, and
+    a single grouping of (topic, sentiment) pairs yields the counts and
+    first mentions the distribution, topic focus and overlap all derive
+    from. Topics given as a pd.Categorical skip hashing the strings.
     
-    # Collect all topics
-    all_topics = []
-    for article in articles:
-        all_topics.extend(article.get("Topics", []))
+    Args:
+        article_sentiment: Sentiment code of every article, see SENTIMENTS
+        topic_sentiment: Sentiment code of the article of every topic mention
+        topics: Every topic mention, in article order
+        
+    Returns:
+        Dictionary containing comparative analysis results, as
+        perform_comparative_analysis
+    """
+    # Count sentiments
+    sentiment_counts = dict(zip(SENTIMENTS, np.bincount(article_sentiment, minlength=len(SENTIMENTS)).tolist()))
+    
+    # One grouped pass over (topic, sentiment) pairs: factorizing them numbers
+    # the pairs in order of first mention, counting the numbers gives mentions
+    codes, names = pd.factorize(topics)
+    names = np.asarray(names, dtype=object)
+    pair_codes, pairs = pd.factorize(codes * len(SENTIMENTS) + topic_sentiment)
+    pair_counts = np.bincount(pair_codes, minlength=len(pairs))
+    counts = np.zeros((len(SENTIMENTS), len(names)), dtype=np.int64)
+    first = np.zeros((len(SENTIMENTS), len(names)), dtype=np.int64)
+    counts[pairs % len(SENTIMENTS), pairs // len(SENTIMENTS)] = pair_counts
+    first[pairs % len(SENTIMENTS), pairs // len(SENTIMENTS)] = np.arange(len(pairs))
     
-    # Count topic frequency
-    topic_counts = Counter(all_topics)
-    common_topics = [topic for topic, count in topic_counts.most_common(5)]
+    # Factorized codes already follow the first mention of every topic
+    topic_counts = counts.sum(axis=0)
+    topic_order = np.arange(len(names))
+    common_topics = top_topics(names, topic_counts, topic_order, 5)
+    unique_topics = names[topic_counts == 1].tolist() if common_topics else []
     
     # Generate comparisons
     comparisons = []
     
     # Compare positive vs negative articles
     if sentiment_counts["Positive"] > 0 and sentiment_counts["Negative"] > 0:
-        positive_articles = [a for a in articles if a.get("Sentiment") == "Positive"]
-        negative_articles = [a for a in articles if a.get("Sentiment") == "Negative"]
-        
-        pos_topics = []
-        for article in positive_articles:
-            pos_topics.extend(article.get("Topics", []))
-        
-        neg_topics = []
-        for article in negative_articles:
-            neg_topics.extend(article.get("Topics", []))
-            
-        pos_topic_counts = Counter(pos_topics)
-        neg_topic_counts = Counter(neg_topics)
-        
-        pos_focus = [topic for topic, _ in pos_topic_counts.most_common(3)]
-        neg_focus = [topic for topic, _ in neg_topic_counts.most_common(3)]
+        positive, negative = SENTIMENTS.index("Positive"), SENTIMENTS.index("Negative")
+        pos_focus = top_topics(names, counts[positive], first[positive], 3)
+        neg_focus = top_topics(names, counts[negative], first[negative], 3)
         
         comparisons.append({
             "Comparison": f"Positive articles focus on {', '.join(pos_focus)}, while negative articles emphasize {', '.join(neg_focus)}.",
@@ -450,13 +973,11 @@ def perform_comparative_analysis(articles: List[Dict[str, Any]]) -> Dict[str, An
         })
     
     # Check for topic variation
-    if common_topics:
-        unique_topics = [topic for topic, count in topic_counts.items() if count == 1]
-        if unique_topics:
-            comparisons.append({
-                "Comparison": f"While {', '.join(common_topics[:3])} are common themes, some articles uniquely cover {', '.join(unique_topics[:3])}.",
-                "Impact": "This indicates a diversity in media coverage, exploring various aspects of the company."
-            })
+    if unique_topics:
+        comparisons.append({
+            "Comparison": f"While {', '.join(common_topics[:3])} are common themes, some articles uniquely cover {', '.join(unique_topics[:3])}.",
+            "Impact": "This indicates a diversity in media coverage, exploring various aspects of the company."
+        })
     
     # Overall sentiment trend
     if sentiment_counts["Positive"] > sentiment_counts["Negative"] + sentiment_counts["Neutral"]:
@@ -484,12 +1005,27 @@ def perform_comparative_analysis(articles: List[Dict[str, Any]]) -> Dict[str, An
     
     # Create topic overlap analysis
     topic_overlap = {
-        "Common Topics": common_topics[:3] if common_topics else [],
-        "Unique Topics": unique_topics[:5] if 'unique_topics' in locals() and unique_topics else []
+        "Common Topics": common_topics[:3],
+        "Unique Topics": unique_topics[:5]
+    }
+    
+    return {
+        "Sentiment Distribution": sentiment_counts,
+        "Coverage Differences": comparisons,
+        "Topic Overlap": topic_overlap,
+        "Final Sentiment Analysis": final_sentiment_analysis(sentiment_counts)
     }
+
+def final_sentiment_analysis(sentiment_counts: Dict[str, int]) -> str:
+    """
+    Describe the overall news coverage from the sentiment distribution.
     
-    # Calculate final sentiment
-    final_sentiment = ""
+    Args:
+        sentiment_counts: Number of Positive, Negative and Neutral articles
+        
+    Returns:
+        Final sentiment analysis sentence
+    """
     if sentiment_counts["Positive"] > sentiment_counts["Negative"] + sentiment_counts["Neutral"]:
         final_sentiment = "overwhelmingly positive, suggesting strong performance and optimistic outlook"
     elif sentiment_counts["Positive"] > sentiment_counts["Negative"]:
@@ -501,40 +1037,471 @@ def perform_comparative_analysis(articles: List[Dict[str, Any]]) -> Dict[str, An
     else:
         final_sentiment = "mixed or neutral, reflecting a complex situation"
     
+    return f"Current news coverage is {final_sentiment}."
+
+def parse_days(text: str) -> int:
+    """Parse a number of days written like 30d"""
+    match = re.fullmatch(r"(\d+)d", text.strip())
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Expected a number of days such as '30d', got '{text}'")
+    return int(match.group(1))
+
+def rank_topics(topic_counts: Dict[str, int], limit: int) -> List[Dict[str, Any]]:
+    """Most mentioned topics first, ties in alphabetical order"""
+    ranked = sorted(topic_counts.items(), key=lambda item: (-item[1], item[0]))
+    return [{"Topic": topic, "Count": count} for topic, count in ranked[:limit]]
+
+def sentiment_trends(company_name: str, window_days: int = 30, bucket_days: int = 1, num_topics: int = 5,
+                     end: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Summarize a company's stored articles over time.
+    
+    Reads the per-day counts article_store keeps up to date as articles are
+    analyzed, so the cost depends on the window, not on the number of
+    stored articles. Articles count on the day they were published.
+    
+    Args:
+        company_name: Name of the company
+        window_days: Days covered, ending with `end`
+        bucket_days: Days per bucket; the oldest bucket is cut short when
+            the window is not a multiple of it
+        num_topics: Topics listed per bucket and for the whole window
+        end: Last day as YYYY-MM-DD, today by default
+        
+    Returns:
+        Dictionary with the sentiment distribution and top topics of the
+        whole window and of each bucket, oldest bucket first; days without
+        articles count as zero
+    """
+    if article_store is None:
+        raise RuntimeError("Trends need the article store, see ARTICLE_STORE_PATH")
+    
+    last = date.fromisoformat(end) if end else date.today()
+    first = last - timedelta(days=window_days - 1)
+    sentiments, topics = article_store.daily_counts(company_name, first.isoformat(), last.isoformat())
+    
+    buckets = []
+    totals = Counter({sentiment: 0 for sentiment in SENTIMENTS})
+    total_topics = Counter()
+    bucket_end = last
+    while bucket_end >= first:
+        bucket_start = max(first, bucket_end - timedelta(days=bucket_days - 1))
+        counts = Counter({sentiment: 0 for sentiment in SENTIMENTS})
+        topic_counts = Counter()
+        for offset in range((bucket_end - bucket_start).days + 1):
+            day = (bucket_start + timedelta(days=offset)).isoformat()
+            counts.update(sentiments.get(day, {}))
+            topic_counts.update(topics.get(day, {}))
+        
+        buckets.append({
+            "Start": bucket_start.isoformat(),
+            "End": bucket_end.isoformat(),
+            "Articles": sum(counts.values()),
+            "Sentiment Distribution": dict(counts),
+            "Top Topics": rank_topics(topic_counts, num_topics)
+        })
+        totals.update(counts)
+        total_topics.update(topic_counts)
+        bucket_end = bucket_start - timedelta(days=1)
+    
     return {
-        "Sentiment Distribution": sentiment_counts,
-        "Coverage Differences": comparisons,
-        "Topic Overlap": topic_overlap,
-        "Final Sentiment Analysis": f"Current news coverage is {final_sentiment}."
+        "Company": company_name,
+        "Start": first.isoformat(),
+        "End": last.isoformat(),
+        "Articles": sum(totals.values()),
+        "Sentiment Distribution": dict(totals),
+        "Top Topics": rank_topics(total_topics, num_topics),
+        "Buckets": buckets[::-1]
     }
 
-from gtts import gTTS
-import os
+def hindi_voice(engine: tts.TTSEngine) -> Dict[str, Any]:
+    """Voice settings of Hindi speech by `engine`, part of the audio cache key"""
+    return {"engine": engine.voice(), "lang": "hi"}
 
-def convert_text_to_hindi_speech(text: str, output_filename: str = "output.mp3") -> str:
+def synthesize_hindi_speech(text: str, output_filename: str) -> Tuple[str, Dict[str, Any]]:
     """
-    Convert text to Hindi speech and save as an MP3 file.
+    Convert text to Hindi speech with tts_engine and save it.
+    
+    Long texts are synthesized in sentence chunks at the same time, see
+    tts.synthesize. When tts_engine fails, the next installed engine
+    speaks the text, see tts.synthesize_with_fallback.
     
     Args:
         text: The text to convert to speech (in Hindi).
-        output_filename: The name of the output MP3 file.
+        output_filename: The path of the output audio file.
     
     Returns:
-        The path to the saved MP3 file.
+        File extension of the audio and the voice settings of the engine
+        that spoke it, see AudioCache.request
+    """
+    audio, engine = tts.synthesize_with_fallback(tts_engine, text, language='hi')
+    
+    # Save the audio file
+    with open(output_filename, "wb") as f:
+        f.write(audio)
+    return engine.extension, hindi_voice(engine)
+
+def audio_url(key: str) -> str:
+    """URL path under which the API serves the audio stored under `key`"""
+    return f"/api/audio/{key}"
+
+def convert_text_to_hindi_speech(text: str) -> str:
     """
+    Start converting text to Hindi speech, without waiting for the audio.
+    
+    The audio is synthesized in the background into audio_cache, unless the
+    same text was already spoken, and stays at the same URL for as long as
+    it is cached.
+    
+    Args:
+        text: The text to convert to speech (in Hindi).
+    
+    Returns:
+        URL path of the audio file, see audio_url, or an empty string when
+        the synthesis could not be started
+    """
+    if tts_engine is None:
+        return ""
+    
     try:
-        # Create a gTTS object with Hindi language
-        tts = gTTS(text=text, lang='hi', slow=False)
-        
-        # Save the audio file
-        tts.save(output_filename)
-        
-        # Get the absolute path of the saved file
-        file_path = os.path.abspath(output_filename)
-        
-        return file_path
+        key = audio_cache.request(text, synthesize_hindi_speech, hindi_voice(tts_engine))
+        return audio_url(key)
     except Exception as e:
         print(f"Error converting text to speech: {str(e)}")
         return ""
 
-   
+def build_article_result(article: Dict[str, Any], summary: str, sentiment: Dict[str, Any], topics: List[str]) -> Dict[str, Any]:
+    """Combine an extracted article with its analysis results"""
+    return {
+        "Title": article["title"],
+        "Summary": summary,
+        "Sentiment": sentiment["sentiment"],
+        "Topics": topics,
+        "Source": article["source"],
+        "Published_Date": article["published_date"],
+        "URL": article["url"]
+    }
+
+def estimate_model_calls(text: Union[str, PreparedArticle], summary_mode: str = SUMMARY_MODE,
+                         max_length: int = 150) -> int:
+    """
+    Estimate the model calls analyzing one article takes.
+    
+    Counts one summarizer call when the text needs an abstractive summary,
+    one sentiment classification per piece split_for_sentiment returns,
+    and one topic parse.
+    """
+    summary_calls = 1 if summary_mode == "abstractive" and len(text) > max_length else 0
+    sentiment_calls = len(split_for_sentiment(text)[0])
+    return summary_calls + sentiment_calls + 1
+
+def deduplicate_articles(articles: List[Dict[str, Any]],
+                         summary_mode: str = SUMMARY_MODE) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Drop repeated and syndicated copies of the same story before analysis.
+    
+    See dedup.deduplicate for how duplicates are detected.
+    
+    Args:
+        articles: Extracted articles
+        summary_mode: Summary mode the articles will be analyzed with
+        
+    Returns:
+        Tuple of the articles to analyze and a report with the number of
+        articles extracted, duplicates dropped and model calls saved
+    """
+    kept, duplicates = dedup.deduplicate(articles)
+    saved = sum(estimate_model_calls(articles[duplicate["index"]]["content"], summary_mode)
+                for duplicate in duplicates)
+    
+    if duplicates:
+        print(f"Dropped {len(duplicates)} duplicate articles, saving about {saved} model calls")
+    
+    return kept, {"articles": len(articles), "duplicates": len(duplicates), "model_calls_saved": saved}
+
+def analysis_models(summary_mode: str = SUMMARY_MODE) -> Dict[str, str]:
+    """Model version behind each per-article output, as recorded in article_store"""
+    summary_model = SUMMARIZATION_MODEL_ID if summary_mode == "abstractive" else f"extractive:{EXTRACTIVE_METHOD}"
+    return {"summarize": summary_model, "sentiment": sentiment_model_name(), "topics": TOPIC_MODEL}
+
+def stored_outputs(company_name: str, articles: List[Dict[str, Any]],
+                   model_versions: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Look up the outputs earlier requests stored for articles.
+    
+    Returns:
+        One dictionary per article with the stored summary, sentiment and
+        topics that the current models produced, by stage name
+    """
+    if article_store is None or not articles:
+        return [{} for _ in articles]
+    
+    found = article_store.analyses(company_name, articles, model_versions)
+    return [found.get(article["url"], {}) for article in articles]
+
+def purge_simulated_articles() -> int:
+    """
+    Delete simulated articles from article_store and recount the trends.
+    
+    Stores written before simulated articles were kept out hold some, with
+    their made-up sentiments in the trend counts. The API runs this at
+    startup; it does nothing once the store is clean.
+    
+    Returns:
+        Number of articles deleted
+    """
+    if article_store is None or not article_store.has_url_prefix(SIMULATED_URL_PREFIX):
+        return 0
+    return article_store.rebuild_aggregates(purge_url_prefix=SIMULATED_URL_PREFIX)
+
+def store_outputs(company_name: str, articles: List[Dict[str, Any]], outputs: List[Dict[str, Any]],
+                  model_versions: Dict[str, str]) -> None:
+    """Record newly computed outputs in article_store; storage errors do not fail the analysis"""
+    if article_store is None:
+        return
+    
+    new = [(article, article_outputs) for article, article_outputs in zip(articles, outputs) if article_outputs]
+    if not new:
+        return
+    
+    try:
+        article_store.save(company_name, [article for article, _ in new],
+                           [article_outputs for _, article_outputs in new], model_versions)
+    except Exception as e:
+        print(f"Error storing articles for {company_name}: {e}")
+
+def _timed(func, *args) -> Tuple[Any, float]:
+    """Call func and return its result together with the time it finished"""
+    result = func(*args)
+    return result, time.perf_counter()
+
+def process_company_news(company_name: str, debug: bool = False,
+                         on_article: Optional[Callable[[int, Dict[str, Any], int], None]] = None,
+                         summary_mode: str = SUMMARY_MODE) -> Dict[str, Any]:
+    """
+    Run the full news analysis pipeline for a company.
+    
+    The pipeline has four stages:
+    fetch -> summarize / sentiment / topics -> comparative analysis -> TTS
+    
+    Copies of the same story are dropped between fetching and analysis, see
+    deduplicate_articles. Articles analyzed by earlier requests reuse the
+    outputs article_store holds for them, so only new articles and outputs
+    of replaced models go through the models; those are stored in turn.
+    
+    Summary, sentiment and topics of an article do not depend on each other,
+    so all of them run at the same time on the pipeline worker pool. Speech
+    synthesis only needs the final sentiment sentence, so it starts in the
+    background as soon as every article's sentiment is known, while
+    summaries and topics may still be running. The result does not wait
+    for the audio; its URL is served once the synthesis is done.
+    
+    Args:
+        company_name: Name of the company to analyze
+        debug: Include per-stage wall-clock timings, the deduplication
+            report and the number of stored outputs reused in the result
+        on_article: Optional callback called with the article index, the
+            processed article and the total number of articles as soon as
+            that article's summary, sentiment and topics are done
+        summary_mode: "abstractive" or "extractive", see generate_summary
+        
+    Returns:
+        Dictionary containing the articles, comparative analysis and audio URL
+    """
+    timings = {}
+    pipeline_start = time.perf_counter()
+    
+    # Stage 1: fetch articles
+    articles = extract_news_articles(company_name)
+    timings["fetch"] = time.perf_counter() - pipeline_start
+    
+    # Only one copy of each story goes through the models
+    dedup_start = time.perf_counter()
+    articles, deduplication = deduplicate_articles(articles, summary_mode)
+    timings["dedup"] = time.perf_counter() - dedup_start
+    
+    # Outputs stored by earlier requests, from the models currently in use
+    store_start = time.perf_counter()
+    model_versions = analysis_models(summary_mode)
+    stored = stored_outputs(company_name, articles, model_versions)
+    timings["store"] = time.perf_counter() - store_start
+    
+    # Stage 2: per-article NLP, all stages at the same time. Each article that
+    # still needs a model is split into sentences once and shared by the stages.
+    nlp_start = time.perf_counter()
+    stages = {
+        "summarize": functools.partial(generate_summary, mode=summary_mode),
+        "sentiment": analyze_sentiment,
+        "topics": extract_topics
+    }
+    prepared = [preprocessing.prepare(article["content"]) if len(stored[index]) < len(stages) else None
+                for index, article in enumerate(articles)]
+    timings["prepare"] = time.perf_counter() - nlp_start
+    
+    futures = {}
+    for index, article in enumerate(prepared):
+        for stage, func in stages.items():
+            if stage not in stored[index]:
+                futures[_pipeline_executor.submit(_timed, func, article)] = (stage, index)
+    
+    outputs = {stage: [None] * len(articles) for stage in stages}
+    stage_remaining = {stage: len(articles) for stage in stages}
+    article_remaining = [len(stages)] * len(articles)
+    processed_articles = [None] * len(articles)
+    computed = [{} for _ in articles]
+    audio_path = None
+    
+    def start_tts():
+        # Stage 4 can start once sentiment is done: the spoken text only depends on it.
+        # Synthesis runs in the background, this only looks up or schedules the audio.
+        tts_start = time.perf_counter()
+        sentiment_counts = {"Positive": 0, "Negative": 0, "Neutral": 0}
+        for sentiment in outputs["sentiment"]:
+            sentiment_counts[sentiment["sentiment"]] += 1
+        path = convert_text_to_hindi_speech(final_sentiment_analysis(sentiment_counts))
+        timings["tts"] = time.perf_counter() - tts_start
+        return path
+    
+    def complete(stage, index, output):
+        nonlocal audio_path
+        outputs[stage][index] = output
+        
+        stage_remaining[stage] -= 1
+        if stage == "sentiment" and stage_remaining[stage] == 0:
+            audio_path = start_tts()
+        
+        article_remaining[index] -= 1
+        if article_remaining[index] == 0:
+            processed_articles[index] = build_article_result(articles[index], outputs["summarize"][index],
+                                                             outputs["sentiment"][index], outputs["topics"][index])
+            if on_article is not None:
+                on_article(index, processed_articles[index], len(articles))
+    
+    if not articles:
+        audio_path = start_tts()
+    
+    for index, article_outputs in enumerate(stored):
+        for stage, output in article_outputs.items():
+            complete(stage, index, output)
+    
+    for future in as_completed(futures):
+        stage, index = futures[future]
+        output, finished = future.result()
+        timings[stage] = max(timings.get(stage, 0.0), finished - nlp_start)
+        computed[index][stage] = output
+        complete(stage, index, output)
+    
+    store_outputs(company_name, articles, computed, model_versions)
+    
+    # Stage 3: comparative analysis
+    comparative_start = time.perf_counter()
+    comparative_analysis = perform_comparative_analysis(processed_articles)
+    timings["comparative"] = time.perf_counter() - comparative_start
+    
+    timings["total"] = time.perf_counter() - pipeline_start
+    
+    result = {
+        "Company": company_name,
+        "Articles": processed_articles,
+        "Comparative Sentiment Score": comparative_analysis,
+        "Final Sentiment Analysis": comparative_analysis["Final Sentiment Analysis"],
+        "Audio": audio_path
+    }
+    
+    if debug:
+        result["Timings"] = timings
+        result["Deduplication"] = deduplication
+        result["Store"] = {
+            "outputs_reused": sum(len(article_outputs) for article_outputs in stored),
+            "outputs_computed": len(futures)
+        }
+    
+    return result
+
+def process_companies_batch(company_names: List[str], include_audio: bool = False,
+                            summary_mode: str = SUMMARY_MODE) -> Dict[str, Any]:
+    """
+    Run the news analysis pipeline for many companies at once.
+    
+    Articles are fetched for all companies at the same time and each
+    company's copies of the same story are dropped. The remaining articles
+    of every company are then pooled so summarization and sentiment run in
+    shared model batches instead of one small batch per company. Articles
+    with all outputs in article_store are not analyzed again.
+    
+    Args:
+        company_names: Names of the companies to analyze
+        include_audio: Also synthesize the Hindi audio summary of each company
+        summary_mode: "abstractive" or "extractive", see generate_summary
+        
+    Returns:
+        Dictionary with a "results" entry mapping each company to the same
+        result process_company_news returns, and an "errors" entry mapping
+        companies that failed to their error message
+    """
+    company_names = list(dict.fromkeys(company_names))
+    results = {}
+    errors = {}
+    
+    # Stage 1: fetch articles for every company at the same time
+    fetched = {}
+    fetch_futures = {_batch_fetch_executor.submit(extract_news_articles, name): name for name in company_names}
+    for future in as_completed(fetch_futures):
+        name = fetch_futures[future]
+        try:
+            fetched[name], _ = deduplicate_articles(future.result(), summary_mode)
+        except Exception as e:
+            errors[name] = f"Error extracting articles: {str(e)}"
+    
+    # Stage 2: NLP over the pooled articles of all companies that are
+    # missing any of the outputs in the store
+    model_versions = analysis_models(summary_mode)
+    stored = {name: stored_outputs(name, fetched[name], model_versions) for name in fetched}
+    pooled = [(name, index, article) for name in company_names if name in fetched
+              for index, article in enumerate(fetched[name])
+              if not stored[name][index].keys() >= model_versions.keys()]
+    contents = [preprocessing.prepare(article["content"]) for _, _, article in pooled]
+    
+    summaries_future = _pipeline_executor.submit(generate_summaries, contents, mode=summary_mode)
+    sentiments_future = _pipeline_executor.submit(analyze_sentiment_batch, contents)
+    topics_future = _pipeline_executor.submit(extract_topics_many, contents)
+    summaries = summaries_future.result()
+    sentiments = sentiments_future.result()
+    topics = topics_future.result()
+    
+    computed = {name: [{} for _ in fetched[name]] for name in fetched}
+    for (name, index, _), summary, sentiment, article_topics in zip(pooled, summaries, sentiments, topics):
+        computed[name][index] = {"summarize": summary, "sentiment": sentiment, "topics": article_topics}
+    
+    processed = {}
+    for name in company_names:
+        if name not in fetched:
+            continue
+        processed[name] = []
+        for article, article_stored, article_computed in zip(fetched[name], stored[name], computed[name]):
+            outputs = {**article_stored, **article_computed}
+            processed[name].append(build_article_result(article, outputs["summarize"], outputs["sentiment"],
+                                                        outputs["topics"]))
+        store_outputs(name, fetched[name], computed[name], model_versions)
+    
+    # Stages 3 and 4: comparative analysis and speech per company
+    for name, processed_articles in processed.items():
+        try:
+            comparative_analysis = perform_comparative_analysis(processed_articles)
+        except Exception as e:
+            errors[name] = f"Error analyzing articles: {str(e)}"
+            continue
+        
+        results[name] = {
+            "Company": name,
+            "Articles": processed_articles,
+            "Comparative Sentiment Score": comparative_analysis,
+            "Final Sentiment Analysis": comparative_analysis["Final Sentiment Analysis"],
+            "Audio": ""
+        }
+        if include_audio:
+            # Only schedules the synthesis; the audio is generated in the background
+            results[name]["Audio"] = convert_text_to_hindi_speech(comparative_analysis["Final Sentiment Analysis"])
+    
+    return {"results": results, "errors": errors}
+